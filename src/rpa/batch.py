@@ -0,0 +1,474 @@
+"""
+Resumable bulk person searches from JSONL.
+
+Reads one query per line (the columns of `batch_input`: name, cpf, nis,
+search_by, search_filter, since, until, columns), runs them on a pool of
+browser sessions and appends one record per input line to the output:
+`{"line", "status": "ok" | "error", "query", "result" | "errors"}`, or
+`{"line", "status": "rejected", "input", "errors"}` with the raw input row for
+rows that fail validation, in completion order. With `--result-files`, each search document is streamed to
+its own file and the record holds its `result_path` instead, so no worker ever
+holds a whole document in memory.
+
+Completed input lines are checkpointed: the byte offset below which every line
+is done, the done lines past it, and the output size at that moment. A killed
+run started again with the same arguments truncates the output to the
+checkpointed size and seeks straight to the first unfinished line, so no line
+is lost or written twice.
+
+Searches that fail on a portal outage (the errors the portal circuit breaker
+counts) are deferred: their lines stay unfinished, the run exits with status 1
+and running it again retries them. A line deferred `--max-deferrals` times is
+recorded as an error on its next failure, so one query the portal always fails
+cannot keep a batch from finishing. While the circuit is open, no further
+searches are queued.
+
+Usage:
+    python -m src.rpa.batch queries.jsonl results.jsonl [--concurrency 4] [--restart]
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from datetime import timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from src.rpa.modules.transparency_portal.person_search_service.batch_input import (
+    SEARCH_MODES, BatchValidator, search_options, to_json,
+)
+from src.rpa.modules.transparency_portal.scheduler import SearchScheduler
+from src.rpa.utils.circuit_breaker import portal_breaker
+from src.rpa.utils.driver_session import DriverSession
+from src.rpa.utils.get_cache import portal_state_service
+from src.rpa.utils.logger import configure_logging, get_logger, shutdown_logging
+
+logger = get_logger(__name__)
+
+CLIENT = 'batch'
+
+# Seconds between checks of the portal circuit while dispatch is paused.
+CIRCUIT_POLL = 5.0
+
+
+def count_lines(path: str, chunk_size: int = 1 << 20) -> int:
+    """Number of lines of a file, counting a last line without a newline."""
+    lines, last = 0, b'\n'
+    with open(path, 'rb') as file:
+        while chunk := file.read(chunk_size):
+            lines += chunk.count(b'\n')
+            last = chunk[-1:]
+    return lines + (last != b'\n')
+
+
+def read_lines(path: str, offset: int = 0, line: int = 1) -> Iterator[Tuple[int, int, bytes]]:
+    """Yield (line number, end offset, raw line) from byte `offset`, which starts line `line`."""
+    with open(path, 'rb') as file:
+        file.seek(offset)
+        for raw in file:
+            offset += len(raw)
+            yield line, offset, raw
+            line += 1
+
+
+def parse_line(raw: bytes) -> Dict[str, Any]:
+    """A JSONL row as `batch_input.read_rows` yields it, with `_error` if it is not a JSON object."""
+    text = raw.decode('utf-8-sig', errors='replace').rstrip('\r\n')
+    try:
+        row = json.loads(text)
+    except ValueError as e:
+        return {'_error': f"invalid JSON: {e}", '_raw': text}
+    return row if isinstance(row, dict) else {'_error': 'not a JSON object', '_raw': row}
+
+
+class Checkpoint:
+    """
+    Completed input lines of a batch run, saved atomically.
+
+    Parameters
+    ----------
+    path : str
+        Checkpoint file.
+    input_path : str
+        Input file the offsets refer to.
+
+    Attributes
+    ----------
+    offset : int
+        Byte offset of the first input line not known to be done.
+    line : int
+        Line number starting at `offset`.
+    done : dict
+        End offset of each done line past `line`.
+    deferred : dict
+        Times each unfinished line was deferred, over all runs.
+    output_size : int
+        Output bytes written by the completed lines.
+    completed : int
+        Input lines completed over all runs, blank lines excluded.
+    finished : bool
+        Whether the whole input was processed.
+    """
+
+    def __init__(self, path: str, input_path: str) -> None:
+        self.path = path
+        self.input_path = input_path
+        self.offset = 0
+        self.line = 1
+        self.done: Dict[int, int] = {}
+        self.deferred: Dict[int, int] = {}
+        self.output_size = 0
+        self.completed = 0
+        self.finished = False
+
+    @classmethod
+    def load(cls, path: str, input_path: str) -> Optional['Checkpoint']:
+        """The checkpoint saved at `path`, or None if there is none."""
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding='utf-8') as file:
+            data = json.load(file)
+        if os.path.abspath(data['input']) != os.path.abspath(input_path):
+            raise ValueError(f"Checkpoint '{path}' belongs to '{data['input']}', not '{input_path}'")
+        if data['offset'] > os.path.getsize(input_path):
+            raise ValueError(f"Input '{input_path}' is shorter than checkpoint '{path}'; was it replaced?")
+        checkpoint = cls(path, input_path)
+        checkpoint.offset = data['offset']
+        checkpoint.line = data['line']
+        checkpoint.done = {int(line): end for line, end in data['done'].items()}
+        checkpoint.deferred = {int(line): times for line, times in data.get('deferred', {}).items()}
+        checkpoint.output_size = data['output_size']
+        checkpoint.completed = data['completed']
+        checkpoint.finished = data['finished']
+        return checkpoint
+
+    def mark(self, line: int, end: int) -> None:
+        """Record `line`, ending at byte `end`, as done and advance the contiguous offset."""
+        self.deferred.pop(line, None)
+        self.done[line] = end
+        while self.line in self.done:
+            self.offset = self.done.pop(self.line)
+            self.line += 1
+
+    def save(self) -> None:
+        """Write the checkpoint through a temporary file, so a crash never leaves half of one."""
+        data = {
+            'input': self.input_path, 'offset': self.offset, 'line': self.line,
+            'done': {str(line): end for line, end in sorted(self.done.items())},
+            'deferred': {str(line): times for line, times in sorted(self.deferred.items())},
+            'output_size': self.output_size, 'completed': self.completed, 'finished': self.finished,
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        temp = f"{self.path}.tmp"
+        with open(temp, 'w', encoding='utf-8') as file:
+            json.dump(data, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp, self.path)
+
+
+class BatchRunner:
+    """
+    Run the queries of a JSONL file on a scheduler, resumably.
+
+    Parameters
+    ----------
+    input_path : str
+        JSONL file with one query per line.
+    output_path : str
+        JSONL file that receives one record per input line.
+    scheduler : SearchScheduler
+        Started scheduler the searches run on, in its lowest lane.
+    checkpoint_path : str, optional
+        Checkpoint file (default is `<output_path>.checkpoint.json`).
+    search_by : str, optional
+        Search mode of rows without a `search_by` field (default is 'cpf').
+    max_in_flight : int, optional
+        Queries queued or running at once; bounds memory on large inputs
+        (default is twice the scheduler's sessions).
+    checkpoint_every : float, optional
+        Seconds between checkpoints (default is 5.0).
+    progress_every : float, optional
+        Seconds between progress logs (default is 10.0).
+    restart : bool, optional
+        Whether to ignore an existing checkpoint and overwrite the output (default is False).
+    inline_results : bool, optional
+        Whether searches return their JSON, embedded in the records; False when
+        the scheduler's portals use `return_json=False`, whose saved path is
+        recorded as `result_path` (default is True).
+    max_deferrals : int, optional
+        Runs a line may be deferred by a portal outage; its next failure is
+        recorded as an error (default is 3).
+
+    Examples
+    --------
+    >>> scheduler = SearchScheduler([DriverSession() for _ in range(4)], reserved=0, save_json=False)
+    >>> scheduler.start()
+    >>> BatchRunner('queries.jsonl', 'results.jsonl', scheduler).run()
+    {'ok': 49873, 'error': 12, 'rejected': 115, 'deferred': 0}
+    """
+    CHUNK_SIZE = 256
+
+    def __init__(self, input_path: str, output_path: str, scheduler: SearchScheduler,
+                 checkpoint_path: Optional[str] = None, search_by: str = 'cpf',
+                 max_in_flight: Optional[int] = None, checkpoint_every: float = 5.0,
+                 progress_every: float = 10.0, restart: bool = False, inline_results: bool = True,
+                 max_deferrals: int = 3) -> None:
+        """Initialize the run; nothing is read until `run()`."""
+        if max_deferrals < 0:
+            raise ValueError("max_deferrals cannot be negative")
+        self.input_path = input_path
+        self.output_path = output_path
+        self.scheduler = scheduler
+        self.checkpoint_path = checkpoint_path or f"{output_path}.checkpoint.json"
+        self.validator = BatchValidator(search_by)
+        self.max_in_flight = max_in_flight or 2 * len(scheduler.sessions)
+        self.checkpoint_every = checkpoint_every
+        self.progress_every = progress_every
+        self.restart = restart
+        self.inline_results = inline_results
+        self.max_deferrals = max_deferrals
+        self.counts = {'ok': 0, 'error': 0, 'rejected': 0, 'deferred': 0}
+        self.checkpoint: Optional[Checkpoint] = None
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        self._output: Any = None
+        self._saved_at = 0.0
+        self._started = 0.0
+        self._resumed = 0
+        self._total = 0
+        self._stop_progress = threading.Event()
+
+    def open(self) -> None:
+        """Load or reset the checkpoint and open the output where the checkpoint left it."""
+        checkpoint = None if self.restart else Checkpoint.load(self.checkpoint_path, self.input_path)
+        if checkpoint is None:
+            if not self.restart and os.path.exists(self.output_path) and os.path.getsize(self.output_path):
+                raise ValueError(f"Output '{self.output_path}' exists without a checkpoint; "
+                                 f"pass --restart to overwrite it")
+            checkpoint = Checkpoint(self.checkpoint_path, self.input_path)
+        elif checkpoint.output_size > os.path.getsize(self.output_path):
+            raise ValueError(f"Output '{self.output_path}' is shorter than its checkpoint")
+        self.checkpoint = checkpoint
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.output_path)), exist_ok=True)
+        self._output = open(self.output_path, 'r+b' if os.path.exists(self.output_path) else 'wb')
+        self._output.truncate(checkpoint.output_size)
+        self._output.seek(checkpoint.output_size)
+        if checkpoint.completed:
+            logger.info("Resuming %s at line %s: %s line(s) already done", self.input_path,
+                        checkpoint.line, checkpoint.completed)
+
+    def run(self) -> Dict[str, int]:
+        """
+        Process every unfinished input line and return the count of records per status.
+
+        `deferred` counts searches left unfinished by a portal outage; the run
+        is finished only when there are none.
+        """
+        self.open()
+        checkpoint = self.checkpoint
+        if checkpoint.finished:
+            logger.info("Nothing to do: %s was fully processed", self.input_path)
+            self._output.close()
+            return self.counts
+
+        self._total = count_lines(self.input_path)
+        self._resumed = checkpoint.line - 1 + len(checkpoint.done)
+        self._started = self._saved_at = time.monotonic()
+        progress = threading.Thread(target=self._report, name='batch-progress', daemon=True)
+        progress.start()
+        try:
+            chunk: List[Tuple[int, int, Dict[str, Any]]] = []
+            for line, end, raw in read_lines(self.input_path, checkpoint.offset, checkpoint.line):
+                if line in checkpoint.done:
+                    continue
+                if not raw.strip():
+                    with self._lock:
+                        checkpoint.mark(line, end)
+                    continue
+                chunk.append((line, end, parse_line(raw)))
+                if len(chunk) >= self.CHUNK_SIZE:
+                    self._dispatch(chunk)
+                    chunk = []
+            self._dispatch(chunk)
+            for _ in range(self.max_in_flight):
+                self._slots.acquire()
+            checkpoint.finished = not self.counts['deferred']
+        except BaseException:
+            self.scheduler.close(cancel=True)
+            raise
+        finally:
+            self._stop_progress.set()
+            progress.join()
+            with self._lock:
+                self.save()
+            self._output.close()
+            self.log_progress()
+        return self.counts
+
+    def _dispatch(self, chunk: List[Tuple[int, int, Dict[str, Any]]]) -> None:
+        """Validate a chunk of rows in bulk, record rejects and queue the searches."""
+        ends = {line: end for line, end, _ in chunk}
+        for line, row, query, errors in self.validator.iter_checked([(line, row) for line, _, row in chunk]):
+            if errors:
+                self._complete(line, ends[line], {'line': line, 'status': 'rejected',
+                                                  'input': row.get('_raw', row), 'errors': errors})
+                continue
+            self._wait_for_portal()
+            self._slots.acquire()
+            future = self.scheduler.search(CLIENT, lane=self.scheduler.lanes[-1], **search_options(query))
+            future.add_done_callback(lambda done, line=line, end=ends[line], query=query:
+                                     self._finish(done, line, end, query))
+
+    @staticmethod
+    def _wait_for_portal() -> None:
+        """Hold dispatch while the portal circuit is open, instead of queuing searches bound to fail."""
+        delay = portal_breaker.retry_after()
+        if delay > 0:
+            logger.warning("Portal circuit is open; pausing dispatch for %.0fs", delay)
+        while delay > 0:
+            time.sleep(min(delay, CIRCUIT_POLL))
+            delay = portal_breaker.retry_after()
+
+    def _finish(self, future: Future, line: int, end: int, query: Dict[str, Any]) -> None:
+        """
+        Record the outcome of a search.
+
+        Cancelled searches and searches failed by a portal outage stay
+        unfinished for the next run, the latter at most `max_deferrals` times
+        per line before the failure is recorded as an error. The in-flight slot is released only after
+        the record is written, so draining the slots waits for every write.
+        """
+        try:
+            if future.cancelled():
+                return
+            error = future.exception()
+            if isinstance(error, portal_breaker.failure_types) and self._defer(line, error):
+                return
+            if error is not None:
+                record = {'line': line, 'status': 'error', 'query': to_json(query),
+                          'errors': [f"{type(error).__name__}: {error}"]}
+            else:
+                result = future.result()
+                record = {'line': line, 'status': 'ok', 'query': to_json(query)}
+                if self.inline_results or result == '[]':
+                    record['result'] = json.loads(result)
+                else:
+                    record['result_path'] = result
+            self._complete(line, end, record)
+        finally:
+            self._slots.release()
+
+    def _defer(self, line: int, error: BaseException) -> bool:
+        """Leave `line` for the next run, unless it was already deferred `max_deferrals` times."""
+        with self._lock:
+            deferrals = self.checkpoint.deferred.get(line, 0) + 1
+            if deferrals > self.max_deferrals:
+                return False
+            self.checkpoint.deferred[line] = deferrals
+            self.counts['deferred'] += 1
+        logger.warning("Deferring line %s (%s of %s): %s: %s", line, deferrals, self.max_deferrals,
+                       type(error).__name__, error, extra={'line': line})
+        return True
+
+    def _complete(self, line: int, end: int, record: Dict[str, Any]) -> None:
+        data = (json.dumps(record, ensure_ascii=False, default=str) + '\n').encode('utf-8')
+        with self._lock:
+            self._output.write(data)
+            self.checkpoint.mark(line, end)
+            self.checkpoint.completed += 1
+            self.counts[record['status']] += 1
+            if time.monotonic() - self._saved_at >= self.checkpoint_every:
+                self.save()
+
+    def save(self) -> None:
+        """Flush the output to disk, then checkpoint it. Caller holds the lock."""
+        self._output.flush()
+        os.fsync(self._output.fileno())
+        self.checkpoint.output_size = self._output.tell()
+        self.checkpoint.save()
+        self._saved_at = time.monotonic()
+
+    def _report(self) -> None:
+        while not self._stop_progress.wait(self.progress_every):
+            self.log_progress()
+
+    def log_progress(self) -> None:
+        """Log lines done, throughput of this run and the estimated time left."""
+        checkpoint = self.checkpoint
+        done = checkpoint.line - 1 + len(checkpoint.done)
+        elapsed = time.monotonic() - self._started
+        rate = (done - self._resumed) / elapsed if elapsed > 0 else 0.0
+        left = max(0, self._total - done)
+        eta = str(timedelta(seconds=round(left / rate))) if rate > 0 else 'unknown'
+        logger.info("Batch progress: %s/%s line(s), %.2f/s, ETA %s", done, self._total, rate, eta,
+                    extra={'done': done, 'total': self._total, 'per_s': round(rate, 3), 'eta': eta,
+                           **self.counts})
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('input', help="JSONL file with one query per line")
+    parser.add_argument('output', help="JSONL file that receives one record per input line")
+    parser.add_argument('--checkpoint', help="checkpoint file (default: <output>.checkpoint.json)")
+    parser.add_argument('--restart', action='store_true', help="ignore the checkpoint and overwrite the output")
+    parser.add_argument('--concurrency', type=int, default=4, help="browser sessions searches run on")
+    parser.add_argument('--profile', default='default', help="page profile of the browser sessions")
+    parser.add_argument('--timeout', type=int, default=10)
+    parser.add_argument('--circuit-wait', type=float, default=60.0,
+                        help="seconds to wait for the portal circuit breaker before failing a search")
+    parser.add_argument('--search-by', default='cpf', choices=SEARCH_MODES)
+    parser.add_argument('--checkpoint-every', type=float, default=5.0)
+    parser.add_argument('--progress-every', type=float, default=10.0)
+    parser.add_argument('--log-file', help="also write JSON logs to this file")
+    parser.add_argument('--max-deferrals', type=int, default=3,
+                        help="runs a line may be deferred by a portal outage before it is recorded as an error")
+    parser.add_argument('--result-files', action='store_true',
+                        help="stream each result to its own file and record its path instead of embedding it")
+    parser.add_argument('--no-browser-state', action='store_true',
+                        help="do not inject browser-state snapshots into the sessions")
+    args = parser.parse_args()
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    if args.max_deferrals < 0:
+        parser.error("--max-deferrals cannot be negative")
+
+    configure_logging(path=args.log_file)
+    browser_state = None if args.no_browser_state else portal_state_service()
+    if browser_state is not None:
+        browser_state.start()
+    sessions = [DriverSession(profile=args.profile, browser_state=browser_state) for _ in range(args.concurrency)]
+    scheduler = SearchScheduler(sessions, reserved=0, timeout=args.timeout, save_json=args.result_files,
+                                return_json=not args.result_files, circuit_wait=args.circuit_wait)
+    runner = BatchRunner(args.input, args.output, scheduler, checkpoint_path=args.checkpoint,
+                         search_by=args.search_by, checkpoint_every=args.checkpoint_every,
+                         progress_every=args.progress_every, restart=args.restart,
+                         inline_results=not args.result_files, max_deferrals=args.max_deferrals)
+    scheduler.start()
+    try:
+        counts = runner.run()
+    except KeyboardInterrupt:
+        logger.warning("Interrupted; run again with the same arguments to resume")
+        return 130
+    except ValueError as e:
+        logger.error("%s", e)
+        return 2
+    finally:
+        scheduler.close()
+        if browser_state is not None:
+            browser_state.stop()
+        shutdown_logging()
+    print(json.dumps(counts))
+    if counts['deferred']:
+        logger.warning("%s search(es) failed on a portal outage; run again with the same arguments to retry them",
+                       counts['deferred'])
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,453 @@
+"""
+Local stand-ins for the Transparency Portal and the Selenium grid, for load tests.
+
+`FakePortal` serves a small HTTP imitation of the portal pages the automation
+visits (home, person search, person page and paginated detail tables) with
+configurable latency and failure rate. `FakeGrid` hands out `FakeDriver`
+sessions, limited to a number of slots like grid nodes; a `FakeDriver` loads
+pages from the fake portal and answers the selectors in the CONSTANTS modules,
+so the real `TransparencyPortal` stack runs unchanged without a browser.
+"""
+
+import random
+import re
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from bs4 import BeautifulSoup
+from selenium.common.exceptions import NoSuchElementException, NoSuchWindowException
+from selenium.webdriver.common.by import By
+
+from src.rpa.modules.transparency_portal.CONSTANTS import (
+    TransparencyPortalCONSTANTS,
+    PersonSearchServiceCONSTANTS,
+)
+
+PORTAL = TransparencyPortalCONSTANTS.Xpath
+PERSON = PersonSearchServiceCONSTANTS.Xpath
+
+# CSS equivalents of the automation's XPath selectors, evaluated on the fake pages.
+SELECTORS: Dict[str, str] = {
+    PORTAL.ACCEPT_ALL_COOKIES_BTN.value: '#accept-all-btn',
+    PORTAL.TUTORIAL_NOTIFICATION_CLOSE_BTN.value: 'button.botao-tutorial:-soup-contains("Pular tutorial")',
+    PERSON.PEOPLE_SEARCH_SERVICE_BTN.value: 'h5.pl-3.pr-3:-soup-contains("Pessoas Físicas e Jurídicas")',
+    PERSON.NATURAL_PERSON_SEARCH_BTN.value: '#main-content button[onclick]',
+    PERSON.ENTER_SEARCH_VALUE.value: '#termo',
+    PERSON.SEARCH_BTN.value: 'form#form-superior button.br-button[type="submit"]',
+    PERSON.FILTER_SEARCH_BTN.value: '#accordion1 button[aria-controls*="busca-refinada"]',
+    PERSON.VISIBLE_FILTER_SEARCH_BTN.value: 'div.item.bordered button.header[aria-controls="box-busca-refinada"]',
+    PERSON.SOCIAL_PROGRAMS_BTN.value: '#box-busca-refinada label[for="beneficiarioProgramaSocial"]',
+    PERSON.NAMES_FOUND.value: 'a.link-busca-nome',
+    PERSON.CPFs_FOUND.value: 'div.mt-3 > strong',
+    PERSON.TOTAL_VALUES_FOUND.value: '.br-list p:-soup-contains("Foram encontrados") > strong#countResultados',
+    PERSON.FETCH_LOCATION.value: (
+        'section.dados-tabelados div[class="col-xs-12 col-sm-3"]:has(strong:-soup-contains("Localidade")) > span'
+    ),
+    PERSON.FETCH_CPF.value: 'section.dados-tabelados div.col-xs-12:has(strong:-soup-contains("CPF")) span',
+    PERSON.FINANCIAL_RESOURCES_RECEIPTS_BTN.value: 'span.title:-soup-contains("Recebimentos de recursos")',
+    PERSON.SCREENSHOT_MAIN_PAGE.value: '#main',
+    PERSON.NEXT_PAGE_BTN.value: '#tabelaDetalheValoresRecebidos_next > button',
+}
+
+# 1x1 transparent PNG returned by element screenshots.
+PIXEL_PNG = bytes.fromhex(
+    '89504e470d0a1a0a0000000d49484452000000010000000108060000001f15c489'
+    '0000000d49444154789c6360000002000001e221bc330000000049454e44ae426082'
+)
+
+WINDOW_OPEN = re.compile(r"window\.open\('([^']+)'")
+
+HOME_PAGE = """<html><head><title>Portal da Transparência</title></head><body>
+<button id="accept-all-btn">Aceitar todos</button>
+<button class="botao-tutorial">Pular tutorial</button>
+<h5 class="pl-3 pr-3">Pessoas Físicas e Jurídicas</h5>
+<div id="main-content">
+<button onclick="location.href='/pessoa-fisica/busca/lista';" data-href="/pessoa-fisica/busca/lista">Pessoa física</button>
+</div></body></html>"""
+
+SEARCH_PAGE = """<html><head><title>Busca</title></head><body>
+<form id="form-superior"><input id="termo" value="{term}"/>
+<button class="br-button" type="submit" data-submit="/pessoa-fisica/busca/lista">Buscar</button></form>
+<div id="accordion1"><div class="item bordered">
+<button class="header active" aria-controls="box-busca-refinada"><span class="title">Refine a Busca</span></button>
+</div><div id="box-busca-refinada"><label for="beneficiarioProgramaSocial">Beneficiário</label></div></div>
+{results}</body></html>"""
+
+RESULTS = """<div class="br-list"><p>Foram encontrados <strong id="countResultados">{count}</strong> resultados</p>
+{items}</div>"""
+
+RESULT_ITEM = """<div class="item"><a class="link-busca-nome" data-href="/busca/pessoa-fisica/{cpf}">{name}</a>
+<div class="mt-3"><strong>{masked}</strong></div></div>"""
+
+PERSON_PAGE = """<html><head><title>Pessoa</title></head><body><div id="main">
+<section class="dados-tabelados"><div class="row">
+<div class="col-xs-12 col-sm-3"><strong>CPF</strong><span>{masked}</span></div>
+<div class="col-xs-12 col-sm-3"><strong>Localidade</strong><span>{location}</span></div>
+</div></section>
+<button><span class="title">Recebimentos de recursos</span></button>
+{tables}</div></body></html>"""
+
+RESOURCE_TABLE = """<div class="br-table"><strong>{title}</strong><table>
+<thead><tr><th>NIS</th><th>Nome</th><th>Valor Recebido</th><th>Detalhar</th></tr></thead>
+<tbody><tr><td>{nis}</td><td>{name}</td><td>R$ {total}</td><td><a href="{link}">Detalhar</a></td></tr></tbody>
+</table></div>"""
+
+DETAIL_PAGE = """<html><head><title>Detalhamento</title></head><body>
+<table class="dataTable no-footer"><thead><tr><th>Mês folha</th><th>UF</th><th>Valor (R$)</th></tr></thead>
+<tbody>{rows}</tbody></table>{next}</body></html>"""
+
+NEXT_BUTTON = """<div id="tabelaDetalheValoresRecebidos_next"><button data-href="{href}">Próxima</button></div>"""
+
+
+class FakePortal:
+    """
+    Threaded HTTP imitation of the portal pages visited by a person search.
+
+    Parameters
+    ----------
+    latency : float, optional
+        Seconds added to every response (default is 0.05).
+    jitter : float, optional
+        Maximum extra random seconds per response (default is 0.05).
+    resources : int, optional
+        Resource tables on each person page (default is 2).
+    detail_pages : int, optional
+        Pages of each resource detail table (default is 3).
+    rows_per_page : int, optional
+        Rows on each detail page (default is 10).
+    not_found_rate : float, optional
+        Share of searches answered with no results (default is 0.0).
+    """
+
+    def __init__(self, latency: float = 0.05, jitter: float = 0.05, resources: int = 2, detail_pages: int = 3,
+                 rows_per_page: int = 10, not_found_rate: float = 0.0, seed: int = 0) -> None:
+        """Initialize the page settings; the server starts with `start()`."""
+        self.latency = latency
+        self.jitter = jitter
+        self.resources = resources
+        self.detail_pages = detail_pages
+        self.rows_per_page = rows_per_page
+        self.not_found_rate = not_found_rate
+        self.random = random.Random(seed)
+        self.requests = 0
+        self._lock = threading.Lock()
+        self.server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def url(self) -> str:
+        """Base URL of the running server."""
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'FakePortal':
+        """Start serving on a free local port in a background thread."""
+        portal = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                body = portal.render(self.path).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, name='fake-portal', daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def __enter__(self) -> 'FakePortal':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def delay(self) -> float:
+        with self._lock:
+            self.requests += 1
+            return self.latency + self.random.random() * self.jitter
+
+    def found(self) -> bool:
+        with self._lock:
+            return self.random.random() >= self.not_found_rate
+
+    def render(self, path: str) -> str:
+        """Build the page for a request path after the configured latency."""
+        time.sleep(self.delay())
+        parsed = urlparse(path)
+        query = parse_qs(parsed.query)
+        parts = [part for part in parsed.path.split('/') if part]
+
+        if parts[:3] == ['pessoa-fisica', 'busca', 'lista']:
+            term = query.get('termo', [''])[0]
+            results = ''
+            if term:
+                if self.found():
+                    cpf = term.rjust(11, '0')[-11:]
+                    item = RESULT_ITEM.format(cpf=cpf, name='FULANO DE TAL SILVA', masked=self.masked(cpf))
+                    results = RESULTS.format(count=1, items=item)
+                else:
+                    results = RESULTS.format(count=0, items='')
+            return SEARCH_PAGE.format(term=term, results=results)
+
+        if parts[:2] == ['busca', 'pessoa-fisica'] and len(parts) == 3:
+            cpf = parts[2]
+            total = self.amount(600 * self.rows_per_page * self.detail_pages)
+            tables = ''.join(
+                RESOURCE_TABLE.format(title=f"Programa {k + 1}", nis=f"1{cpf[:10]}", name='FULANO DE TAL SILVA',
+                                      total=total, link=f"/beneficios/{cpf}/{k + 1}?pagina=1")
+                for k in range(self.resources)
+            )
+            return PERSON_PAGE.format(masked=self.masked(cpf), location='SÃO PAULO - SP', tables=tables)
+
+        if parts[:1] == ['beneficios'] and len(parts) == 3:
+            page = int(query.get('pagina', ['1'])[0])
+            rows = ''.join(
+                f"<tr><td>{self.month(page, i)}</td><td>SP</td><td>600,00</td></tr>"
+                for i in range(self.rows_per_page)
+            )
+            next_button = ''
+            if page < self.detail_pages:
+                next_button = NEXT_BUTTON.format(href=f"{parsed.path}?pagina={page + 1}")
+            return DETAIL_PAGE.format(rows=rows, next=next_button)
+
+        return HOME_PAGE
+
+    @staticmethod
+    def amount(value: int) -> str:
+        """Amount in the portal's format, e.g. 18.000,00."""
+        return f"{value:,}".replace(',', '.') + ',00'
+
+    @staticmethod
+    def masked(cpf: str) -> str:
+        """CPF as shown by the portal, with only the middle six digits visible."""
+        return f"***.{cpf[3:6]}.{cpf[6:9]}-**"
+
+    def month(self, page: int, index: int) -> str:
+        """Reference month of a detail row, newest first across pages."""
+        offset = (page - 1) * self.rows_per_page + index
+        total = 2024 * 12 + 11 - offset
+        return f"{total % 12 + 1:02d}/{total // 12}"
+
+
+class FakeTab:
+    """One browser tab of a fake session."""
+
+    def __init__(self, handle: str) -> None:
+        self.handle = handle
+        self.url = 'about:blank'
+        self.html = '<html><head><title></title></head><body></body></html>'
+        self.soup = BeautifulSoup(self.html, 'html.parser')
+        self.fields: Dict[str, str] = {}
+
+
+class FakeElement:
+    """An element of a fake page, supporting the WebElement calls the automation makes."""
+
+    def __init__(self, driver: 'FakeDriver', tag: Any) -> None:
+        self.driver = driver
+        self.tag = tag
+
+    @property
+    def text(self) -> str:
+        return self.tag.get_text(' ', strip=True)
+
+    @property
+    def screenshot_as_png(self) -> bytes:
+        return PIXEL_PNG
+
+    def is_displayed(self) -> bool:
+        return True
+
+    def is_enabled(self) -> bool:
+        return True
+
+    def get_attribute(self, name: str) -> Optional[str]:
+        value = self.tag.get(name)
+        return ' '.join(value) if isinstance(value, list) else value
+
+    def clear(self) -> None:
+        self.driver.tab.fields[self.tag.get('id', '')] = ''
+
+    def send_keys(self, value: str) -> None:
+        field = self.tag.get('id', '')
+        self.driver.tab.fields[field] = self.driver.tab.fields.get(field, '') + value
+
+    def click(self) -> None:
+        if href := self.tag.get('data-href'):
+            self.driver.load(href)
+        elif action := self.tag.get('data-submit'):
+            self.driver.load(f"{action}?termo={self.driver.tab.fields.get('termo', '')}")
+
+
+class FakeSwitchTo:
+    def __init__(self, driver: 'FakeDriver') -> None:
+        self.driver = driver
+
+    def window(self, handle: str) -> None:
+        if handle not in self.driver.tabs:
+            raise NoSuchWindowException(f"No window {handle}")
+        self.driver.current = handle
+
+
+class FakeDriver:
+    """
+    Browser session stand-in that loads pages from a `FakePortal`.
+
+    Requests for the real portal URL are sent to the fake portal instead. The
+    automation's fixed page pauses are multiplied by `pause_scale` on this session.
+    """
+
+    def __init__(self, portal_url: str, pause_scale: float = 1.0) -> None:
+        self.portal_url = portal_url
+        self.pause_scale = pause_scale
+        self.tabs: Dict[str, FakeTab] = {}
+        self._next_handle = 0
+        self.current = self.new_tab().handle
+        self.switch_to = FakeSwitchTo(self)
+        self.cookies: List[Dict[str, Any]] = []
+
+    def new_tab(self) -> FakeTab:
+        tab = FakeTab(f"tab-{self._next_handle}")
+        self._next_handle += 1
+        self.tabs[tab.handle] = tab
+        return tab
+
+    @property
+    def tab(self) -> FakeTab:
+        if self.current not in self.tabs:
+            raise NoSuchWindowException("Current window is closed")
+        return self.tabs[self.current]
+
+    def resolve(self, url: str) -> str:
+        base = TransparencyPortalCONSTANTS.Url.TRANSPARENCY_PORTAL
+        if url.startswith(base):
+            return self.portal_url + url[len(base):]
+        if url.startswith('/'):
+            return self.portal_url + url
+        return url
+
+    def load(self, url: str, tab: Optional[FakeTab] = None) -> None:
+        tab = tab or self.tab
+        tab.url = self.resolve(url)
+        with urllib.request.urlopen(tab.url) as response:
+            tab.html = response.read().decode('utf-8')
+        tab.soup = BeautifulSoup(tab.html, 'html.parser')
+        tab.fields = {}
+
+    # WebDriver API used by the automation
+
+    def get(self, url: str) -> None:
+        self.load(url)
+
+    def refresh(self) -> None:
+        self.load(self.tab.url)
+
+    @property
+    def page_source(self) -> str:
+        return self.tab.html
+
+    @property
+    def title(self) -> str:
+        return self.tab.soup.title.get_text() if self.tab.soup.title else ''
+
+    @property
+    def window_handles(self) -> List[str]:
+        return list(self.tabs)
+
+    @property
+    def current_window_handle(self) -> str:
+        return self.current
+
+    def find_elements(self, by: str = By.XPATH, value: str = '') -> List[FakeElement]:
+        if by != By.XPATH or value not in SELECTORS:
+            raise NoSuchElementException(f"Selector not supported by the fake portal: {value}")
+        return [FakeElement(self, tag) for tag in self.tab.soup.select(SELECTORS[value])]
+
+    def find_element(self, by: str = By.XPATH, value: str = '') -> FakeElement:
+        elements = self.find_elements(by, value)
+        if not elements:
+            raise NoSuchElementException(f"No element for {value}")
+        return elements[0]
+
+    def execute_script(self, script: str, *args: Any) -> Any:
+        if match := WINDOW_OPEN.search(script):
+            self.load(match.group(1), self.new_tab())
+        return None
+
+    def add_cookie(self, cookie: Dict[str, Any]) -> None:
+        self.cookies.append(cookie)
+
+    def close(self) -> None:
+        del self.tabs[self.tab.handle]
+
+    def quit(self) -> None:
+        self.tabs.clear()
+
+    def save_screenshot(self, path: str) -> bool:
+        with open(path, 'wb') as file:
+            file.write(PIXEL_PNG)
+        return True
+
+    def maximize_window(self) -> None:
+        pass
+
+    def implicitly_wait(self, seconds: float) -> None:
+        pass
+
+
+class FakeGrid:
+    """
+    Selenium grid stand-in with a fixed number of session slots.
+
+    Sessions are created on demand (after `session_start` seconds, like a new
+    browser) and reused once released; a session whose job failed is dropped.
+    Sessions scale the automation's fixed page pauses by `pause_scale`.
+    """
+
+    def __init__(self, portal_url: str, slots: int = 4, session_start: float = 0.5,
+                 pause_scale: float = 1.0) -> None:
+        """Initialize with the fake portal URL, slot count, session start time and pause scale."""
+        if slots < 1:
+            raise ValueError("slots must be at least 1")
+        self.portal_url = portal_url
+        self.pause_scale = pause_scale
+        self.slots = slots
+        self.session_start = session_start
+        self._slots = threading.BoundedSemaphore(slots)
+        self._idle: List[FakeDriver] = []
+        self._lock = threading.Lock()
+        self.sessions_created = 0
+
+    @contextmanager
+    def session(self) -> Iterator[FakeDriver]:
+        """Wait for a free slot and yield a session on it."""
+        self._slots.acquire()
+        try:
+            with self._lock:
+                driver = self._idle.pop() if self._idle else None
+            if driver is None:
+                time.sleep(self.session_start)
+                driver = FakeDriver(self.portal_url, self.pause_scale)
+                with self._lock:
+                    self.sessions_created += 1
+            yield driver
+            with self._lock:
+                self._idle.append(driver)
+        finally:
+            self._slots.release()
@@ -0,0 +1,220 @@
+"""
+Concurrent load test of the full TransparencyPortal stack.
+
+Runs person searches at increasing concurrency against a local fake portal and
+grid stand-in (see `fake_portal`), and reports per level: throughput, p50/p95/p99
+job latency, queue wait (until a grid session is obtained), error rate and
+process memory. Latency and queue wait are measured from when a worker starts
+the job. With `--baseline`, exits with status 1 when a level regresses beyond
+`--tolerance`, and with status 2, without running, when the baseline was
+recorded with other settings; `--save-baseline` stores the current run as the
+baseline.
+
+The automation's fixed page pauses are multiplied by `--sleep-scale` on the
+fake grid's sessions so a level completes in seconds; portal latency and wait
+timeouts are not scaled.
+
+Usage:
+    python -m src.rpa.benchmarks.load_test --levels 1 2 4 8 --jobs 16 --grid-slots 4
+    python -m src.rpa.benchmarks.load_test --baseline src/rpa/benchmarks/baselines/load_test.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from src.rpa.benchmarks.fake_portal import FakeGrid, FakePortal
+from src.rpa.modules.transparency_portal import TransparencyPortal
+from src.rpa.utils.logger import configure_logging, shutdown_logging
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baselines', 'load_test.json')
+
+
+@dataclass
+class JobResult:
+    """Timing and outcome of one load-test job."""
+    latency: float
+    queue_wait: float
+    error: Optional[str] = None
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile, 0.0 for no values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q * len(ordered) + 0.5)) - 1))]
+
+
+def memory_mb() -> Dict[str, Optional[float]]:
+    """Current and peak resident memory of this process, where the platform reports them."""
+    current = None
+    if os.path.exists('/proc/self/statm'):
+        with open('/proc/self/statm') as file:
+            current = int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    peak = None
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak = peak / 2 ** 20 if sys.platform == 'darwin' else peak / 1024
+    return {'rss_mb': current and round(current, 1), 'peak_rss_mb': peak and round(peak, 1)}
+
+
+def run_job(grid: FakeGrid, index: int, timeout: int, profile_memory: bool = False) -> JobResult:
+    """Run one person search on a grid session, timing the wait for the session and the whole job."""
+    started = time.perf_counter()
+    try:
+        with grid.session() as driver:
+            queue_wait = time.perf_counter() - started
+            cpf = f"{10000000000 + index}"
+            TransparencyPortal(
+                driver, timeout=timeout, save_json=False, profile_memory=profile_memory
+            ).person_search_service(
+                name=f"Pessoa {index} Silva", cpf=cpf
+            )
+        return JobResult(time.perf_counter() - started, queue_wait)
+    except Exception as e:
+        elapsed = time.perf_counter() - started
+        return JobResult(elapsed, elapsed, f"{type(e).__name__}: {e}")
+
+
+def run_level(grid: FakeGrid, concurrency: int, jobs: int, timeout: int, offset: int = 0,
+              profile_memory: bool = False) -> Dict[str, Any]:
+    """Submit `jobs` searches to `concurrency` workers at once and summarize them."""
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='load') as executor:
+        futures = [
+            executor.submit(run_job, grid, offset + i, timeout, profile_memory)
+            for i in range(jobs)
+        ]
+        results = [future.result() for future in futures]
+    wall = time.perf_counter() - started
+
+    ok = [r for r in results if r.error is None]
+    latencies = [r.latency for r in ok]
+    waits = [r.queue_wait for r in ok]
+    errors = sorted({r.error for r in results if r.error})
+    return {
+        'concurrency': concurrency,
+        'jobs': jobs,
+        'wall_s': round(wall, 3),
+        'throughput_per_s': round(len(ok) / wall, 3) if wall else 0.0,
+        'latency_p50_s': round(percentile(latencies, 0.50), 3),
+        'latency_p95_s': round(percentile(latencies, 0.95), 3),
+        'latency_p99_s': round(percentile(latencies, 0.99), 3),
+        'queue_wait_p50_s': round(percentile(waits, 0.50), 3),
+        'queue_wait_p95_s': round(percentile(waits, 0.95), 3),
+        'error_rate': round(1 - len(ok) / jobs, 3) if jobs else 0.0,
+        'errors': errors[:5],
+        **memory_mb(),
+    }
+
+
+def compare(baseline: Dict[str, Any], levels: List[Dict[str, Any]], tolerance: float) -> List[str]:
+    """Return a message for every level that regressed against the baseline."""
+    base_levels = {level['concurrency']: level for level in baseline.get('levels', [])}
+    regressions = []
+    for level in levels:
+        base = base_levels.get(level['concurrency'])
+        if base is None:
+            continue
+        label = f"concurrency {level['concurrency']}"
+        if level['throughput_per_s'] < base['throughput_per_s'] * (1 - tolerance):
+            regressions.append(f"{label}: throughput {level['throughput_per_s']}/s "
+                               f"< baseline {base['throughput_per_s']}/s")
+        for metric in ('latency_p95_s', 'latency_p99_s'):
+            if level[metric] > base[metric] * (1 + tolerance):
+                regressions.append(f"{label}: {metric} {level[metric]}s > baseline {base[metric]}s")
+        if level['error_rate'] > base['error_rate'] + 0.02:
+            regressions.append(f"{label}: error rate {level['error_rate']} > baseline {base['error_rate']}")
+    return regressions
+
+
+def print_report(levels: List[Dict[str, Any]]) -> None:
+    columns = ('concurrency', 'throughput_per_s', 'latency_p50_s', 'latency_p95_s', 'latency_p99_s',
+               'queue_wait_p50_s', 'queue_wait_p95_s', 'error_rate', 'peak_rss_mb')
+    print(''.join(f"{column:>18}" for column in columns))
+    for level in levels:
+        print(''.join(f"{str(level[column]):>18}" for column in columns))
+        for error in level['errors']:
+            print(f"    error: {error}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--levels', type=int, nargs='+', default=[1, 2, 4, 8], help="concurrency ramp")
+    parser.add_argument('--jobs', type=int, default=16, help="jobs per level")
+    parser.add_argument('--grid-slots', type=int, default=4)
+    parser.add_argument('--session-start', type=float, default=0.5, help="seconds to start a grid session")
+    parser.add_argument('--portal-latency', type=float, default=0.05, help="seconds per portal response")
+    parser.add_argument('--portal-jitter', type=float, default=0.05)
+    parser.add_argument('--detail-pages', type=int, default=3)
+    parser.add_argument('--not-found-rate', type=float, default=0.0, help="share of searches with no result")
+    parser.add_argument('--sleep-scale', type=float, default=0.02)
+    parser.add_argument('--timeout', type=int, default=5, help="automation wait timeout in seconds")
+    parser.add_argument('--baseline', nargs='?', const=DEFAULT_BASELINE, help="compare against this baseline")
+    parser.add_argument('--save-baseline', nargs='?', const=DEFAULT_BASELINE, help="store this run as baseline")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed relative regression")
+    parser.add_argument('--output', help="write the full report as JSON")
+    parser.add_argument('--log-level', default='WARNING')
+    parser.add_argument('--profile-memory', action='store_true',
+                        help="log a tracemalloc report per job stage (slower; profiled jobs run one at a time)")
+    args = parser.parse_args()
+
+    settings = {key: value for key, value in vars(args).items()
+                if key not in ('baseline', 'save_baseline', 'output', 'log_level', 'tolerance', 'profile_memory')}
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            baseline = json.load(file)
+        differences = sorted(key for key in settings.keys() | baseline.get('settings', {}).keys()
+                             if settings.get(key) != baseline.get('settings', {}).get(key))
+        if differences:
+            print(f"Baseline was recorded with different settings ({', '.join(differences)}); not comparing")
+            raise SystemExit(2)
+
+    configure_logging(args.log_level, levels={'src.rpa.utils.memory_profiler': 'INFO'} if args.profile_memory else None)
+    portal = FakePortal(latency=args.portal_latency, jitter=args.portal_jitter, detail_pages=args.detail_pages,
+                        not_found_rate=args.not_found_rate)
+    try:
+        with portal:
+            grid = FakeGrid(portal.url, slots=args.grid_slots, session_start=args.session_start,
+                            pause_scale=args.sleep_scale)
+            levels = []
+            for n, concurrency in enumerate(args.levels):
+                levels.append(run_level(grid, concurrency, args.jobs, args.timeout, offset=n * args.jobs,
+                                        profile_memory=args.profile_memory))
+    finally:
+        shutdown_logging()
+
+    report = {'settings': settings, 'levels': levels}
+    print_report(levels)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=4)
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.save_baseline) or '.', exist_ok=True)
+        with open(args.save_baseline, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=4)
+        print(f"Baseline saved to {args.save_baseline}")
+    if baseline is not None:
+        regressions = compare(baseline, levels, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            raise SystemExit(1)
+        print("No regression against baseline")
+
+
+if __name__ == '__main__':
+    main()
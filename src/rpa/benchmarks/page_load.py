@@ -0,0 +1,82 @@
+"""
+Page-load benchmark for browser profiles.
+
+Loads portal pages with each profile on the Selenium grid and reports wall time,
+DOMContentLoaded, load event and the number and size of fetched resources.
+
+Usage:
+    python -m src.rpa.benchmarks.page_load --runs 5 --profiles default lightweight
+"""
+
+import argparse
+import statistics
+import time
+from typing import Dict, List
+
+from src.rpa.modules.transparency_portal.CONSTANTS import (
+    TransparencyPortalCONSTANTS,
+    PersonSearchServiceCONSTANTS,
+)
+from src.rpa.utils.web_driver_config import PAGE_PROFILES, web_driver
+
+URLS = [
+    TransparencyPortalCONSTANTS.Url.TRANSPARENCY_PORTAL,
+    PersonSearchServiceCONSTANTS.Url.NATURAL_PERSON_SEARCH,
+]
+
+NAVIGATION_TIMING = """
+const nav = performance.getEntriesByType('navigation')[0];
+const resources = performance.getEntriesByType('resource');
+return {
+    dom_content_loaded: nav ? nav.domContentLoadedEventEnd : null,
+    load: nav ? nav.loadEventEnd : null,
+    resources: resources.length,
+    transfer_bytes: resources.reduce((total, r) => total + (r.transferSize || 0), 0),
+};
+"""
+
+
+def measure(profile: str, runs: int) -> Dict[str, float]:
+    """Load every URL `runs` times on a fresh session and return median metrics."""
+    driver = web_driver(profile=profile)
+    samples: Dict[str, List[float]] = {
+        'wall_ms': [], 'dom_content_loaded_ms': [], 'load_ms': [], 'resources': [], 'transfer_kb': [],
+    }
+    try:
+        for _ in range(runs):
+            for url in URLS:
+                started = time.perf_counter()
+                driver.get(url)
+                samples['wall_ms'].append((time.perf_counter() - started) * 1000)
+                timing = driver.execute_script(NAVIGATION_TIMING)
+                samples['dom_content_loaded_ms'].append(timing['dom_content_loaded'] or 0)
+                samples['load_ms'].append(timing['load'] or 0)
+                samples['resources'].append(timing['resources'])
+                samples['transfer_kb'].append(timing['transfer_bytes'] / 1024)
+    finally:
+        driver.quit()
+    return {name: round(statistics.median(values), 1) for name, values in samples.items()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--profiles', nargs='+', default=list(PAGE_PROFILES), choices=list(PAGE_PROFILES))
+    args = parser.parse_args()
+
+    results = {profile: measure(profile, args.runs) for profile in args.profiles}
+
+    metrics = list(next(iter(results.values())))
+    print(f"{'profile':<14}" + ''.join(f"{metric:>24}" for metric in metrics))
+    for profile, values in results.items():
+        print(f"{profile:<14}" + ''.join(f"{values[metric]:>24}" for metric in metrics))
+
+    if 'default' in results:
+        base = results['default']['wall_ms'] or 1
+        for profile, values in results.items():
+            if profile != 'default':
+                print(f"{profile}: {100 * (1 - values['wall_ms'] / base):.0f}% faster wall time than default")
+
+
+if __name__ == '__main__':
+    main()
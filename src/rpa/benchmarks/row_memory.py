@@ -0,0 +1,69 @@
+"""
+Extrato row memory benchmark.
+
+Builds the same scraped detail rows as plain dicts of cell texts (the layout
+before `ExtratoRow`) and as `ExtratoRow`s, and reports the bytes each layout
+keeps allocated per row, measured with tracemalloc. No browser session is
+opened.
+
+Usage:
+    python -m src.rpa.benchmarks.row_memory --rows 100000
+"""
+
+import argparse
+import gc
+import tracemalloc
+from typing import Any, Callable, List, Sequence
+
+from src.rpa.modules.transparency_portal.person_search_service.records import TableSchema
+
+HEADERS = ('Mês folha', 'Mês referência', 'UF', 'Município', 'Valor (R$)')
+
+
+def scraped_cells(rows: int) -> List[List[str]]:
+    """Cell texts shaped like the portal's detail pages, each a separate string as read from a page."""
+    return [
+        [f"{i % 12 + 1:02d}/{2024 - i // 12 % 10}", f"{(i + 1) % 12 + 1:02d}/{2024 - i // 12 % 10}",
+         ''.join(['S', 'P']), ''.join(['SÃO ', 'PAULO']), f"{600 + i % 400:,}".replace(',', '.') + ',00']
+        for i in range(rows)
+    ]
+
+
+def allocated(build: Callable[[List[List[str]]], Sequence[Any]], rows: int) -> float:
+    """Bytes per row, cell texts included, still allocated once the scraped cell lists are dropped."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    cells = scraped_cells(rows)
+    built = build(cells)
+    del cells
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del built
+    return size / rows
+
+
+def as_dicts(cells: List[List[str]]) -> List[dict]:
+    return [dict(zip(HEADERS, row)) for row in cells]
+
+
+def as_rows(cells: List[List[str]]) -> list:
+    schema = TableSchema.intern(HEADERS)
+    return [schema.row(row) for row in cells]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100_000)
+    args = parser.parse_args()
+
+    base = allocated(as_dicts, args.rows)
+    compact = allocated(as_rows, args.rows)
+    print(f"{'dict of cell texts':<24} {base:8.0f} B/row")
+    print(f"{'ExtratoRow':<24} {compact:8.0f} B/row")
+    print(f"ExtratoRow keeps {1 - compact / base:.0%} less per row")
+
+
+if __name__ == '__main__':
+    main()
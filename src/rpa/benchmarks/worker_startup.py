@@ -0,0 +1,74 @@
+"""
+Worker cold-start benchmark.
+
+Compares the time until a new worker has the automation modules loaded when it
+is started as a fresh interpreter and when it is forked from the pre-imported
+fork server of `WorkerLauncher`. No browser session is opened.
+
+Usage:
+    python -m src.rpa.benchmarks.worker_startup --runs 10
+"""
+
+import argparse
+import importlib
+import statistics
+import subprocess
+import sys
+import time
+from typing import List
+
+from src.rpa.utils.worker_launcher import PRELOAD_MODULES, WorkerLauncher
+
+IMPORT_ALL = '; '.join(f"import {module}" for module in PRELOAD_MODULES)
+
+
+def load_modules() -> None:
+    """Worker body: import everything a search worker needs."""
+    for module in PRELOAD_MODULES:
+        importlib.import_module(module)
+
+
+def cold_start(runs: int) -> List[float]:
+    """Seconds for a fresh interpreter to import the worker modules and exit."""
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, '-c', IMPORT_ALL], check=True)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def launcher_start(runs: int, method: str) -> List[float]:
+    """Seconds for a launcher worker to import the worker modules and exit, after warm-up."""
+    launcher = WorkerLauncher(method=method)
+    launcher.warm()
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        process = launcher.process(load_modules)
+        process.join()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--method', default=None, help="launcher start method (default: forkserver if available)")
+    args = parser.parse_args()
+
+    method = args.method or WorkerLauncher().method
+    results = {
+        'fresh interpreter': cold_start(args.runs),
+        f"launcher ({method})": launcher_start(args.runs, method),
+    }
+    for label, samples in results.items():
+        print(f"{label:<24} median {statistics.median(samples) * 1000:8.1f} ms"
+              f"   max {max(samples) * 1000:8.1f} ms")
+
+    base, launched = (statistics.median(samples) for samples in results.values())
+    print(f"launcher workers start {base / launched:.1f}x faster")
+
+
+if __name__ == '__main__':
+    main()
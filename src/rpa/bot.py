@@ -1,14 +1,19 @@
 import io
+import os
 import traceback
 
+from selenium.webdriver.remote.webdriver import WebDriver
+
 from src.rpa.modules.transparency_portal import TransparencyPortal
 from src.rpa.utils.CONSTANTS import ERROR_PATH, SCREENSHOT_ERROR_PATH
-from src.rpa.utils.web_driver_config import web_driver
+from src.rpa.utils.driver_session import DriverSession
+from src.rpa.utils.get_cache import portal_state_service
+from src.rpa.utils.logger import configure_logging, get_logger, shutdown_logging
 
-web_bot = web_driver()
+logger = get_logger(__name__)
 
 
-def main():
+def main(web_bot: WebDriver):
     transparency_portal = TransparencyPortal(web_bot)
 
     result_data = transparency_portal.person_search_service(
@@ -22,16 +27,22 @@ def main():
 
 
 if __name__ == '__main__':
+    configure_logging()
+    session = DriverSession(browser_state=portal_state_service())
     try:
-        main()
+        main(session.driver)
     except Exception as error:
-        web_bot.save_screenshot(
-          SCREENSHOT_ERROR_PATH
-        )
+        if session.started:
+            os.makedirs(os.path.dirname(SCREENSHOT_ERROR_PATH), exist_ok=True)
+            session.driver.save_screenshot(
+              SCREENSHOT_ERROR_PATH
+            )
         log_buffer = io.StringIO()
         traceback.print_exc(file=log_buffer)
+        os.makedirs(os.path.dirname(ERROR_PATH), exist_ok=True)
         with open(ERROR_PATH, "w") as log_file:
             log_file.write(log_buffer.getvalue())
-        print(error)
+        logger.exception("Automation failed: %s", error)
     finally:
-        web_bot.quit()
\ No newline at end of file
+        session.close()
+        shutdown_logging()
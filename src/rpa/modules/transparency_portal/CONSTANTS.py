@@ -50,6 +50,14 @@ class PersonSearchServiceCONSTANTS:
     Constants for the Person Search service automation.
     """
 
+    class Url:
+        """
+        URLs used by the person search service.
+        """
+        NATURAL_PERSON_SEARCH: str = (
+            f'{TransparencyPortalCONSTANTS.Url.TRANSPARENCY_PORTAL}/pessoa-fisica/busca/lista'
+        )
+
     class Xpath:
         """
         XPaths for person search service interactions, grouped by automation flow (navigation, search, filters, results).
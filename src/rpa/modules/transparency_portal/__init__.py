@@ -1,3 +1,16 @@
-from .core import TransparencyPortal
+import importlib
+from typing import Any
 
-__all__ = ['TransparencyPortal']
\ No newline at end of file
+_EXPORTS = {'TransparencyPortal': '.core'}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    """Import exported classes on first access, so loading CONSTANTS does not pull in Selenium."""
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
@@ -5,13 +5,18 @@ Provides command classes for browser interactions.
 """
 
 from abc import ABC, abstractmethod
+from typing import Any, Callable, Tuple
+
 from selenium.webdriver.common.by import By
 from selenium.webdriver.remote.webdriver import WebDriver
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 
 from src.rpa.modules.transparency_portal.CONSTANTS import TransparencyPortalCONSTANTS
+from src.rpa.utils.adaptive_timeout import wait_for
+from src.rpa.utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 
 class Bot(ABC):
@@ -27,12 +32,15 @@ class Bot(ABC):
         """Execute the automation action."""
         pass
 
-    def wait_and_click(self, xpath: str) -> None:
-        """Wait for element to be clickable and click it."""
+    def wait(self, locator: Tuple[str, str], condition: Callable[[Any], Callable],
+             optional: bool = False) -> Any:
+        """Wait for `condition(locator)` with the adaptive timeout learned for this step."""
+        return wait_for(self.web_bot, type(self).__name__, locator, condition, self.timeout, optional)
+
+    def wait_and_click(self, xpath: str, optional: bool = False) -> None:
+        """Wait for element to be clickable and click it; optional elements are only probed briefly."""
         try:
-            WebDriverWait(self.web_bot, self.timeout).until(
-                EC.element_to_be_clickable((By.XPATH, xpath))
-            ).click()
+            self.wait((By.XPATH, xpath), EC.element_to_be_clickable, optional).click()
         except TimeoutException as e:
             raise TimeoutException(f"Failed to click element: {xpath}") from e
 
@@ -44,10 +52,10 @@ class AcceptCookies(Bot):
     def execute(self) -> None:
         """Click the accept cookies button."""
         try:
-            self.wait_and_click(self.XPATH)
-            print("Cookies accepted")
+            self.wait_and_click(self.XPATH, optional=True)
+            logger.info("Cookies accepted")
         except TimeoutException:
-            print("No cookie prompt found")
+            logger.info("No cookie prompt found")
 
 
 class CloseTutorial(Bot):
@@ -57,7 +65,7 @@ class CloseTutorial(Bot):
     def execute(self) -> None:
         """Click the close tutorial button."""
         try:
-            self.wait_and_click(self.XPATH)
-            print("Tutorial closed")
+            self.wait_and_click(self.XPATH, optional=True)
+            logger.info("Tutorial closed")
         except TimeoutException:
-            print("No tutorial found")
+            logger.info("No tutorial found")
@@ -0,0 +1,280 @@
+"""
+Asyncio interface to the Transparency Portal automation.
+
+Every blocking WebDriver call of a search runs on a bounded thread pool, while
+the fixed pauses between steps (results loading, page settling) are awaited
+on the event loop instead of holding a thread. Searches wait for a free
+browser session without a thread either, so one process can coordinate
+hundreds of in-flight searches with a handful of threads.
+
+The search runs the same steps as `PersonSearchService.search`, awaited one by
+one. Detail pages are read on the search's own session, so `hedge` does not
+apply, and memory profiling is not available because tracemalloc would measure
+every search running on the loop; both options are rejected.
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import functools
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar, Union
+
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from src.rpa.modules.transparency_portal.CONSTANTS import PersonSearchServiceCONSTANTS
+from src.rpa.modules.transparency_portal.core import TransparencyPortal
+from src.rpa.modules.transparency_portal.person_search_service.batch_input import search_query
+from src.rpa.modules.transparency_portal.person_search_service.core import PersonSearchService
+from src.rpa.modules.transparency_portal.person_search_service.extrato_buffer import ExtratoBuffer
+from src.rpa.modules.transparency_portal.person_search_service.records import (
+    DetailFilter, ExtratoRow, PersonSummary,
+)
+from src.rpa.modules.transparency_portal.person_search_service.scraper import OpenDetailPage, ScrapePages
+from src.rpa.modules.transparency_portal.person_search_service.warm_cache import SearchCache
+from src.rpa.utils.driver_session import DriverSession
+from src.rpa.utils.web_driver_config import pause_seconds
+from src.rpa.utils.logger import get_logger, job_context
+
+logger = get_logger(__name__)
+
+T = TypeVar('T')
+
+
+class AsyncTransparencyPortal:
+    """
+    Run person searches from asyncio code on a pool of browser sessions.
+
+    Parameters
+    ----------
+    sessions : sequence of DriverSession
+        Browser sessions searches run on; a search holds one for its duration. Give
+        them a shared `browser_state` (`get_cache.portal_state_service()`) so every
+        new or recycled driver starts with the portal snapshot.
+    max_workers : int, optional
+        Threads running blocking WebDriver calls (default is the number of sessions).
+    timeout : int, optional
+        Timeout in seconds for WebDriver operations (default is 10).
+    search_cache : SearchCache, optional
+        Cache that counts every search and serves unexpired results without a
+        session; not used with `delta` (default is None).
+    **options
+        Extra `PersonSearchService` options (result_store, save_json, result_archive,
+        delta, recording_dir, circuit_wait, return_json).
+
+    Raises
+    ------
+    ValueError
+        If there are no sessions, `timeout` is negative, `search_cache` is given
+        without `return_json`, or `hedge` or `profile_memory` is given.
+
+    Examples
+    --------
+    >>> state = portal_state_service()
+    >>> async with AsyncTransparencyPortal([DriverSession(browser_state=state) for _ in range(4)]) as portal:
+    ...     results = await asyncio.gather(*(portal.search(**query) for query in queries))
+    ...     async for row in portal.detail_rows(url, since='01/2024'):
+    ...         print(row)
+    """
+
+    UNSUPPORTED_OPTIONS = ('hedge', 'profile_memory')
+
+    def __init__(self, sessions: Sequence[DriverSession], max_workers: Optional[int] = None, timeout: int = 10,
+                 search_cache: Optional[SearchCache] = None, **options: Any) -> None:
+        """Initialize the session pool and executor."""
+        if not sessions:
+            raise ValueError("AsyncTransparencyPortal needs at least one session")
+        if timeout < 0:
+            raise ValueError("Timeout cannot be negative")
+        unsupported = [option for option in self.UNSUPPORTED_OPTIONS if options.get(option)]
+        if unsupported:
+            raise ValueError(f"Not supported by the async portal: {', '.join(unsupported)}")
+        if search_cache is not None and not options.get('return_json', True):
+            raise ValueError("search_cache caches JSON documents and requires return_json")
+        self.sessions = list(sessions)
+        self.timeout = timeout
+        self.options = options
+        self.search_cache = None if options.get('delta') else search_cache
+        self.executor = ThreadPoolExecutor(max_workers=max_workers or len(self.sessions),
+                                           thread_name_prefix='portal-io')
+        self._free: asyncio.Queue = asyncio.Queue()
+        for session in self.sessions:
+            self._free.put_nowait(session)
+        self._in_flight: Dict[Tuple[Any, ...], asyncio.Future] = {}
+
+    async def __aenter__(self) -> 'AsyncTransparencyPortal':
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run a blocking call on the executor, keeping the caller's job context."""
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self.executor, functools.partial(context.run, fn, *args, **kwargs))
+
+    @contextlib.asynccontextmanager
+    async def session(self) -> AsyncIterator[WebDriver]:
+        """Hold a free session for one job, recycling it first if it is past a threshold."""
+        session: DriverSession = await self._free.get()
+        job = session.job()
+        try:
+            driver = await self.run(job.__enter__)
+            try:
+                yield driver
+            except BaseException:
+                if not await self.run(job.__exit__, *sys.exc_info()):
+                    raise
+            else:
+                await self.run(job.__exit__, None, None, None)
+        finally:
+            self._free.put_nowait(session)
+
+    async def portal(self, driver: WebDriver) -> TransparencyPortal:
+        """The orchestrator of `driver`, started (home page, cookies, tutorial) on first use."""
+        portal = getattr(driver, 'transparency_portal', None)
+        if portal is None:
+            portal = driver.transparency_portal = await self.run(
+                TransparencyPortal, driver, timeout=self.timeout, circuit_wait=self.options.get('circuit_wait', 0.0)
+            )
+        return portal
+
+    async def search(self, name: str, cpf: str, nis: Optional[str] = None, search_by: str = 'cpf',
+                     search_filter: Optional[Union[str, List[str]]] = None,
+                     since: Union[date, str, None] = None, until: Union[date, str, None] = None,
+                     columns: Optional[Sequence[str]] = None, refresh: bool = False) -> str:
+        """
+        Run a person search and return its JSON data, like `TransparencyPortal.person_search_service`.
+
+        Concurrent searches with the same key share one run. With a
+        `search_cache`, an unexpired result is returned without a session unless
+        `refresh` is set.
+        """
+        query = search_query(name, cpf, nis, search_by, search_filter, since, until, columns)
+        PersonSearchService.check_input(name, cpf, nis)
+        if self.search_cache is not None and not refresh:
+            cached = await self.run(self.search_cache.lookup, query)
+            if cached is not None:
+                return cached
+        key = PersonSearchService.query_key(query)
+
+        shared = self._in_flight.get(key)
+        if shared is not None:
+            logger.info("Joining in-flight search: %s", key)
+            return await asyncio.shield(shared)
+        task = self._in_flight[key] = asyncio.ensure_future(self._search(query))
+        task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _search(self, query: Dict[str, Any]) -> str:
+        result = await self._scrape(query)
+        if self.search_cache is not None:
+            await self.run(self.search_cache.put, query, result)
+        return result
+
+    async def _scrape(self, query: Dict[str, Any]) -> str:
+        with job_context() as job_id:
+            logger.info("Starting person search %s", job_id, extra={'search_by': query['search_by']})
+            async with self.session() as driver:
+                portal = await self.portal(driver)
+                service = PersonSearchService(
+                    driver, timeout=self.timeout, reuse_session=portal.searches > 0, **self.options, **query
+                )
+                portal.searches += 1
+                try:
+                    input_value = service.set_search_value(service.search_by)
+                    await self.run(service.start_bot)
+                    await self.run(service.submit_search, input_value)
+                    await asyncio.sleep(pause_seconds(service.web_bot, service.RESULTS_DELAY))
+                    if not await self.run(service.select_result, input_value):
+                        return '[]'
+                    await asyncio.sleep(pause_seconds(service.web_bot, service.SETTLE_DELAY))
+                    summary = await self._summary(service)
+                    details = {}
+                    for url in self.detail_urls(service, summary):
+                        details[url] = await self._details(service, driver, url)
+                    records = await self.run(service.format_data, summary.data, detail_loader=details.get)
+                    return await self.run(service.export, records, summary)
+                finally:
+                    service.close_recording()
+
+    async def _summary(self, service: PersonSearchService) -> PersonSummary:
+        """`PersonSearchService.scrape_summary` with its pauses awaited."""
+        await self.run(service.open_resources)
+        await asyncio.sleep(pause_seconds(service.web_bot, service.SETTLE_DELAY))
+        screenshot = await self.run(
+            service.screenshot, PersonSearchServiceCONSTANTS.Xpath.SCREENSHOT_MAIN_PAGE.value
+        )
+        await asyncio.sleep(pause_seconds(service.web_bot, service.timeout))
+        return await self.run(service.read_summary, screenshot, False)
+
+    @staticmethod
+    def detail_urls(service: PersonSearchService, summary: PersonSummary) -> List[str]:
+        """Detail page URLs linked from the summary tables, in table order."""
+        return [
+            service.base_url + row['Detalhar']
+            for table in summary.data for row in table['rows'] if 'Detalhar' in row
+        ]
+
+    async def _details(self, service: PersonSearchService, driver: WebDriver, url: str) -> ExtratoBuffer:
+        """Collect the rows of one detail page; failures are logged and yield what was read."""
+        rows = ExtratoBuffer()
+        try:
+            async for row in self.iter_detail_rows(driver, url, service.detail_filter, service.recorder):
+                rows.append(row)
+        except ValueError as e:
+            logger.error("Failed to scrape details from %s: %s", url, e)
+        except Exception as e:
+            logger.error("Unexpected error scraping %s: %s", url, e)
+        return rows
+
+    async def detail_rows(self, resource_url: str, since: Union[date, str, None] = None,
+                          until: Union[date, str, None] = None,
+                          columns: Optional[Sequence[str]] = None) -> AsyncIterator[ExtratoRow]:
+        """
+        Stream the extrato rows of a resource detail page, page by page, on a session of the pool.
+
+        The session is held until the iteration ends; breaking out early closes the tab.
+        """
+        detail_filter = DetailFilter(since, until, columns) if since or until or columns else None
+        async with self.session() as driver:
+            await self.portal(driver)
+            async for row in self.iter_detail_rows(driver, resource_url, detail_filter):
+                yield row
+
+    async def iter_detail_rows(self, driver: WebDriver, resource_url: str,
+                               detail_filter: Optional[DetailFilter] = None,
+                               recorder: Any = None) -> AsyncIterator[ExtratoRow]:
+        """`OpenDetailPage` as an async iterator, with the page pauses awaited."""
+        opener = OpenDetailPage(driver, resource_url, self.timeout, recorder, detail_filter)
+        pages = ScrapePages(driver, self.timeout, recorder, resource_url, detail_filter)
+        await self.run(opener.open_tab, False)
+        try:
+            await asyncio.sleep(pause_seconds(driver, opener.OPEN_DELAY))
+            while True:
+                if await self.run(pages.check_human_verification):
+                    raise ValueError("Automation stopped: Detected 'Human Verification'")
+                await asyncio.sleep(pause_seconds(driver, pages.PAGE_DELAY))
+                for row in await self.run(pages.scrape_page):
+                    yield row
+                if pages.past_window:
+                    logger.info("Stopped at detail page %s: rows past the date window", pages.pages)
+                    break
+                await asyncio.sleep(pause_seconds(driver, pages.PAGE_DELAY))
+                if not await self.run(pages.click_next):
+                    break
+            logger.info("Scraped %s detail page(s) of %s", pages.pages, resource_url)
+        finally:
+            await self.run(opener.close_tab, False)
+            await asyncio.sleep(pause_seconds(driver, opener.CLOSE_DELAY))
+
+    async def aclose(self) -> None:
+        """Close every session, flush the result store and stop the executor."""
+        for session in self.sessions:
+            await self.run(session.close)
+        if self.options.get('result_store') is not None:
+            await self.run(self.options['result_store'].flush)
+        self.executor.shutdown(wait=True)
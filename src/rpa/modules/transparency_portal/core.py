@@ -5,20 +5,30 @@ This module defines the `TransparencyPortal` class, which orchestrates web scrap
 and data extraction from the Brazilian Transparency Portal.
 """
 
-from typing import Optional, Union, List
-from tenacity import retry, stop_after_attempt, wait_fixed
+from datetime import date
+from typing import Optional, Union, List, Sequence
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_fixed
 
 from selenium.common.exceptions import WebDriverException
 from selenium.webdriver.remote.webdriver import WebDriver
 
 from src.rpa.utils.CONSTANTS import LOCAL_STORAGE_PATH, COOKIE_PATH
-from src.rpa.utils.web_driver_config import local_storage, load_cookies
+from src.rpa.utils.web_driver_config import is_session_error, local_storage, load_cookies
+from src.rpa.utils.browser_state import restore
+from src.rpa.utils.result_archive import ResultArchive
+from src.rpa.utils.circuit_breaker import portal_breaker
 from src.rpa.modules.transparency_portal.actions import AcceptCookies, CloseTutorial
 from src.rpa.modules.transparency_portal.CONSTANTS import TransparencyPortalCONSTANTS
 from src.rpa.modules.transparency_portal.person_search_service.core import PersonSearchService
+from src.rpa.modules.transparency_portal.person_search_service.result_store import ResultStore
+from src.rpa.modules.transparency_portal.person_search_service.warm_cache import SearchCache
+from src.rpa.modules.transparency_portal.person_search_service.batch_input import search_query
+from src.rpa.modules.transparency_portal.person_search_service.hedging import HedgedFetcher
+from src.rpa.utils.logger import get_logger, job_context
+
+logger = get_logger(__name__)
 
 
-@retry(stop=stop_after_attempt(3), wait=wait_fixed(2), reraise=True)
 class TransparencyPortal:
     """
     Orchestrates automations for the Brazilian Transparency Portal.
@@ -36,27 +46,66 @@ class TransparencyPortal:
         Timeout in seconds for WebDriver operations (default is 10).
     auto_start : bool, optional
         Whether to navigate to the portal on initialization (default is True).
+    result_store : ResultStore, optional
+        Indexed store that receives every search result (default is None).
+    save_json : bool, optional
+        Whether to also write each result as a timestamped JSON file (default is True).
+    result_archive : ResultArchive, optional
+        Size-bounded compressed archive used instead of loose JSON files (default is None).
+    delta : bool, optional
+        Whether searches return only the changes since the last stored result of the
+        same CPF and detail filter; requires `result_store` (default is False).
+    recording_dir : str, optional
+        Directory where the raw pages of each search are recorded for offline replay
+        with `python -m src.rpa.modules.transparency_portal.person_search_service.replay`
+        (default is None, no recording).
+    hedge : HedgedFetcher, optional
+        Spare sessions used to re-fetch detail pages slower than the recent p95
+        (default is None, no hedging).
+    profile_memory : bool, optional
+        Whether to trace memory per search stage with tracemalloc and log the report;
+        slows searches down (default is False).
+    circuit_wait : float, optional
+        Seconds start-up and navigation wait for the shared portal circuit breaker
+        to close or admit a probe before failing with `CircuitOpenError`
+        (default is 0.0, fail fast while the portal is down).
+    search_cache : SearchCache, optional
+        Cache that counts every search and serves unexpired results without the
+        browser; not used with `delta` (default is None).
+    return_json : bool, optional
+        Whether searches return the JSON document; if False, it is streamed to its
+        file or archive entry (requires `save_json`) and the path is returned, so
+        no search holds its whole document in memory (default is True).
 
     Attributes
     ----------
-    __person_search_service : PersonSearchService
-        The lazily-initialized module for person-related queries.
+    searches : int
+        Number of person searches served by this session.
 
     Raises
     ------
     ValueError
-        If `web_bot` is None or `timeout` is negative.
+        If `web_bot` is None, `timeout` is negative, or `search_cache` is given
+        without `return_json`.
     RuntimeError
         If navigation to the portal fails after retries.
+    CircuitOpenError
+        If the portal circuit breaker is open.
 
     Examples
     --------
     >>> from selenium.webdriver.chrome.webdriver import WebDriver
     >>> transparency_portal = TransparencyPortal(WebDriver())
     >>> transparency_portal.person_search_service(name="Alen Silva", cpf="12345678901")
+    >>> transparency_portal.person_search_service(name="Maria Souza", cpf="10987654321")
     """
 
-    def __init__(self, web_bot: WebDriver, timeout: int = 10, auto_start: bool = True) -> None:
+    def __init__(self, web_bot: WebDriver, timeout: int = 10, auto_start: bool = True,
+                 result_store: Optional[ResultStore] = None, save_json: bool = True,
+                 result_archive: Optional[ResultArchive] = None, delta: bool = False,
+                 recording_dir: Optional[str] = None, hedge: Optional[HedgedFetcher] = None,
+                 profile_memory: bool = False, circuit_wait: float = 0.0,
+                 search_cache: Optional[SearchCache] = None, return_json: bool = True) -> None:
         """
         Initializes the TransparencyPortal orchestrator.
         """
@@ -65,25 +114,68 @@ class TransparencyPortal:
             raise ValueError("WebDriver cannot be None")
         if timeout < 0:
             raise ValueError("Timeout cannot be negative")
+        if search_cache is not None and not return_json:
+            raise ValueError("search_cache caches JSON documents and requires return_json")
 
         self.__web_bot = web_bot
         self.__timeout = timeout
-        self.__person_search_service: PersonSearchService | None = None
+        self.__result_store = result_store
+        self.__save_json = save_json
+        self.__result_archive = result_archive
+        self.__delta = delta
+        self.__recording_dir = recording_dir
+        self.__hedge = hedge
+        self.__profile_memory = profile_memory
+        self.__circuit_wait = circuit_wait
+        self.__search_cache = None if delta else search_cache
+        self.__return_json = return_json
+        self.searches = 0
         if auto_start:
             self.start_bot()
 
     def person_search_service(self, name: str, cpf: str, nis: Optional[str] = None, search_by: str = 'cpf',
-                              search_filter: Optional[Union[str, List[str]]] = None) -> PersonSearchService:
-        """
-        Provides access to the PersonSearchService module.
-        The module is initialized lazily on first access to optimize resource usage.
+                              search_filter: Optional[Union[str, List[str]]] = None,
+                              since: Union[date, str, None] = None, until: Union[date, str, None] = None,
+                              columns: Optional[Sequence[str]] = None, refresh: bool = False) -> str:
         """
+        Runs a person search on the live session and returns its JSON data.
+
+        Any number of searches can be served by one instance: after the first,
+        the search page is loaded directly instead of going through the home page,
+        and cookie and tutorial handling are not repeated.
 
-        if self.__person_search_service is None:
-            self.__person_search_service = PersonSearchService(
-                self.__web_bot, name=name, cpf=cpf, nis=nis, search_by=search_by,
-                search_filter=search_filter, timeout=self.__timeout).search()
-        return self.__person_search_service
+        `since`/`until` (dates or 'dd/mm/yyyy' / 'mm/yyyy') limit extrato rows to a
+        date window and `columns` to a subset of detail columns; detail pagination
+        stops once the rows leave the window.
+
+        With a `search_cache`, every call counts towards the key's heat and an
+        unexpired result is returned without the browser; `refresh` (used by
+        cache warming) always scrapes and is not counted as a request.
+        """
+        query = search_query(name, cpf, nis, search_by, search_filter, since, until, columns)
+        if self.__search_cache is not None and not refresh:
+            PersonSearchService.check_input(name, cpf, nis)
+            cached = self.__search_cache.lookup(query)
+            if cached is not None:
+                return cached
+
+        with job_context() as job_id:
+            logger.info("Starting person search %s", job_id, extra={'search_by': search_by})
+            try:
+                result = PersonSearchService(
+                    self.__web_bot, name=name, cpf=cpf, nis=nis, search_by=search_by,
+                    search_filter=search_filter, timeout=self.__timeout,
+                    result_store=self.__result_store, save_json=self.__save_json,
+                    result_archive=self.__result_archive, delta=self.__delta,
+                    recording_dir=self.__recording_dir, detail_filter=query['detail_filter'], hedge=self.__hedge,
+                    profile_memory=self.__profile_memory, circuit_wait=self.__circuit_wait,
+                    return_json=self.__return_json,
+                    reuse_session=self.searches > 0).search()
+            finally:
+                self.searches += 1
+        if self.__search_cache is not None:
+            self.__search_cache.put(query, result)
+        return result
 
     def start_bot(self) -> None:
         """
@@ -91,13 +183,32 @@ class TransparencyPortal:
 
         This method initializes the WebDriver by loading the portal's main page and
         ensures the page is fully accessible. It uses retries to handle transient
-        network issues and includes a fallback wait for dynamic content.
+        network issues and includes a fallback wait for dynamic content. A start-up
+        that fails after its retries counts as one failure of the shared portal
+        circuit breaker; while it is open, start-up fails at once instead of loading
+        the page. Errors of the session itself (e.g. `invalid session id`) are not
+        retried and not counted, since a new session is what fixes them.
+
+        A session that received a browser-state snapshot (see `DriverSession`'s
+        `browser_state`) is already known to the portal; otherwise the cookies and
+        localStorage cached by `get_cache` are restored.
         """
-        try:
-            self.__web_bot.get(TransparencyPortalCONSTANTS.Url.TRANSPARENCY_PORTAL)
+        with portal_breaker.guard('start_bot', self.__circuit_wait):
+            try:
+                self.__load_portal()
+            except WebDriverException as e:
+                raise RuntimeError(f"Failed to load Transparency Portal: {e}") from e
+
+    @retry(stop=stop_after_attempt(3), wait=wait_fixed(2), reraise=True,
+           retry=retry_if_exception(lambda e: isinstance(e, WebDriverException) and not is_session_error(e)))
+    def __load_portal(self) -> None:
+        """Load the home page, restore the browser state and dismiss its prompts."""
+        self.__web_bot.get(TransparencyPortalCONSTANTS.Url.TRANSPARENCY_PORTAL)
+        state = getattr(self.__web_bot, 'browser_state', None)
+        if state is None:
             load_cookies(self.__web_bot, COOKIE_PATH)
             local_storage(self.__web_bot, LOCAL_STORAGE_PATH)
-            AcceptCookies(self.__web_bot, self.__timeout).execute()
-            CloseTutorial(self.__web_bot, self.__timeout).execute()
-        except WebDriverException as e:
-            raise RuntimeError(f"Failed to load Transparency Portal: {e}") from e
\ No newline at end of file
+        elif not self.__web_bot.browser_state_injected:
+            restore(self.__web_bot, state)
+        AcceptCookies(self.__web_bot, self.__timeout).execute()
+        CloseTutorial(self.__web_bot, self.__timeout).execute()
\ No newline at end of file
@@ -1,3 +1,16 @@
-from .core import PersonSearchService
+import importlib
+from typing import Any
 
-__all__ = ['PersonSearchService']
\ No newline at end of file
+_EXPORTS = {'PersonSearchService': '.core', 'ResultStore': '.result_store', 'SearchCache': '.warm_cache'}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    """Import exported classes on first access, so loading one submodule does not load them all."""
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
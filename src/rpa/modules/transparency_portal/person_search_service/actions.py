@@ -4,18 +4,16 @@ Actions for person search service automation in the Transparency Portal.
 Provides command classes for browser interactions.
 """
 
-from abc import ABC, abstractmethod
 from selenium.webdriver.common.by import By
 from selenium.webdriver.remote.webdriver import WebDriver
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 
 from src.rpa.modules.transparency_portal.actions import Bot
-from src.rpa.modules.transparency_portal.CONSTANTS import (
-    TransparencyPortalCONSTANTS,
-    PersonSearchServiceCONSTANTS,
-)
+from src.rpa.modules.transparency_portal.CONSTANTS import PersonSearchServiceCONSTANTS
+from src.rpa.utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 
 class GoToPersonSearchPage(Bot):
@@ -28,11 +26,31 @@ class GoToPersonSearchPage(Bot):
         try:
             self.wait_and_click(self.PEOPLE_SEARCH_SERVICE_BTN)
             self.wait_and_click(self.NATURAL_PERSON_SEARCH_BTN)
-            print("On search page")
+            logger.info("On search page")
         except TimeoutException as e:
             raise RuntimeError("Navigation to search page failed") from e
 
 
+class ReturnToSearchPage(Bot):
+    """Return to the person search page on an already initialized session."""
+    URL = PersonSearchServiceCONSTANTS.Url.NATURAL_PERSON_SEARCH
+    SEARCH_FIELD = PersonSearchServiceCONSTANTS.Xpath.ENTER_SEARCH_VALUE.value
+
+    def execute(self) -> None:
+        """Close leftover tabs and load the search page directly, skipping the home page."""
+        try:
+            handles = self.web_bot.window_handles
+            for handle in handles[1:]:
+                self.web_bot.switch_to.window(handle)
+                self.web_bot.close()
+            self.web_bot.switch_to.window(handles[0])
+            self.web_bot.get(self.URL)
+            self.wait((By.XPATH, self.SEARCH_FIELD), EC.presence_of_element_located)
+            logger.info("Back on search page")
+        except TimeoutException as e:
+            raise RuntimeError("Return to search page failed") from e
+
+
 class SearchHandler(Bot):
     """Handle search input value entry."""
     XPATH = PersonSearchServiceCONSTANTS.Xpath.ENTER_SEARCH_VALUE.value
@@ -46,12 +64,10 @@ class SearchHandler(Bot):
     def execute(self) -> None:
         """Clear and enter search value in input field."""
         try:
-            field = WebDriverWait(self.web_bot, self.timeout).until(
-                EC.presence_of_element_located((By.XPATH, self.XPATH))
-            )
+            field = self.wait((By.XPATH, self.XPATH), EC.presence_of_element_located)
             field.clear()
             field.send_keys(self.value_to_search)
-            print(f"Value entered: {self.value_to_search}")
+            logger.debug("Value entered: %s", self.value_to_search)
         except TimeoutException as e:
             raise RuntimeError("Failed to enter search value") from e
 
@@ -64,6 +80,6 @@ class StartSearch(Bot):
         """Click the search button."""
         try:
             self.wait_and_click(self.XPATH)
-            print("Search started")
+            logger.info("Search started")
         except TimeoutException as e:
             raise RuntimeError("Failed to start search") from e
\ No newline at end of file
@@ -0,0 +1,282 @@
+"""
+Pre-validation of batch input files before any browser session is used.
+
+Reads queries from CSV or JSONL, normalizes names and numbers a column at a
+time, checks field types, CPF check digits, search mode, filters and date
+windows, and drops duplicates. Rejected rows go to an error file with their
+reasons, so only well-formed queries reach the browser. The valid queries are
+written in the `to_json` layout, which `BatchValidator` reads back unchanged.
+
+Usage:
+    python -m src.rpa.modules.transparency_portal.person_search_service.batch_input INPUT
+        [--output queries.jsonl] [--errors rejects.jsonl] [--search-by cpf]
+"""
+
+import argparse
+import csv
+import json
+import os
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from src.rpa.modules.transparency_portal.person_search_service.core import PersonSearchService
+from src.rpa.modules.transparency_portal.person_search_service.filters import FilterManager
+from src.rpa.modules.transparency_portal.person_search_service.records import DetailFilter
+from src.rpa.utils.automations_utils import is_valid_cpf, normalize_names, normalize_numbers
+from src.rpa.utils.logger import configure_logging, get_logger
+
+logger = get_logger(__name__)
+
+SEARCH_MODES = ('cpf', 'name', 'nis')
+FILTERS = tuple(FilterManager(None).filters)
+TEXT_FIELDS = ('name', 'search_by', 'since', 'until')
+NUMBER_FIELDS = ('cpf', 'nis')
+LIST_FIELDS = ('search_filter', 'columns')
+
+
+def read_rows(path: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yield (line number, row) from a CSV file with a header or a JSONL file."""
+    with open(path, encoding='utf-8-sig', newline='') as file:
+        if path.lower().endswith('.csv'):
+            for line, row in enumerate(csv.DictReader(file), start=2):
+                yield line, row
+            return
+        for line, text in enumerate(file, start=1):
+            if not text.strip():
+                continue
+            try:
+                row = json.loads(text)
+            except ValueError as e:
+                yield line, {'_error': f"invalid JSON: {e}", '_raw': text.rstrip('\n')}
+                continue
+            yield line, row if isinstance(row, dict) else {'_error': 'not a JSON object', '_raw': row}
+
+
+def split_filters(value: Any) -> List[str]:
+    """Search filters of a row: a list, or a string separated by ';', ',' or '|'."""
+    if not value:
+        return []
+    if isinstance(value, str):
+        for separator in ';,|':
+            value = value.replace(separator, ' ')
+        return value.split()
+    return [str(item).strip() for item in value if str(item).strip()]
+
+
+class BatchValidator:
+    """
+    Validate and normalize batch queries in bulk.
+
+    Parameters
+    ----------
+    search_by : str, optional
+        Search mode of rows without a `search_by` column (default is 'cpf').
+
+    Attributes
+    ----------
+    rejects : list of dict
+        Rejected rows of the last `validate()` with their line and reasons.
+    duplicates : int
+        Rows dropped by the last `validate()` as repeats of an earlier query.
+    """
+
+    def __init__(self, search_by: str = 'cpf') -> None:
+        """Initialize with the default search mode."""
+        if search_by not in SEARCH_MODES:
+            raise ValueError(f"Invalid option '{search_by}'. Use: {', '.join(SEARCH_MODES)}")
+        self.search_by = search_by
+        self.rejects: List[Dict[str, Any]] = []
+        self.duplicates = 0
+
+    @staticmethod
+    def text(row: Dict[str, Any], column: str) -> str:
+        value = row.get(column)
+        return '' if value is None else str(value)
+
+    def validate(self, rows: List[Tuple[int, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Return the well-formed, de-duplicated queries of `rows` (keyword arguments of
+        `PersonSearchService`), keeping rejected rows in `rejects`.
+        """
+        self.rejects = []
+        self.duplicates = 0
+        queries = []
+        seen = set()
+        for line, row, query, errors in self.iter_checked(rows):
+            if errors:
+                self.rejects.append({'line': line, 'input': row.get('_raw', row), 'errors': errors})
+                continue
+            key = PersonSearchService.query_key(query)
+            if key in seen:
+                self.duplicates += 1
+                continue
+            seen.add(key)
+            queries.append(query)
+
+        logger.info("Validated %s row(s): %s query(ies), %s rejected, %s duplicate(s)",
+                    len(rows), len(queries), len(self.rejects), self.duplicates)
+        return queries
+
+    def iter_checked(self, rows: List[Tuple[int, Dict[str, Any]]]) -> Iterator[
+            Tuple[int, Dict[str, Any], Optional[Dict[str, Any]], List[str]]]:
+        """Yield (line, row, query, errors) for every row, in order; `query` is None if rejected."""
+        names = normalize_names(self.text(row, 'name') for _, row in rows)
+        cpfs = normalize_numbers(self.text(row, 'cpf') for _, row in rows)
+        nis_values = normalize_numbers(self.text(row, 'nis') for _, row in rows)
+        for (line, row), name, cpf, nis in zip(rows, names, cpfs, nis_values):
+            errors = [row['_error']] if '_error' in row else self.check(row, name, cpf, nis)
+            query = None
+            if not errors:
+                query, error = self.build(row, name, cpf, nis)
+                if error:
+                    errors.append(error)
+            yield line, row, None if errors else query, errors
+
+    @staticmethod
+    def check_types(row: Dict[str, Any]) -> List[str]:
+        """Reasons the fields of a row have types no query can be built from."""
+        errors = []
+        for column in TEXT_FIELDS:
+            value = row.get(column)
+            if value is not None and not isinstance(value, str):
+                errors.append(f"{column} must be a string, not {type(value).__name__}")
+        for column in NUMBER_FIELDS:
+            value = row.get(column)
+            if value is not None and (isinstance(value, bool) or not isinstance(value, (str, int))):
+                errors.append(f"{column} must be a string or an integer, not {type(value).__name__}")
+        for column in LIST_FIELDS:
+            value = row.get(column)
+            if value is None or isinstance(value, str):
+                continue
+            if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+                errors.append(f"{column} must be a string or a list of strings")
+        detail_filter = row.get('detail_filter')
+        if detail_filter is not None and not isinstance(detail_filter, dict):
+            errors.append(f"detail_filter must be an object, not {type(detail_filter).__name__}")
+        return errors
+
+    def check(self, row: Dict[str, Any], name: str, cpf: str, nis: str) -> List[str]:
+        """Reasons a row cannot be searched, mirroring the checks of `PersonSearchService`."""
+        errors = self.check_types(row)
+        if errors:
+            return errors
+        search_by = self.text(row, 'search_by').strip().lower() or self.search_by
+        if not name:
+            errors.append('name is empty')
+        if not cpf:
+            errors.append('cpf is empty')
+        elif not is_valid_cpf(cpf):
+            errors.append(f"invalid CPF '{self.text(row, 'cpf')}'")
+        if self.text(row, 'nis').strip() and len(nis) != 11:
+            errors.append(f"invalid NIS '{self.text(row, 'nis')}'")
+        if search_by not in SEARCH_MODES:
+            errors.append(f"invalid search_by '{search_by}'")
+        elif search_by == 'nis' and not nis:
+            errors.append("search_by 'nis' without a NIS")
+        invalid = sorted(set(split_filters(row.get('search_filter'))) - set(FILTERS))
+        if invalid:
+            errors.append(f"invalid filters: {', '.join(invalid)}")
+        return errors
+
+    def build(self, row: Dict[str, Any], name: str, cpf: str, nis: str) -> Tuple[Optional[Dict[str, Any]],
+                                                                                 Optional[str]]:
+        """
+        The normalized query of a checked row, or the reason its date window is invalid.
+
+        The window is read from `since`/`until`/`columns`, or from a
+        `detail_filter` object as written by `to_json`.
+        """
+        columns = row.get('columns')
+        if isinstance(columns, str):
+            columns = [column.strip() for column in columns.split(';') if column.strip()]
+        since, until = row.get('since') or None, row.get('until') or None
+        if row.get('detail_filter') is not None:
+            if since or until or columns:
+                return None, "give either detail_filter or since/until/columns"
+            try:
+                detail_filter = DetailFilter.from_dict(row['detail_filter'])
+            except (TypeError, ValueError) as e:
+                return None, f"invalid detail_filter: {e}"
+        else:
+            try:
+                detail_filter = DetailFilter(since, until, columns) if since or until or columns else None
+            except ValueError as e:
+                return None, str(e)
+        filters = list(dict.fromkeys(split_filters(row.get('search_filter'))))
+        return {
+            'name': name,
+            'cpf': cpf,
+            'nis': nis or None,
+            'search_by': self.text(row, 'search_by').strip().lower() or self.search_by,
+            'search_filter': filters or None,
+            'detail_filter': detail_filter,
+        }, None
+
+    def write_rejects(self, path: str) -> None:
+        """Write the rejected rows of the last run as JSONL."""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as file:
+            for reject in self.rejects:
+                file.write(json.dumps(reject, ensure_ascii=False, default=str) + '\n')
+
+
+def load_queries(path: str, errors_path: Optional[str] = None, search_by: str = 'cpf') -> List[Dict[str, Any]]:
+    """Read, validate and de-duplicate a batch file; rejects are written to `errors_path` if given."""
+    validator = BatchValidator(search_by)
+    queries = validator.validate(list(read_rows(path)))
+    if errors_path is not None:
+        validator.write_rejects(errors_path)
+        if validator.rejects:
+            logger.warning("%s rejected row(s) written to %s", len(validator.rejects), errors_path)
+    return queries
+
+
+def to_json(query: Dict[str, Any]) -> Dict[str, Any]:
+    """A validated query as a JSON-serializable dict; the inverse of `from_json`."""
+    detail_filter = query.get('detail_filter')
+    return {**query, 'detail_filter': detail_filter.to_dict() if detail_filter else None}
+
+
+def from_json(data: Dict[str, Any]) -> Dict[str, Any]:
+    """A query written by `to_json`, with its detail filter rebuilt."""
+    detail_filter = data.get('detail_filter')
+    return {**data, 'detail_filter': DetailFilter.from_dict(detail_filter) if detail_filter else None}
+
+
+def search_options(query: Dict[str, Any]) -> Dict[str, Any]:
+    """`person_search_service` keyword arguments of a validated query."""
+    options = {key: value for key, value in query.items() if key != 'detail_filter'}
+    detail_filter = query.get('detail_filter')
+    if detail_filter is not None:
+        options.update(since=detail_filter.since, until=detail_filter.until, columns=detail_filter.columns)
+    return options
+
+
+def search_query(name: str, cpf: str, nis: Optional[str] = None, search_by: str = 'cpf',
+                 search_filter: Any = None, since: Any = None, until: Any = None,
+                 columns: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """The query of `person_search_service` keyword arguments; the inverse of `search_options`."""
+    detail_filter = DetailFilter(since, until, columns) if since or until or columns else None
+    return dict(name=name, cpf=cpf, nis=nis, search_by=search_by, search_filter=search_filter,
+                detail_filter=detail_filter)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('input', help="CSV (with header) or JSONL batch file")
+    parser.add_argument('--output', help="write the valid queries as JSONL (default: <input>.valid.jsonl)")
+    parser.add_argument('--errors', help="write rejected rows as JSONL (default: <input>.rejects.jsonl)")
+    parser.add_argument('--search-by', default='cpf', choices=SEARCH_MODES)
+    args = parser.parse_args()
+
+    configure_logging()
+    base = os.path.splitext(args.input)[0]
+    queries = load_queries(args.input, args.errors or f"{base}.rejects.jsonl", args.search_by)
+    output = args.output or f"{base}.valid.jsonl"
+    with open(output, 'w', encoding='utf-8') as file:
+        for query in queries:
+            file.write(json.dumps(to_json(query), ensure_ascii=False) + '\n')
+    print(f"{len(queries)} valid query(ies) written to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -4,12 +4,11 @@ Core module for person search service automation in the Transparency Portal.
 Handles natural person search and data extraction.
 """
 
-from typing import Optional, Union, List, Dict, Any
+from typing import Optional, Union, List, Dict, Any, Tuple, Callable, Iterable
 import time
 import base64
 
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.remote.webdriver import WebDriver
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
@@ -20,8 +19,14 @@ from src.rpa.modules.transparency_portal.CONSTANTS import (
 )
 
 from src.rpa.utils.automations_utils import normalize_name, normalize_number
+from src.rpa.utils.single_flight import SingleFlight, unique_by
+from src.rpa.utils.result_archive import ResultArchive
+from src.rpa.utils.web_driver_config import page_assets, pause_seconds
+from src.rpa.utils.adaptive_timeout import latency_tracker, wait_for
+from src.rpa.utils.memory_profiler import MemoryProfiler
+from src.rpa.utils.circuit_breaker import CircuitBreaker, portal_breaker
 from src.rpa.modules.transparency_portal.person_search_service.actions import (
-    GoToPersonSearchPage,
+    GoToPersonSearchPage, ReturnToSearchPage,
     StartSearch, SearchHandler,
 )
 
@@ -29,13 +34,36 @@ from src.rpa.modules.transparency_portal.person_search_service.filters import Fi
 from src.rpa.modules.transparency_portal.person_search_service.utils import PersonValidator, ResultValidator
 from src.rpa.modules.transparency_portal.person_search_service.scraper import Scraper, OpenDetailPage
 from src.rpa.modules.transparency_portal.person_search_service.json_exporter import JsonExporter
+from src.rpa.modules.transparency_portal.person_search_service.records import (
+    DetailFilter, PersonSummary, ResourceRecord,
+)
+from src.rpa.modules.transparency_portal.person_search_service.result_store import ResultStore
+from src.rpa.modules.transparency_portal.person_search_service.delta import DeltaExporter
+from src.rpa.modules.transparency_portal.person_search_service.recording import SearchRecorder
+from src.rpa.modules.transparency_portal.person_search_service.hedging import HedgedFetcher
+from src.rpa.utils.logger import get_logger, job_id_var
+
+logger = get_logger(__name__)
 
 
 class PersonSearchService:
     """Search and extract natural person data from the Transparency Portal."""
+    single_flight = SingleFlight()
+    circuit_breaker: CircuitBreaker = portal_breaker
+    RESULTS_DELAY = 7
+    SETTLE_DELAY = 2
+
     def __init__(self, web_bot: WebDriver, name: str, cpf: str, nis: Optional[str] = None,
                  search_by: str = 'cpf', search_filter: Optional[Union[str, List[str]]] = None,
-                 timeout: int = 10):
+                 timeout: int = 10, result_store: Optional[ResultStore] = None, save_json: bool = True,
+                 result_archive: Optional[ResultArchive] = None, delta: bool = False,
+                 reuse_session: bool = False, recording_dir: Optional[str] = None,
+                 detail_filter: Optional[DetailFilter] = None, hedge: Optional[HedgedFetcher] = None,
+                 profile_memory: bool = False, circuit_wait: float = 0.0, return_json: bool = True):
+        if delta and result_store is None:
+            raise ValueError("Delta output requires a result store")
+        if not return_json and not save_json:
+            raise ValueError("Returning the saved path requires save_json")
         self.web_bot = web_bot
         self.name = name
         self.cpf = cpf
@@ -44,59 +72,95 @@ class PersonSearchService:
         self.search_filter = search_filter
         self.timeout = timeout
         self.base_url = TransparencyPortalCONSTANTS.Url.TRANSPARENCY_PORTAL
-        self.json_exporter = JsonExporter()
+        self.json_exporter = JsonExporter(archive=result_archive)
         self.filter_manager = FilterManager(web_bot, timeout)
         self.result_validator = ResultValidator()
+        self.result_store = result_store
+        self.save_json = save_json
+        self.delta = delta
+        self.reuse_session = reuse_session
+        self.delta_exporter = DeltaExporter()
+        self.recording_dir = recording_dir
+        self.recorder: Optional[SearchRecorder] = None
+        self.detail_filter = detail_filter
+        self.hedge = hedge
+        self.memory = MemoryProfiler(enabled=profile_memory)
+        self.memory_profile: Optional[Dict[str, Any]] = None
+        self.circuit_wait = circuit_wait
+        self.return_json = return_json
 
     def start_bot(self) -> None:
-        """starts automation navigation"""
-        GoToPersonSearchPage(self.web_bot, self.timeout).execute()
+        """
+        starts automation navigation, going straight to the search page on a reused session
+
+        Navigation runs through the portal circuit breaker: while it is open this
+        raises `CircuitOpenError` after waiting at most `circuit_wait` seconds.
+        """
+        with self.circuit_breaker.guard('navigation', self.circuit_wait):
+            if self.reuse_session:
+                ReturnToSearchPage(self.web_bot, self.timeout).execute()
+            else:
+                GoToPersonSearchPage(self.web_bot, self.timeout).execute()
 
     def get_location(self) -> str:
         """Get the person's location"""
         try:
-            return (
-                WebDriverWait(self.web_bot, self.timeout)
-                .until(EC.presence_of_element_located(
-                    (By.XPATH, PersonSearchServiceCONSTANTS.Xpath.FETCH_LOCATION.value)
-                ))
-                .text.strip()
-            )
+            return wait_for(
+                self.web_bot, 'get_location', (By.XPATH, PersonSearchServiceCONSTANTS.Xpath.FETCH_LOCATION.value),
+                EC.presence_of_element_located, self.timeout
+            ).text.strip()
         except TimeoutException:
-            print("Location not found.")
+            logger.warning("Location not found.")
             return 'Unknown'
 
     def get_cpf(self) -> str:
         """Get CPF from search results."""
         try:
-            cpf = (
-                WebDriverWait(self.web_bot, self.timeout)
-                .until(EC.presence_of_element_located(
-                    (By.XPATH, PersonSearchServiceCONSTANTS.Xpath.FETCH_CPF.value)
-                ))
-                .text.strip()
-            )
+            cpf = wait_for(
+                self.web_bot, 'get_cpf', (By.XPATH, PersonSearchServiceCONSTANTS.Xpath.FETCH_CPF.value),
+                EC.presence_of_element_located, self.timeout
+            ).text.strip()
             return normalize_number(cpf)
         except TimeoutException:
-            print("CPF not found.")
+            logger.warning("CPF not found.")
             return 'Unknown'
 
     def screenshot(self, xpath: str) -> str:
-        """Capture element screenshot as base64."""
+        """Capture element screenshot as base64, with its images loaded on a lightweight session."""
         try:
             element = self.web_bot.find_element(By.XPATH, xpath)
-            screenshot = base64.b64encode(element.screenshot_as_png).decode('utf-8')
-            print("Screenshot captured")
+            with page_assets(self.web_bot, element, timeout=self.timeout):
+                png = element.screenshot_as_png
+            screenshot = base64.b64encode(png).decode('utf-8')
+            logger.debug("Screenshot captured")
             return screenshot
         except NoSuchElementException:
-            print(f"Element not found: {xpath}")
+            logger.warning("Element not found: %s", xpath)
             return ''
         except WebDriverException as e:
-            print(f"Screenshot error: {e}")
+            logger.warning("Screenshot error: %s", e)
             return ''
 
-    def format_data(self, data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Format scraped data into records."""
+    def format_data(self, data: List[Dict[str, Any]], web_bot: Optional[WebDriver] = None,
+                    detail_loader: Optional[Callable[[str], Iterable[Any]]] = None) -> List[ResourceRecord]:
+        """
+        Format scraped data into records.
+
+        Detail pages are opened on `web_bot` (default: own session), unless a
+        `detail_loader` returning the extrato rows of a URL is given, as on replay.
+        With a `hedge` fetcher (and no recording), slow detail pages are fetched
+        again on a spare session.
+        """
+        web_bot = web_bot or self.web_bot
+        hedge = self.hedge if self.recorder is None else None
+        if detail_loader is None and hedge is not None:
+            def detail_loader(url: str) -> Iterable[Any]:
+                return hedge.fetch(web_bot, lambda bot, cancel: OpenDetailPage(
+                    bot, url, self.timeout, detail_filter=self.detail_filter, cancel=cancel
+                ).execute())
+        elif detail_loader is None:
+            def detail_loader(url: str) -> Iterable[Any]:
+                return OpenDetailPage(web_bot, url, self.timeout, self.recorder, self.detail_filter).execute()
         records = []
         for table in data:
             resource = table.pop('title')
@@ -107,61 +171,146 @@ class PersonSearchService:
                 if 'Detalhar' in row:
                     detail = row.pop('Detalhar')
                     url = self.base_url + detail
-                    print(f"Scraping details: {resource}, URL: {url}")
-                    details = OpenDetailPage(self.web_bot, url, self.timeout).execute()
+                    logger.debug("Scraping details: %s, URL: %s", resource, url)
+                    details = detail_loader(url)
                     if not details:
-                        print(f"No details for {resource}")
-                records.append({
-                    'nome': row.get('Nome', 'Desconhecido'),
-                    'nis': nis,
-                    'recurso': resource,
-                    'valor': row.get('Valor Recebido', 'Não informado'),
-                    'link do recurso': url,
-                    'extrato': details,
-                })
+                        logger.warning("No details for %s", resource)
+                records.append(ResourceRecord(
+                    nome=row.get('Nome', 'Desconhecido'),
+                    nis=nis,
+                    recurso=resource,
+                    valor=row.get('Valor Recebido', 'Não informado'),
+                    link=url,
+                    extrato=details,
+                ))
+        if hedge is not None:
+            hedge.settle(web_bot)
         return records
 
-    def extract_data(self) -> str:
-        """Extract financial data and export as JSON."""
-        (
-            WebDriverWait(self.web_bot, self.timeout)
-            .until(EC.element_to_be_clickable(
-                (By.XPATH, PersonSearchServiceCONSTANTS.Xpath.FINANCIAL_RESOURCES_RECEIPTS_BTN.value)
-            ))
-            .click()
-        )
+    def scrape_summary(self) -> PersonSummary:
+        """
+        Open the person's financial resources and scrape tables, identity and screenshot.
 
-        time.sleep(2)
+        On a lightweight session only the images of the captured element are loaded,
+        for the screenshot. With `recording_dir` set, every page read from here on is
+        recorded for offline replay.
+        """
+        self.open_resources()
+
+        time.sleep(pause_seconds(self.web_bot, self.SETTLE_DELAY))
 
         screenshot = self.screenshot(
             PersonSearchServiceCONSTANTS.Xpath.SCREENSHOT_MAIN_PAGE.value
         )
 
-        data = Scraper(self.web_bot, self.timeout).scrape()
+        return self.read_summary(screenshot)
+
+    def open_resources(self) -> None:
+        """Start the page recording, if enabled, and open the financial resources section."""
+        if self.recording_dir is not None and self.recorder is None:
+            self.recorder = SearchRecorder.create(
+                self.recording_dir, f"{self.search_by}_{job_id_var.get() or 'search'}"
+            )
+        wait_for(
+            self.web_bot, 'scrape_summary',
+            (By.XPATH, PersonSearchServiceCONSTANTS.Xpath.FINANCIAL_RESOURCES_RECEIPTS_BTN.value),
+            EC.element_to_be_clickable, self.timeout
+        ).click()
+
+    def read_summary(self, screenshot: str, settle: bool = True) -> PersonSummary:
+        """Scrape the resource tables, CPF and location of the open summary page."""
+        data = Scraper(self.web_bot, self.timeout, self.recorder).scrape(settle)
+        summary = PersonSummary(data, self.get_cpf(), self.get_location(), screenshot)
+        if self.recorder is not None:
+            self.recorder.meta(
+                name=self.name, nis=self.nis, search_by=self.search_by, search_filter=self.search_filter,
+                query_cpf=self.cpf, cpf=summary.cpf, location=summary.location, screenshot=screenshot,
+                detail_filter=self.detail_filter.to_dict() if self.detail_filter else None,
+            )
+        return summary
+
+    def export(self, records: List[ResourceRecord], summary: PersonSummary) -> str:
+        """
+        Record the result in the result store and export as JSON.
+
+        In delta mode the returned JSON only describes what changed since the
+        last stored result searched with the same full CPF (the page only shows
+        a masked one) and the same detail filter, so a narrower extrato window
+        is not reported as removed rows. Without `return_json`, the document is
+        streamed to its file (or archive entry) and the path is returned, so it
+        is never held in memory; the same applies to the full document saved
+        next to a delta.
+        """
+        cpf, location, screenshot = summary.cpf, summary.location, summary.screenshot
+
+        query_cpf = normalize_number(self.cpf)
+        previous = (self.result_store.latest(query_cpf=query_cpf, detail_filter=self.detail_filter)
+                    if self.delta else None)
+
+        if self.result_store is not None:
+            self.result_store.add(records, cpf, location, screenshot, query_cpf=query_cpf,
+                                  detail_filter=self.detail_filter)
+
+        if self.delta:
+            if self.save_json:
+                self.json_exporter.save(records, cpf, location, screenshot, save=True, return_json=False,
+                                        query_cpf=query_cpf)
+            return self.delta_exporter.save(previous, records, cpf, location)
 
         return self.json_exporter.save(
-            self.format_data(data),
-            self.get_cpf(),
-            self.get_location(),
+            records,
+            cpf,
+            location,
             screenshot,
-            save=True
+            save=self.save_json,
+            return_json=self.return_json,
+            query_cpf=query_cpf,
         )
 
+    def extract_data(self) -> str:
+        """Extract financial data, including detail pages, and export it."""
+        try:
+            with self.memory.stage('summary'):
+                summary = self.scrape_summary()
+            with self.memory.stage('details'):
+                records = self.format_data(summary.data)
+            with self.memory.stage('export'):
+                return self.export(records, summary)
+        finally:
+            self.close_recording()
+
+    def close_recording(self) -> None:
+        """Finalize the page recording of this search, if any."""
+        if self.recorder is not None:
+            self.recorder.close()
+
     def start_search(self, input_value: str) -> bool:
         """Start search with parameters and input value."""
+        self.submit_search(input_value)
+        return self.check_results(input_value)
+
+    def submit_search(self, input_value: str) -> None:
+        """Enter the input value, apply the filters and start the search."""
         SearchHandler(self.web_bot, input_value, self.timeout).execute()
         self.filter_manager.apply(self.search_filter)
         StartSearch(self.web_bot, self.timeout).execute()
-        return self.check_results(input_value)
 
     def check_results(self, input_value: str) -> bool:
-        """Check and select matching search results."""
+        """Wait for the results, then check and select the matching one."""
+        time.sleep(pause_seconds(self.web_bot, self.RESULTS_DELAY))
+        found = self.select_result(input_value)
+        if found:
+            time.sleep(pause_seconds(self.web_bot, self.SETTLE_DELAY))
+        return found
+
+    def select_result(self, input_value: str) -> bool:
+        """Check the loaded search results and click the one matching name and CPF."""
         try:
-            time.sleep(7)
-            get_lookup_values = WebDriverWait(self.web_bot, self.timeout).until(
-                lambda b: b.find_element(
-                    By.XPATH, PersonSearchServiceCONSTANTS.Xpath.TOTAL_VALUES_FOUND.value
-                ).text.strip().replace('.', '')
+            total_xpath = PersonSearchServiceCONSTANTS.Xpath.TOTAL_VALUES_FOUND.value
+            get_lookup_values = latency_tracker.wait(
+                self.web_bot, f"check_results {total_xpath}",
+                lambda b: b.find_element(By.XPATH, total_xpath).text.strip().replace('.', ''),
+                self.timeout
             )
 
             values_found = int(get_lookup_values or 0)
@@ -180,25 +329,22 @@ class PersonSearchService:
             for name, cpf in zip(names_found, cpfs_found):
                 result = PersonValidator(name.text.strip(), cpf.text.strip())
                 if result.matches(self.name, self.cpf):
-                    print(f"Match found: '{result.name}', CPF: {result.cpf}")
+                    logger.info("Match found: '%s', CPF: %s", result.name, result.cpf)
                     name.click()
-
-                    time.sleep(2)
-
                     return True
 
             raise ValueError('No match found')
 
         except TimeoutException:
-            print("Timeout waiting for results")
+            logger.warning("Timeout waiting for results")
             self.result_validator.check(0, input_value)
             return False
         except NoSuchElementException as e:
-            print(f"Element missing: {e}")
+            logger.warning("Element missing: %s", e)
             self.result_validator.check(0, input_value)
             return False
         except ValueError as e:
-            print(f"Error: {e}")
+            logger.warning("Error: %s", e)
             return False
 
     @staticmethod
@@ -226,11 +372,83 @@ class PersonSearchService:
         return normalize_name(input_value) if search_value == 'name' else (
             normalize_number(input_value))
 
+    @staticmethod
+    def identity(name: Optional[str], cpf: Optional[str]) -> Tuple[str, str]:
+        """Normalized name and CPF, which together decide the result row `select_result` picks."""
+        return normalize_name(name or ''), normalize_number(cpf or '')
+
+    @staticmethod
+    def search_key(input_value: str, search_by: str, search_filter: Optional[Union[str, List[str]]] = None,
+                   detail_filter: Optional[DetailFilter] = None,
+                   identity: Optional[Tuple[str, str]] = None) -> Tuple[Any, ...]:
+        """
+        Build the deduplication key of a search from its normalized value, mode and filters.
+
+        `identity` (see `identity()`) is part of the key, so two people sharing a
+        name or NIS never share a scrape.
+        """
+        filters = [search_filter] if isinstance(search_filter, str) else (search_filter or [])
+        window = detail_filter.key() if detail_filter else None
+        return search_by, input_value, identity, tuple(sorted(set(filters))), window
+
+    @classmethod
+    def query_key(cls, query: Dict[str, Any]) -> Tuple[Any, ...]:
+        """Deduplication key of a query holding the keyword arguments of the constructor."""
+        search_by = query.get('search_by', 'cpf')
+        value = query.get(search_by) or ''
+        value = normalize_name(value) if search_by == 'name' else normalize_number(value)
+        return cls.search_key(value, search_by, query.get('search_filter'), query.get('detail_filter'),
+                              cls.identity(query.get('name'), query.get('cpf')))
+
+    @classmethod
+    def dedupe_queries(cls, queries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Drop batch queries that would run the same search as an earlier one.
+
+        Each query holds the keyword arguments of the constructor (without `web_bot`).
+        """
+        unique = unique_by(queries, cls.query_key)
+        if len(unique) < len(queries):
+            logger.info("Removed %s duplicate query(ies) from batch", len(queries) - len(unique))
+        return unique
+
+    def output_key(self) -> Tuple[Any, ...]:
+        """
+        Key of what a search returns and writes besides its data.
+
+        Stores and archives are compared by identity; they outlive every search
+        sharing them, so their ids are not reused while it is in flight.
+        """
+        return (self.return_json, self.save_json, self.delta, id(self.result_store),
+                id(self.json_exporter.archive), self.recording_dir)
+
     def search(self) -> str:
-        """Search person and return JSON data."""
+        """
+        Search person and return JSON data.
+
+        Concurrent searches with the same key and the same output settings (see
+        `output_key()`) share a single browser scrape.
+        """
         self.check_input(self.name, self.cpf, self.nis)
         input_value = self.set_search_value(self.search_by)
-        self.start_bot()
-        if self.start_search(input_value):
-            return self.extract_data()
-        return '[]'
\ No newline at end of file
+        key = self.search_key(input_value, self.search_by, self.search_filter, self.detail_filter,
+                              self.identity(self.name, self.cpf))
+        return self.single_flight.do((key, self.output_key()), self.run_search, input_value)
+
+    def run_search(self, input_value: str) -> str:
+        """
+        Navigate, search and extract data for an already validated input value.
+
+        With `profile_memory`, each stage is measured and the report is logged and
+        kept in `memory_profile`.
+        """
+        try:
+            with self.memory.stage('navigate'):
+                self.start_bot()
+            with self.memory.stage('search'):
+                found = self.start_search(input_value)
+            if found:
+                return self.extract_data()
+            return '[]'
+        finally:
+            self.memory_profile = self.memory.finish(f"search by {self.search_by}")
\ No newline at end of file
@@ -0,0 +1,139 @@
+"""
+Delta output for person search results.
+
+Compares a new scrape with the last stored result searched with the same CPF
+and detail filter, and emits only added or removed resources, new or removed
+extrato rows and changed values.
+"""
+
+import json
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from src.rpa.modules.transparency_portal.person_search_service.records import ResourceRecord, to_json_value
+from src.rpa.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+Record = Union[ResourceRecord, Dict[str, Any]]
+
+COMPARED_FIELDS = ('nome', 'valor', 'link do recurso')
+
+
+def normalize(value: Any) -> Any:
+    """Convert parsed values to their stored JSON form so both sides compare equal."""
+    return json.loads(json.dumps(value, ensure_ascii=False, default=to_json_value))
+
+
+def row_key(row: Any) -> str:
+    """Stable identity of an extrato row."""
+    return json.dumps(row, ensure_ascii=False, sort_keys=True, default=to_json_value)
+
+
+def resource_key(item: Record) -> Tuple[str, str, Optional[str]]:
+    """Identity of a resource row: recurso, NIS and its detail link."""
+    return item.get('recurso', 'Não informado'), item.get('nis', 'Não informado'), item.get('link do recurso')
+
+
+def keyed(items: Iterable[Record]) -> Iterator[Tuple[Tuple[Any, ...], Record]]:
+    """
+    Pair each resource with a key unique within one result.
+
+    Rows sharing recurso, NIS and link (e.g. without a detail link) are told
+    apart by their order of appearance, so none of them is collapsed.
+    """
+    seen: Dict[Tuple[str, str, Optional[str]], int] = {}
+    for item in items:
+        key = resource_key(item)
+        seen[key] = seen.get(key, 0) + 1
+        yield (*key, seen[key]), item
+
+
+def describe(key: Tuple[Any, ...]) -> Dict[str, Any]:
+    """The identifying fields of a resource key, as reported in a delta."""
+    return {'recurso': key[0], 'nis': key[1], 'link do recurso': key[2]}
+
+
+class DeltaExporter:
+    """Builds change records between a stored result and a fresh scrape."""
+
+    def build(self, previous: Optional[Dict[str, Any]], data: Iterable[Record],
+              cpf: str, location: str) -> Dict[str, Any]:
+        """
+        Diff the new records against the previous stored document.
+
+        Without a previous result every resource is reported as added. When
+        nothing changed the delta is a small record with `changed` set to False.
+        """
+        old = dict(keyed((previous or {}).get('data', [])))
+        added: List[Dict[str, Any]] = []
+        updated: List[Dict[str, Any]] = []
+        seen = set()
+        new_rows_total = 0
+        removed_rows_total = 0
+        changed_values = 0
+
+        for key, item in keyed(data):
+            seen.add(key)
+            before = old.get(key)
+            if before is None:
+                entry = {field: normalize(item.get(field)) for field in COMPARED_FIELDS}
+                entry.update(describe(key), extrato=[normalize(row) for row in item.get('extrato', [])])
+                new_rows_total += len(entry['extrato'])
+                added.append(entry)
+                continue
+
+            changes = {}
+            for field in COMPARED_FIELDS:
+                old_value, new_value = before.get(field), normalize(item.get(field))
+                if old_value != new_value:
+                    changes[field] = {'old': old_value, 'new': new_value}
+
+            known_rows = {row_key(row) for row in before.get('extrato', [])}
+            new_rows, current_rows = [], set()
+            for row in item.get('extrato', []):
+                current = row_key(row)
+                current_rows.add(current)
+                if current not in known_rows:
+                    new_rows.append(normalize(row))
+            removed_rows = [row for row in before.get('extrato', []) if row_key(row) not in current_rows]
+
+            if changes or new_rows or removed_rows:
+                changed_values += len(changes)
+                new_rows_total += len(new_rows)
+                removed_rows_total += len(removed_rows)
+                updated.append({**describe(key), 'changes': changes, 'new_rows': new_rows,
+                                'removed_rows': removed_rows})
+
+        removed = [describe(key) for key in old if key not in seen]
+        location_changed = previous is not None and previous.get('localidade') != location
+
+        delta: Dict[str, Any] = {
+            'cpf': cpf,
+            'changed': bool(added or updated or removed or location_changed),
+            'previous_scraped_at': previous.get('scraped_at') if previous else None,
+        }
+        if not delta['changed']:
+            return delta
+
+        delta['summary'] = {
+            'added_resources': len(added),
+            'removed_resources': len(removed),
+            'updated_resources': len(updated),
+            'new_rows': new_rows_total,
+            'removed_rows': removed_rows_total,
+            'changed_values': changed_values + int(location_changed),
+        }
+        if location_changed:
+            delta['localidade'] = {'old': previous.get('localidade'), 'new': location}
+        delta.update(added=added, updated=updated, removed=removed)
+        return delta
+
+    def save(self, previous: Optional[Dict[str, Any]], data: Iterable[Record],
+             cpf: str, location: str) -> str:
+        """Build the delta and return it as a JSON string."""
+        delta = self.build(previous, data, cpf, location)
+        if delta['changed']:
+            logger.info("Delta for CPF %s: %s", cpf, delta['summary'])
+        else:
+            logger.info("No change for CPF %s", cpf)
+        return json.dumps(delta, ensure_ascii=False, indent=4, default=to_json_value)
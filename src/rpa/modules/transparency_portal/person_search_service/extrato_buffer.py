@@ -0,0 +1,110 @@
+"""
+Bounded-memory buffer for extrato rows.
+
+Rows are kept in memory up to a threshold and then spilled to an anonymous
+temporary file, so long payment histories do not grow worker memory.
+"""
+
+import pickle
+import tempfile
+from typing import IO, Dict, Iterable, Iterator, List, Optional
+
+from src.rpa.utils.CONSTANTS import EXTRATO_BUFFER_MAX_ROWS
+from src.rpa.modules.transparency_portal.person_search_service.records import ExtratoRow, TableSchema
+from src.rpa.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class ExtratoBuffer:
+    """
+    Append-only sequence of extrato rows that spills to disk past `max_rows`.
+
+    Spilled rows are pickled as `(schema_id, values)` pairs; schemas stay in
+    memory since they are shared by every row of a table. Iteration reads the
+    spill file back one row at a time, followed by the rows still in memory;
+    rows must not be appended while an iteration is in progress.
+    """
+
+    def __init__(self, max_rows: int = EXTRATO_BUFFER_MAX_ROWS, spill_dir: Optional[str] = None) -> None:
+        """Initialize an empty buffer with the in-memory row threshold."""
+        if max_rows < 1:
+            raise ValueError("max_rows must be at least 1")
+        self.max_rows = max_rows
+        self.spill_dir = spill_dir
+        self._rows: List[ExtratoRow] = []
+        self._schemas: List[TableSchema] = []
+        self._schema_ids: Dict[int, int] = {}
+        self._file: Optional[IO[bytes]] = None
+        self._spilled = 0
+
+    def __len__(self) -> int:
+        return self._spilled + len(self._rows)
+
+    def __iter__(self) -> Iterator[ExtratoRow]:
+        if self._file is not None:
+            yield from self._read_spilled()
+        yield from list(self._rows)
+
+    def __enter__(self) -> 'ExtratoBuffer':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @property
+    def spilled(self) -> int:
+        """Number of rows currently stored on disk."""
+        return self._spilled
+
+    def append(self, row: ExtratoRow) -> None:
+        """Add a row, spilling the in-memory rows once the threshold is reached."""
+        self._rows.append(row)
+        if len(self._rows) >= self.max_rows:
+            self.spill()
+
+    def extend(self, rows: Iterable[ExtratoRow]) -> None:
+        """Add several rows."""
+        for row in rows:
+            self.append(row)
+
+    def spill(self) -> None:
+        """Write the in-memory rows to the spill file and release them."""
+        if not self._rows:
+            return
+        if self._file is None:
+            self._file = tempfile.TemporaryFile(prefix='extrato_', dir=self.spill_dir)
+            logger.debug("Spilling extrato rows to disk after %s row(s)", len(self._rows))
+        self._file.seek(0, 2)
+        pickler = pickle.Pickler(self._file, protocol=pickle.HIGHEST_PROTOCOL)
+        for row in self._rows:
+            pickler.dump((self._schema_id(row.schema), row.values))
+            pickler.clear_memo()
+        self._spilled += len(self._rows)
+        self._rows = []
+
+    def close(self) -> None:
+        """Discard all rows and delete the spill file."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._rows = []
+        self._spilled = 0
+
+    def _schema_id(self, schema: TableSchema) -> int:
+        """Return the local id of a schema, registering it on first use."""
+        schema_id = self._schema_ids.get(id(schema))
+        if schema_id is None:
+            schema_id = self._schema_ids[id(schema)] = len(self._schemas)
+            self._schemas.append(schema)
+        return schema_id
+
+    def _read_spilled(self) -> Iterator[ExtratoRow]:
+        """Lazily read spilled rows back in insertion order."""
+        self._file.flush()
+        self._file.seek(0)
+        unpickler = pickle.Unpickler(self._file)
+        for _ in range(self._spilled):
+            schema_id, values = unpickler.load()
+            yield ExtratoRow(self._schemas[schema_id], values)
+        self._file.seek(0, 2)
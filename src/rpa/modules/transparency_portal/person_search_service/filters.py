@@ -9,11 +9,14 @@ from typing import Optional, Union, List, Dict
 
 from selenium.webdriver.common.by import By
 from selenium.webdriver.remote.webdriver import WebDriver
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 
 from src.rpa.modules.transparency_portal.CONSTANTS import PersonSearchServiceCONSTANTS
+from src.rpa.utils.adaptive_timeout import wait_for
+from src.rpa.utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 
 class FilterStrategy(ABC):
@@ -31,8 +34,8 @@ class FilterStrategy(ABC):
     def click_element(self, xpath: str, context: str) -> None:
         """Wait for element to be clickable and click it."""
         try:
-            WebDriverWait(self.web_bot, self.timeout).until(
-                EC.element_to_be_clickable((By.XPATH, xpath))
+            wait_for(
+                self.web_bot, type(self).__name__, (By.XPATH, xpath), EC.element_to_be_clickable, self.timeout
             ).click()
         except TimeoutException as e:
             raise ValueError(f"Failed to click {context}: {xpath}") from e
@@ -63,16 +66,17 @@ class FilterManager:
     def is_visible_button(self) -> bool:
         """Ensure filter search button is active."""
         try:
-            button = WebDriverWait(self.web_bot, self.timeout).until(
-                EC.presence_of_element_located((By.XPATH, self.VISIBLE_FILTER_SEARCH))
+            button = wait_for(
+                self.web_bot, type(self).__name__, (By.XPATH, self.VISIBLE_FILTER_SEARCH),
+                EC.presence_of_element_located, self.timeout
             )
             if "active" in button.get_attribute("class").split():
-                print("Filter button already active")
+                logger.debug("Filter button already active")
                 return True
             self.click_filter()
             return True
         except TimeoutException:
-            print("Filter button unavailable")
+            logger.warning("Filter button unavailable")
             return False
 
     def click_filter(self) -> None:
@@ -82,8 +86,8 @@ class FilterManager:
     def click_element(self, xpath: str, context: str) -> None:
         """Wait for element to be clickable and click it."""
         try:
-            WebDriverWait(self.web_bot, self.timeout).until(
-                EC.element_to_be_clickable((By.XPATH, xpath))
+            wait_for(
+                self.web_bot, type(self).__name__, (By.XPATH, xpath), EC.element_to_be_clickable, self.timeout
             ).click()
         except TimeoutException as e:
             raise ValueError(f"Failed to click {context}: {xpath}") from e
@@ -101,19 +105,19 @@ class FilterManager:
     def apply(self, filters: Optional[Union[str, List[str]]] = None) -> None:
         """Apply specified filters to the search."""
         if not filters:
-            print("No filters provided")
+            logger.debug("No filters provided")
             return
 
         filter_list = [filters] if isinstance(filters, str) else filters
         unique_filters = self.validate_filters(filter_list)
 
         if len(unique_filters) < len(filter_list):
-            print("Duplicates removed from filters")
+            logger.info("Duplicates removed from filters")
 
         if not self.is_visible_button():
-            print("Cannot apply filters: filter button unavailable")
+            logger.warning("Cannot apply filters: filter button unavailable")
             return
 
         for _filter in unique_filters:
-            print(f"Applying filter: {_filter}")
+            logger.debug("Applying filter: %s", _filter)
             self.filters[_filter].apply()
\ No newline at end of file
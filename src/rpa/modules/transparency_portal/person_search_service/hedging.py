@@ -0,0 +1,184 @@
+"""
+Hedged detail-page fetches.
+
+When a detail scrape runs past the recent p95 of detail scrapes, the same page
+is fetched again on an idle spare session; the first result wins and the other
+fetch is cancelled at its next page boundary.
+"""
+
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from src.rpa.modules.transparency_portal.person_search_service.extrato_buffer import ExtratoBuffer
+from src.rpa.utils.adaptive_timeout import LatencyTracker, latency_tracker
+from src.rpa.utils.logger import get_logger, job_context, job_id_var
+
+logger = get_logger(__name__)
+
+Fetch = Callable[[WebDriver, threading.Event], ExtratoBuffer]
+
+STEP = 'OpenDetailPage fetch'
+
+
+class HedgedFetcher:
+    """
+    Run detail fetches with a hedge on a spare session past the p95 latency.
+
+    Each session (the caller's and every spare) is used by one fetch at a time;
+    a cancelled fetch keeps its session until it has closed its tab. A single
+    WebDriver serializes commands across tabs, so hedges need separate sessions.
+
+    Parameters
+    ----------
+    spares : Sequence[WebDriver]
+        Idle sessions hedges may run on.
+    max_ratio : float, optional
+        Maximum share of fetches that may be hedged (default is 0.1).
+    percentile : float, optional
+        Latency percentile after which a fetch is hedged (default is 0.95).
+    min_samples : int, optional
+        Fetches observed before hedging starts (default is 10).
+    tracker : LatencyTracker, optional
+        Where fetch latencies are recorded (default is the shared tracker).
+    """
+
+    def __init__(self, spares: Sequence[WebDriver], max_ratio: float = 0.1, percentile: float = 0.95,
+                 min_samples: int = 10, tracker: Optional[LatencyTracker] = None) -> None:
+        """Initialize with the spare sessions and hedging limits."""
+        if not spares:
+            raise ValueError("Hedging needs at least one spare session")
+        if not 0 <= max_ratio <= 1:
+            raise ValueError("max_ratio must be between 0 and 1")
+        self.spares = list(spares)
+        self.max_ratio = max_ratio
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.tracker = tracker or latency_tracker
+        self._idle: List[WebDriver] = list(spares)
+        self._session_locks: Dict[int, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2 * (len(spares) + 1), thread_name_prefix='hedge')
+        self.fetches = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.capped = 0
+        self.no_spare = 0
+
+    def session_lock(self, web_bot: WebDriver) -> threading.Lock:
+        """Lock held while a fetch runs on `web_bot`."""
+        with self._lock:
+            return self._session_locks.setdefault(id(web_bot), threading.Lock())
+
+    def threshold(self) -> Optional[float]:
+        """Seconds after which a fetch is hedged, or None until enough fetches were observed."""
+        return self.tracker.quantile(STEP, self.percentile, self.min_samples)
+
+    def acquire_spare(self) -> Optional[WebDriver]:
+        """Take an idle spare session if the hedge budget allows it."""
+        with self._lock:
+            if self.hedges + 1 > self.max_ratio * self.fetches:
+                self.capped += 1
+                return None
+            if not self._idle:
+                self.no_spare += 1
+                return None
+            self.hedges += 1
+            return self._idle.pop()
+
+    def release_spare(self, web_bot: WebDriver) -> None:
+        with self._lock:
+            self._idle.append(web_bot)
+
+    def submit(self, web_bot: WebDriver, fetch: Fetch, cancel: threading.Event) -> Future:
+        """Run `fetch` on `web_bot` in the pool, holding the session for its whole duration."""
+        lock = self.session_lock(web_bot)
+        job_id = job_id_var.get()
+
+        def run() -> ExtratoBuffer:
+            with lock, job_context(job_id):
+                return fetch(web_bot, cancel)
+
+        return self._executor.submit(run)
+
+    def fetch(self, web_bot: WebDriver, fetch: Fetch) -> ExtratoBuffer:
+        """
+        Run `fetch(web_bot, cancel)` and hedge it on a spare session if it runs long.
+
+        The first non-empty result wins; the other fetch is cancelled and its rows
+        are discarded.
+        """
+        with self._lock:
+            self.fetches += 1
+        started = time.perf_counter()
+        cancel = threading.Event()
+        primary = self.submit(web_bot, fetch, cancel)
+
+        threshold = self.threshold()
+        if threshold is None or wait([primary], timeout=threshold).done:
+            result = primary.result()
+            self.tracker.record(STEP, time.perf_counter() - started)
+            return result
+
+        spare = self.acquire_spare()
+        if spare is None:
+            result = primary.result()
+            self.tracker.record(STEP, time.perf_counter() - started)
+            return result
+
+        logger.info("Hedging detail fetch after %.1fs", threshold, extra={'hedge_after_s': round(threshold, 2)})
+        hedge_cancel = threading.Event()
+        hedge = self.submit(spare, fetch, hedge_cancel)
+        hedge.add_done_callback(lambda _: self.release_spare(spare))
+
+        pending = {primary, hedge}
+        winner: Optional[Future] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None and (winner is None or not winner.result()):
+                    winner = future
+            if winner is not None and winner.result():
+                break
+
+        loser, loser_cancel = (hedge, hedge_cancel) if winner is primary else (primary, cancel)
+        loser_cancel.set()
+        loser.add_done_callback(self.discard)
+        if winner is hedge:
+            with self._lock:
+                self.hedge_wins += 1
+        self.tracker.record(STEP, time.perf_counter() - started)
+        if winner is None:
+            return primary.result()
+        return winner.result()
+
+    def settle(self, web_bot: WebDriver) -> None:
+        """Wait until no fetch, including a cancelled one, is still using `web_bot`."""
+        with self.session_lock(web_bot):
+            pass
+
+    @staticmethod
+    def discard(future: Future) -> None:
+        """Drop the rows of a losing fetch."""
+        if future.exception() is None and isinstance(future.result(), ExtratoBuffer):
+            future.result().close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return fetch, hedge and hedge-win counts and how often hedging was skipped."""
+        threshold = self.threshold()
+        with self._lock:
+            return {
+                'fetches': self.fetches,
+                'hedges': self.hedges,
+                'hedge_wins': self.hedge_wins,
+                'capped': self.capped,
+                'no_spare': self.no_spare,
+                'hedge_after_s': threshold and round(threshold, 2),
+            }
+
+    def close(self) -> None:
+        """Wait for running fetches and stop the worker threads."""
+        self._executor.shutdown(wait=True)
@@ -1,19 +1,38 @@
 import os
 import json
-from typing import List, Dict, Any, Optional
+import hashlib
+from typing import List, Dict, Any, Iterator, Optional, Union
 from datetime import datetime
 
 from src.rpa.utils.CONSTANTS import CACHE_DIR
+from src.rpa.utils.result_archive import ResultArchive
+from src.rpa.modules.transparency_portal.person_search_service.records import ResourceRecord, to_json_value
+from src.rpa.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+INDENT = ' ' * 4
 
 
 class JsonExporter:
     """Exports data to JSON format with optional file saving."""
 
-    def __init__(self, filename='.json') -> None:
-        """Initialize JSON exporter with a default filename."""
+    def __init__(self, filename='.json', archive: Optional[ResultArchive] = None) -> None:
+        """Initialize JSON exporter with a default filename and an optional compressed archive."""
         if not filename or not filename.strip().endswith('.json'):
             raise ValueError("Filename must be a non-empty string ending with '.json'")
         self.filename = filename
+        self.archive = archive
+
+    @staticmethod
+    def archive_key(cpf: str) -> str:
+        """
+        Archive key holding the latest result of a searched CPF.
+
+        Keyed on a hash of the full CPF: the 6 digits the page shows are shared
+        by many people, and the full CPF is kept out of entry names.
+        """
+        return f"ID_{hashlib.sha256(cpf.encode('utf-8')).hexdigest()[:32]}"
 
     @staticmethod
     def generate_json(cpf: str) -> str:
@@ -24,28 +43,84 @@ class JsonExporter:
         os.makedirs(CACHE_DIR, exist_ok=True)
         return rf"{CACHE_DIR}\ID_{cpf}_{timestamp}.json"
 
+    @staticmethod
+    def enrich(item: Union[ResourceRecord, Dict[str, Any]], cpf: str, location: str) -> Dict[str, Any]:
+        """Build the exported entry of a resource record."""
+        return {
+            'nome': item.get('nome', 'Desconhecido'),
+            'cpf': cpf,
+            'nis': item.get('nis', 'Não informado'),
+            'localidade': location,
+            'recurso': item.get('recurso', 'Não informado'),
+            'valor': item.get('valor', 'Não informado'),
+            'link do recurso': item.get('link do recurso', 'Não informado'),
+            'extrato': item.get('extrato', []),
+        }
+
+    @staticmethod
+    def dumps(obj: Any, level: int = 0) -> str:
+        """Serialize a value with 4-space indentation nested at the given level."""
+        text = json.dumps(obj, ensure_ascii=False, indent=4, default=to_json_value)
+        return text.replace('\n', '\n' + INDENT * level)
+
+    def iter_json(
+        self,
+        data: List[Union[ResourceRecord, Dict[str, Any]]],
+        cpf: str,
+        location: str,
+        screenshot: str = '',
+    ) -> Iterator[str]:
+        """Yield the JSON document in chunks, reading extrato rows one at a time.
+
+        Rows held in disk-spilling buffers are never materialized as a whole list.
+        """
+        yield '{\n' + INDENT + '"data": ['
+        for i, item in enumerate(data):
+            entry = self.enrich(item, cpf, location)
+            extrato = entry.pop('extrato')
+            head = self.dumps(entry, 2)
+            yield (',' if i else '') + '\n' + INDENT * 2 + head[:head.rfind('\n')] + ',\n'
+            yield INDENT * 3 + '"extrato": ['
+            empty = True
+            for row in extrato:
+                yield ('\n' if empty else ',\n') + INDENT * 4 + self.dumps(row, 4)
+                empty = False
+            yield (']' if empty else '\n' + INDENT * 3 + ']') + '\n' + INDENT * 2 + '}'
+        yield ('\n' + INDENT + '],' if data else '],') + '\n'
+        yield INDENT + '"screenshot": ' + self.dumps(screenshot) + '\n}'
+
     def save(
         self,
-        data: List[Dict[str, Any]],
+        data: List[Union[ResourceRecord, Dict[str, Any]]],
         cpf: str,
         location: str,
         screenshot: str = '',
         save: Optional[bool] = None,
+        return_json: bool = True,
+        query_cpf: Optional[str] = None,
     ) -> str:
         """Constructs JSON from data with optional screenshot and saves to file if specified.
 
         Args:
-            data: List of dictionaries containing data to export.
+            data: List of resource records (or dictionaries) containing data to export.
+                Extrato rows are serialized as they are written, with their scraped texts.
             cpf: CPF identifier (6 digits) to include in JSON and filename.
             location: Location identifier to include in JSON.
             screenshot: Optional screenshot path or data (default: '').
-            save: If True, saves JSON to file; if False, only returns JSON string (default: False).
+            save: If True, saves JSON to file (or to the archive, when configured); if False,
+                only returns JSON string (default: False).
+            return_json: If False and 'save' is True, the JSON is streamed to the file and
+                the filename is returned instead, so the document is never held in memory
+                (default: True).
+            query_cpf: Full normalized CPF that was searched; required to save to the archive,
+                whose entries are keyed on it (default: None).
 
         Returns:
-            JSON string representation of the data.
+            JSON string representation of the data, or the saved filename.
 
         Raises:
-            ValueError: If 'data' is not a list, cpf is invalid, or location is empty.
+            ValueError: If 'data' is not a list, cpf is invalid, location is empty, or
+                'query_cpf' is missing when saving to the archive.
             OSError: If file saving fails when 'save' is True.
         """
         if not isinstance(data, list):
@@ -54,34 +129,33 @@ class JsonExporter:
             raise ValueError("CPF cannot be empty")
         if not location or not location.strip():
             raise ValueError("Location cannot be empty")
+        if save and self.archive is not None and not query_cpf:
+            raise ValueError("Saving to the archive requires the searched CPF")
 
-        enriched_data = [
-            {
-                'nome': item.get('nome', 'Desconhecido'),
-                'cpf': cpf,
-                'nis': item.get('nis', 'Não informado'),
-                'localidade': location,
-                'recurso': item.get('recurso', 'Não informado'),
-                'valor': item.get('valor', 'Não informado'),
-                'link do recurso': item.get('link do recurso', 'Não informado'),
-                'extrato': item.get('extrato', []),
-            }
-            for item in data
-        ]
-
-        _json = {'data': enriched_data, 'screenshot': screenshot}
-        json_str = json.dumps(_json, ensure_ascii=False, indent=4)
+        chunks = self.iter_json(data, cpf, location, screenshot)
 
         if save:
-            filename = self.generate_json(cpf)
+            parts: List[str] = []
+
+            def tee() -> Iterator[str]:
+                for chunk in chunks:
+                    if return_json:
+                        parts.append(chunk)
+                    yield chunk
+
+            filename = self.archive_key(query_cpf) if self.archive is not None else self.generate_json(cpf)
             try:
-                with open(filename, 'w', encoding='utf-8') as f:
-                    f.write(json_str)
-                print(f"Saved {len(data)} item(s) to {filename}")
+                if self.archive is not None:
+                    filename = self.archive.put(filename, tee())
+                else:
+                    with open(filename, 'w', encoding='utf-8') as f:
+                        for chunk in tee():
+                            f.write(chunk)
+                logger.info("Saved %s item(s) to %s", len(data), filename)
             except OSError as e:
-                print(f"Failed to save JSON to {filename}: {str(e)}")
+                logger.error("Failed to save JSON to %s: %s", filename, e)
                 raise
-        else:
-            print(f"Processed {len(data)} item(s) to JSON")
+            return ''.join(parts) if return_json else filename
 
-        return json_str
\ No newline at end of file
+        logger.info("Processed %s item(s) to JSON", len(data))
+        return ''.join(chunks)
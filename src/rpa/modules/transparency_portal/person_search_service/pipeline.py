@@ -0,0 +1,211 @@
+"""
+Pipelined batch execution for person search service automation.
+
+Splits each search into stages (search and match, detail pages, export) that run
+on their own threads connected by bounded queues, so the detail pages of person N
+are scraped on one browser session while person N+1 is searched on another.
+"""
+
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from src.rpa.modules.transparency_portal.person_search_service.core import PersonSearchService
+from src.rpa.modules.transparency_portal.person_search_service.records import PersonSummary, ResourceRecord
+from src.rpa.utils.adaptive_timeout import latency_tracker
+from src.rpa.utils.logger import get_logger, job_context, new_job_id
+
+logger = get_logger(__name__)
+
+STOP = object()
+
+
+@dataclass
+class PipelineJob:
+    """A query moving through the pipeline, with the output of each stage."""
+    index: int
+    query: Dict[str, Any]
+    service: Optional[PersonSearchService] = None
+    summary: Optional[PersonSummary] = None
+    records: Optional[List[ResourceRecord]] = None
+    result: Optional[str] = None
+    error: Optional[BaseException] = None
+    timings: Dict[str, float] = field(default_factory=dict)
+    job_id: str = field(default_factory=new_job_id)
+
+    @property
+    def done(self) -> bool:
+        """Whether later stages have nothing left to do for this job."""
+        return self.result is not None or self.error is not None
+
+
+class PipelineStage:
+    """One pipeline phase, run by a dedicated thread between two bounded queues."""
+
+    def __init__(self, name: str, handler: Callable[[PipelineJob], None],
+                 inbox: queue.Queue, outbox: queue.Queue) -> None:
+        """Initialize with the stage handler and its input and output queues."""
+        self.name = name
+        self.handler = handler
+        self.inbox = inbox
+        self.outbox = outbox
+        self.items = 0
+        self.busy = 0.0
+        self.starved = 0.0
+        self.blocked = 0.0
+        self.thread = threading.Thread(target=self.run, name=f"pipeline-{name}", daemon=True)
+
+    def run(self) -> None:
+        """Process jobs until the stop marker arrives, then forward it."""
+        while True:
+            started = time.perf_counter()
+            job = self.inbox.get()
+            self.starved += time.perf_counter() - started
+            if job is STOP:
+                self.outbox.put(STOP)
+                return
+            if not job.done:
+                started = time.perf_counter()
+                with job_context(job.job_id):
+                    try:
+                        self.handler(job)
+                    except Exception as e:
+                        logger.error("Stage '%s' failed for query %s: %s", self.name, job.index, e)
+                        job.error = e
+                elapsed = time.perf_counter() - started
+                job.timings[self.name] = elapsed
+                self.busy += elapsed
+                self.items += 1
+            started = time.perf_counter()
+            self.outbox.put(job)
+            self.blocked += time.perf_counter() - started
+
+    def stats(self, wall: float) -> Dict[str, float]:
+        """Return processed items, busy/starved/blocked seconds and utilization."""
+        return {
+            'items': self.items,
+            'busy_s': round(self.busy, 3),
+            'starved_s': round(self.starved, 3),
+            'blocked_s': round(self.blocked, 3),
+            'utilization': round(self.busy / wall, 3) if wall else 0.0,
+        }
+
+
+class SearchPipeline:
+    """
+    Run a batch of person searches as a three-stage pipeline.
+
+    Parameters
+    ----------
+    search_bot : WebDriver
+        Session used to search, match and scrape each person's summary page.
+    detail_bot : WebDriver
+        Session used to paginate through resource detail pages. Both sessions start
+        with the portal snapshot when created by a `DriverSession` with `browser_state`.
+    timeout : int, optional
+        Timeout in seconds for WebDriver operations (default is 10).
+    queue_size : int, optional
+        Capacity of the queues between stages (default is 2).
+    **options
+        Extra `PersonSearchService` options (result_store, save_json, result_archive, delta,
+        recording_dir, detail_filter, hedge, circuit_wait, return_json). While the portal circuit
+        breaker is open, queued searches fail at once with `CircuitOpenError`, or
+        wait up to `circuit_wait` seconds for it to recover.
+    """
+
+    def __init__(self, search_bot: WebDriver, detail_bot: WebDriver, timeout: int = 10,
+                 queue_size: int = 2, **options: Any) -> None:
+        """Initialize the sessions and stage options."""
+        if search_bot is detail_bot:
+            raise ValueError("Search and detail stages need separate WebDriver sessions")
+        if queue_size < 1:
+            raise ValueError("queue_size must be at least 1")
+        self.search_bot = search_bot
+        self.detail_bot = detail_bot
+        self.timeout = timeout
+        self.queue_size = queue_size
+        self.options = options
+        self.searches = 0
+        self.stages: List[PipelineStage] = []
+        self.wall = 0.0
+
+    def search(self, job: PipelineJob) -> None:
+        """Stage 1: search, match and scrape the summary page on the search session."""
+        service = PersonSearchService(
+            self.search_bot, timeout=self.timeout, reuse_session=self.searches > 0,
+            **self.options, **job.query
+        )
+        job.service = service
+        try:
+            service.check_input(service.name, service.cpf, service.nis)
+            input_value = service.set_search_value(service.search_by)
+            service.start_bot()
+            if service.start_search(input_value):
+                job.summary = service.scrape_summary()
+            else:
+                job.result = '[]'
+        finally:
+            self.searches += 1
+
+    def details(self, job: PipelineJob) -> None:
+        """Stage 2: scrape resource detail pages on the detail session."""
+        job.records = job.service.format_data(job.summary.data, web_bot=self.detail_bot)
+
+    @staticmethod
+    def export(job: PipelineJob) -> None:
+        """Stage 3: store and export the result, without a browser."""
+        try:
+            job.result = job.service.export(job.records, job.summary)
+        finally:
+            job.service.close_recording()
+
+    def run(self, queries: Iterable[Dict[str, Any]]) -> List[PipelineJob]:
+        """
+        Run every query through the pipeline and return the jobs in input order.
+
+        Duplicate queries are removed before dispatch. Failed jobs carry their
+        exception in `error` instead of stopping the batch.
+        """
+        queries = PersonSearchService.dedupe_queries(list(queries))
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(3)] + [queue.Queue()]
+        self.stages = [
+            PipelineStage('search', self.search, queues[0], queues[1]),
+            PipelineStage('details', self.details, queues[1], queues[2]),
+            PipelineStage('export', self.export, queues[2], queues[3]),
+        ]
+
+        started = time.perf_counter()
+        for stage in self.stages:
+            stage.thread.start()
+        for index, query in enumerate(queries):
+            queues[0].put(PipelineJob(index, query))
+        queues[0].put(STOP)
+
+        jobs = []
+        while (job := queues[3].get()) is not STOP:
+            if job.service is not None:
+                job.service.close_recording()
+            jobs.append(job)
+        self.wall = time.perf_counter() - started
+        if self.options.get('result_store') is not None:
+            self.options['result_store'].flush()
+
+        logger.info("Pipeline processed %s query(ies) in %.1fs", len(jobs), self.wall)
+        for name, stats in self.stats().items():
+            logger.info("Stage %s: %s", name, stats, extra={'stage': name, **stats})
+        if self.options.get('hedge') is not None:
+            logger.info("Hedging: %s", self.options['hedge'].stats())
+        breaker = PersonSearchService.circuit_breaker.stats()
+        if breaker['trips'] or breaker['rejected']:
+            logger.warning("Portal circuit: %s", breaker, extra={'circuit_stats': breaker})
+        for step, stats in latency_tracker.stats().items():
+            logger.debug("Step %s: %s", step, stats, extra={'step': step, **stats})
+        return sorted(jobs, key=lambda j: j.index)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Return how busy each stage was during the last run."""
+        return {stage.name: stage.stats(self.wall) for stage in self.stages}
@@ -0,0 +1,98 @@
+"""
+Search recordings for offline replay.
+
+A recording is a gzip-compressed JSON-lines file holding the raw HTML of every
+page read during one search (the summary page and each detail page), plus the
+person's identity and screenshot.
+"""
+
+import gzip
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from src.rpa.utils.CONSTANTS import RECORDINGS_DIR
+from src.rpa.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+EXTENSION = '.jsonl.gz'
+
+
+class SearchRecorder:
+    """Append the pages visited during one search to a recording file."""
+
+    def __init__(self, path: str) -> None:
+        """Open the recording file for writing."""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self._file = gzip.open(path, 'wt', encoding='utf-8', compresslevel=6)
+        self.pages = 0
+
+    @classmethod
+    def create(cls, directory: str = RECORDINGS_DIR, label: str = 'search') -> 'SearchRecorder':
+        """Start a new recording in `directory`, named after the label and current time."""
+        timestamp = datetime.now().strftime('%d-%m-%Y_%H-%M-%S_%f')
+        return cls(os.path.join(directory, f"{label}_{timestamp}{EXTENSION}"))
+
+    @property
+    def closed(self) -> bool:
+        """Whether the recording has been finalized."""
+        return self._file is None
+
+    def _write(self, entry: Dict[str, Any]) -> None:
+        if self._file is None:
+            raise ValueError(f"Recording {self.path} is closed")
+        self._file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+    def meta(self, **fields: Any) -> None:
+        """Record search metadata (query, CPF, location, screenshot)."""
+        self._write({'kind': 'meta', **fields})
+
+    def summary(self, html: str) -> None:
+        """Record the person's resource summary page."""
+        self._write({'kind': 'summary', 'html': html})
+        self.pages += 1
+
+    def detail(self, url: Optional[str], page: int, html: str) -> None:
+        """Record one page of a resource detail table."""
+        self._write({'kind': 'detail', 'url': url, 'page': page, 'html': html})
+        self.pages += 1
+
+    def close(self) -> None:
+        """Finalize the recording; safe to call more than once."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            logger.info("Recorded %s page(s) to %s", self.pages, self.path)
+
+
+class Recording:
+    """A recording loaded back from disk."""
+
+    def __init__(self, path: str) -> None:
+        """Read every entry of the recording."""
+        self.path = path
+        self.meta: Dict[str, Any] = {}
+        self.summary_html: Optional[str] = None
+        self.detail_pages: Dict[Optional[str], List[str]] = {}
+        with gzip.open(path, 'rt', encoding='utf-8') as file:
+            for line in file:
+                entry = json.loads(line)
+                kind = entry.pop('kind')
+                if kind == 'meta':
+                    self.meta.update(entry)
+                elif kind == 'summary':
+                    self.summary_html = entry['html']
+                elif kind == 'detail':
+                    self.detail_pages.setdefault(entry['url'], []).append(entry['html'])
+
+    @staticmethod
+    def find(directory: str = RECORDINGS_DIR) -> List[str]:
+        """List recording files in a directory, oldest first."""
+        if not os.path.isdir(directory):
+            return []
+        return sorted(
+            os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(EXTENSION)
+        )
@@ -0,0 +1,370 @@
+"""
+Typed record model for person search results.
+
+Extrato rows share one interned column schema per table layout and store their
+cells in a tuple. Currency and date cells are packed into ints when scraped
+(cents, and yyyymmdd dates) if they format back to the exact scraped text, so
+exported rows keep the portal's own formatting.
+"""
+
+import json
+import re
+import sys
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from typing import Any, Callable, ClassVar, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+CURRENCY_PATTERN = re.compile(r'^(-)?\s*(?:R\$)?\s*(-)?\s*(\d{1,3}(?:\.\d{3})*|\d+)(?:,(\d+))?$')
+DATE_PATTERN = re.compile(r'^(\d{2})/(\d{2})/(\d{4})$')
+MONTH_PATTERN = re.compile(r'^(\d{2})/(\d{4})$')
+
+CURRENCY_HEADERS = ('valor',)
+DATE_HEADERS = ('data', 'mês', 'mes', 'competência', 'referência')
+
+Value = Union[str, Decimal, date, None]
+Cell = Union[str, int]
+
+
+def parse_currency(text: str) -> Optional[Decimal]:
+    """Parse a Brazilian formatted amount such as 'R$ 1.234,56' into a Decimal."""
+    match = CURRENCY_PATTERN.match(text.strip())
+    if not match:
+        return None
+    sign = '-' if match.group(1) or match.group(2) else ''
+    integer = match.group(3).replace('.', '')
+    fraction = match.group(4) or '0'
+    try:
+        return Decimal(f"{sign}{integer}.{fraction}")
+    except InvalidOperation:
+        return None
+
+
+def parse_date(text: str) -> Optional[date]:
+    """Parse 'dd/mm/yyyy' or 'mm/yyyy' (first day of month) into a date."""
+    text = text.strip()
+    try:
+        if match := DATE_PATTERN.match(text):
+            day, month, year = match.groups()
+            return date(int(year), int(month), int(day))
+        if match := MONTH_PATTERN.match(text):
+            month, year = match.groups()
+            return date(int(year), int(month), 1)
+    except ValueError:
+        return None
+    return None
+
+
+def to_json_value(value: Any) -> Any:
+    """JSON encoder fallback for records, row containers and parsed values."""
+    if isinstance(value, ExtratoRow):
+        return value.to_dict()
+    if isinstance(value, ResourceRecord):
+        return value.to_dict()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    if hasattr(value, '__iter__'):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dump_row(row: Any) -> str:
+    """Serialize one extrato row as JSON, with cells as the scraped texts."""
+    return json.dumps(row, ensure_ascii=False, default=to_json_value)
+
+
+def format_currency(cents: int) -> str:
+    """Write an amount in cents the portal's way, e.g. '1.234,56'."""
+    integer, fraction = divmod(abs(cents), 100)
+    return f"{'-' if cents < 0 else ''}{integer:,}".replace(',', '.') + f",{fraction:02d}"
+
+
+def pack_currency(text: str) -> Optional[int]:
+    """Amount of `text` in cents, or None unless `format_currency` writes it back as `text`."""
+    amount = parse_currency(text)
+    if amount is None or amount != amount.quantize(Decimal('0.01')):
+        return None
+    cents = int(amount * 100)
+    return cents if format_currency(cents) == text else None
+
+
+def format_date(packed: int) -> str:
+    """Write a packed yyyymmdd date as 'dd/mm/yyyy', or 'mm/yyyy' when the day is 00."""
+    year, rest = divmod(packed, 10000)
+    month, day = divmod(rest, 100)
+    return f"{day:02d}/{month:02d}/{year:04d}" if day else f"{month:02d}/{year:04d}"
+
+
+def pack_date(text: str) -> Optional[int]:
+    """Date of `text` packed as yyyymmdd (day 00 for a month), or None unless it is written back as `text`."""
+    day = parse_date(text)
+    if day is None:
+        return None
+    packed = day.year * 10000 + day.month * 100 + (day.day if DATE_PATTERN.match(text) else 0)
+    return packed if format_date(packed) == text else None
+
+
+def unpack_date(packed: int) -> date:
+    """Date of a packed yyyymmdd value; a month is its first day."""
+    year, rest = divmod(packed, 10000)
+    month, day = divmod(rest, 100)
+    return date(year, month, day or 1)
+
+
+@dataclass(frozen=True)
+class CellCodec:
+    """Packs a column's cells into ints, writes them back as text and reads them as typed values."""
+    pack: Callable[[str], Optional[int]]
+    format: Callable[[int], str]
+    unpack: Callable[[int], Any]
+
+
+CURRENCY = CellCodec(pack_currency, format_currency, lambda cents: Decimal(cents).scaleb(-2))
+DATE = CellCodec(pack_date, format_date, unpack_date)
+
+
+def column_codec(header: str) -> Optional[CellCodec]:
+    """Select the cell codec for a column from its header."""
+    lowered = header.lower()
+    if any(key in lowered for key in CURRENCY_HEADERS):
+        return CURRENCY
+    if lowered.startswith(DATE_HEADERS):
+        return DATE
+    return None
+
+
+class TableSchema:
+    """
+    Column layout of a scraped table, interned once per distinct header set.
+
+    Every row of every page with the same headers references the same schema,
+    so header strings are stored once instead of once per row.
+    """
+    __slots__ = ('columns', 'codecs', 'index')
+    _registry: ClassVar[Dict[Tuple[str, ...], 'TableSchema']] = {}
+
+    def __init__(self, columns: Tuple[str, ...]) -> None:
+        """Initialize with column names and their cell codecs."""
+        self.columns = tuple(sys.intern(column) for column in columns)
+        self.codecs = tuple(column_codec(column) for column in self.columns)
+        self.index = {column: i for i, column in enumerate(self.columns)}
+
+    @classmethod
+    def intern(cls, headers: Sequence[str]) -> 'TableSchema':
+        """Return the shared schema for the given headers."""
+        key = tuple(headers)
+        schema = cls._registry.get(key)
+        if schema is None:
+            schema = cls._registry.setdefault(key, cls(key))
+        return schema
+
+    def row(self, cells: Sequence[str]) -> 'ExtratoRow':
+        """
+        Build a row from raw cell texts, packing the cells that format back unchanged.
+
+        Other texts are interned: they repeat down a column (UF, município), so
+        each distinct text is kept once.
+        """
+        values = []
+        for codec, cell in zip(self.codecs, cells):
+            packed = codec.pack(cell) if codec and cell else None
+            values.append(sys.intern(cell) if packed is None else packed)
+        return ExtratoRow(self, tuple(values))
+
+
+class ExtratoRow:
+    """
+    One row of a resource detail (extrato) table.
+
+    `values` holds the scraped texts, with packed ints for the currency and
+    date cells of its schema's codecs; `get()` reads them as Decimal and date,
+    `to_dict()` as the scraped texts.
+    """
+    __slots__ = ('schema', 'values')
+
+    def __init__(self, schema: TableSchema, values: Tuple[Cell, ...]) -> None:
+        """Initialize with the shared schema and the row values."""
+        self.schema = schema
+        self.values = values
+
+    def get(self, column: str, default: Any = None) -> Any:
+        """Return the typed value of a column (Decimal, date or text), or `default` if absent."""
+        i = self.schema.index.get(column)
+        if i is None or i >= len(self.values):
+            return default
+        value = self.values[i]
+        return self.schema.codecs[i].unpack(value) if isinstance(value, int) else value
+
+    def to_dict(self) -> Dict[str, str]:
+        """Return the row as a header-keyed mapping of the scraped texts."""
+        return {
+            column: codec.format(value) if isinstance(value, int) else value
+            for column, codec, value in zip(self.schema.columns, self.schema.codecs, self.values)
+        }
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ExtratoRow):
+            return NotImplemented
+        return self.schema.columns == other.schema.columns and self.values == other.values
+
+    def __repr__(self) -> str:
+        return f"ExtratoRow({self.to_dict()!r})"
+
+
+class DetailFilter:
+    """
+    Date window and column subset pushed down into detail (extrato) scraping.
+
+    Rows dated outside `[since, until]` are dropped and only `columns` are kept;
+    cells are projected before parsing, so unwanted columns are never
+    materialized. Rows whose date cannot be parsed are kept.
+    """
+    __slots__ = ('since', 'until', 'columns', 'date_column', '_plans')
+
+    def __init__(self, since: Union[date, str, None] = None, until: Union[date, str, None] = None,
+                 columns: Optional[Sequence[str]] = None, date_column: Optional[str] = None) -> None:
+        """Initialize with the window bounds (dates or 'dd/mm/yyyy' / 'mm/yyyy'), columns and date column."""
+        self.since = self.to_date(since, 'since')
+        self.until = self.to_date(until, 'until')
+        if self.since and self.until and self.since > self.until:
+            raise ValueError("'since' must not be after 'until'")
+        if columns is not None and not columns:
+            raise ValueError("columns cannot be empty")
+        if columns is not None and not all(isinstance(column, str) and column.strip() for column in columns):
+            raise ValueError(f"columns must be non-empty strings: {list(columns)!r}")
+        self.columns = tuple(columns) if columns else None
+        self.date_column = date_column
+        self._plans: Dict[TableSchema, Tuple[TableSchema, Optional[Tuple[int, ...]], Optional[int]]] = {}
+
+    @staticmethod
+    def to_date(value: Union[date, str, None], name: str) -> Optional[date]:
+        """Accept a date, a date string or None."""
+        if value is None or isinstance(value, date):
+            return value
+        parsed = parse_date(value) if isinstance(value, str) else None
+        if parsed is None:
+            raise ValueError(f"Invalid '{name}' date: {value!r}")
+        return parsed
+
+    @classmethod
+    def last_months(cls, months: int, columns: Optional[Sequence[str]] = None,
+                    today: Optional[date] = None) -> 'DetailFilter':
+        """Window covering the current month and the `months - 1` before it."""
+        if months < 1:
+            raise ValueError("months must be at least 1")
+        today = today or date.today()
+        first = today.year * 12 + today.month - 1 - (months - 1)
+        return cls(since=date(first // 12, first % 12 + 1, 1), columns=columns)
+
+    def key(self) -> Tuple[Optional[str], Optional[str], Optional[Tuple[str, ...]], Optional[str]]:
+        """Hashable identity, used to tell searches with different windows apart."""
+        return (self.since and self.since.isoformat(), self.until and self.until.isoformat(),
+                self.columns, self.date_column)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the filter options as JSON-compatible values."""
+        since, until, columns, date_column = self.key()
+        return {'since': since, 'until': until, 'columns': list(columns) if columns else None,
+                'date_column': date_column}
+
+    @classmethod
+    def from_dict(cls, options: Dict[str, Any]) -> 'DetailFilter':
+        """Rebuild a filter from `to_dict` output."""
+        since, until = (date.fromisoformat(options[k]) if options.get(k) else None for k in ('since', 'until'))
+        return cls(since, until, options.get('columns'), options.get('date_column'))
+
+    def plan(self, schema: TableSchema) -> Tuple[TableSchema, Optional[Tuple[int, ...]], Optional[int]]:
+        """Return the projected schema, kept column indices and date column index for a table layout."""
+        plan = self._plans.get(schema)
+        if plan is None:
+            lowered = {column.lower(): i for i, column in enumerate(schema.columns)}
+            indices = None
+            projected = schema
+            if self.columns is not None:
+                indices = tuple(lowered[c.lower()] for c in self.columns if c.lower() in lowered)
+                projected = TableSchema.intern([schema.columns[i] for i in indices])
+            if self.date_column is not None:
+                date_index = lowered.get(self.date_column.lower())
+            else:
+                date_index = next((i for i, codec in enumerate(schema.codecs) if codec is DATE), None)
+            plan = self._plans[schema] = (projected, indices, date_index)
+        return plan
+
+    def rows(self, schema: TableSchema, cell_rows: Iterable[Sequence[str]]) -> Tuple[List['ExtratoRow'], bool]:
+        """
+        Build the rows of one page that fall inside the window.
+
+        Also returns whether the page already reached past the window, in which
+        case later pages cannot contain matching rows.
+        """
+        projected, indices, date_index = self.plan(schema)
+        rows = []
+        dates = []
+        for cells in cell_rows:
+            day = parse_date(cells[date_index]) if date_index is not None and date_index < len(cells) else None
+            if day is not None:
+                dates.append(day)
+                if (self.since and day < self.since) or (self.until and day > self.until):
+                    continue
+            if indices is not None:
+                cells = [cells[i] if i < len(cells) else '' for i in indices]
+            rows.append(projected.row(cells))
+        return rows, self.past_window(dates)
+
+    def past_window(self, dates: List[date]) -> bool:
+        """
+        Whether a page's dates, in table order, end beyond the window in paging direction.
+
+        Pages are taken as newest first, the portal's order, unless their dates increase.
+        """
+        if not dates:
+            return False
+        if dates[0] >= dates[-1]:
+            return self.since is not None and dates[-1] < self.since
+        return self.until is not None and dates[-1] > self.until
+
+    def __repr__(self) -> str:
+        return f"DetailFilter({self.to_dict()!r})"
+
+
+@dataclass(slots=True)
+class ResourceRecord:
+    """A financial resource received by a person, with its extrato rows."""
+    nome: str
+    nis: str
+    recurso: str
+    valor: str
+    link: Optional[str] = None
+    extrato: Iterable[ExtratoRow] = field(default_factory=list)
+
+    FIELDS: ClassVar[Dict[str, str]] = {
+        'nome': 'nome', 'nis': 'nis', 'recurso': 'recurso', 'valor': 'valor',
+        'link do recurso': 'link', 'extrato': 'extrato',
+    }
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Read a field by its exporter key, mirroring `dict.get`."""
+        attribute = self.FIELDS.get(key)
+        return default if attribute is None else getattr(self, attribute)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the record in the exporter's key layout."""
+        return {
+            'nome': self.nome,
+            'nis': self.nis,
+            'recurso': self.recurso,
+            'valor': self.valor,
+            'link do recurso': self.link,
+            'extrato': [row.to_dict() for row in self.extrato],
+        }
+
+
+@dataclass(slots=True)
+class PersonSummary:
+    """Person page data scraped before the detail pages: resource tables and identity."""
+    data: List[Dict[str, Any]]
+    cpf: str
+    location: str
+    screenshot: str = ''
@@ -0,0 +1,102 @@
+"""
+Offline replay of recorded person searches.
+
+Runs the parse, format and export steps against recorded HTML instead of a live
+browser, so scraper and exporter changes can be checked and profiled without
+the portal or a Selenium grid.
+
+Usage:
+    python -m src.rpa.modules.transparency_portal.person_search_service.replay [RECORDING ...]
+        [--dir DIR] [--output DIR]
+"""
+
+import argparse
+import os
+import time
+from typing import Dict, Iterable, Optional
+
+from bs4 import BeautifulSoup
+
+from src.rpa.modules.transparency_portal.person_search_service.core import PersonSearchService
+from src.rpa.modules.transparency_portal.person_search_service.extrato_buffer import ExtratoBuffer
+from src.rpa.modules.transparency_portal.person_search_service.records import DetailFilter, PersonSummary
+from src.rpa.modules.transparency_portal.person_search_service.recording import EXTENSION, Recording
+from src.rpa.modules.transparency_portal.person_search_service.result_store import ResultStore
+from src.rpa.modules.transparency_portal.person_search_service.scraper import ScrapePages, ScrapeTable
+from src.rpa.utils.CONSTANTS import RECORDINGS_DIR
+from src.rpa.utils.logger import configure_logging, get_logger, job_context
+
+logger = get_logger(__name__)
+
+
+def replay(path: str, result_store: Optional[ResultStore] = None, save_json: bool = False) -> str:
+    """Replay one recording through parse, format and export and return its JSON output."""
+    recording = Recording(path)
+    if recording.summary_html is None:
+        raise ValueError(f"Recording {path} has no summary page")
+    meta = recording.meta
+    detail_filter = DetailFilter.from_dict(meta['detail_filter']) if meta.get('detail_filter') else None
+
+    service = PersonSearchService(
+        None, name=meta.get('name') or 'Desconhecido', cpf=meta.get('query_cpf') or meta.get('cpf', ''),
+        nis=meta.get('nis'), search_by=meta.get('search_by', 'cpf'), search_filter=meta.get('search_filter'),
+        result_store=result_store, save_json=save_json, detail_filter=detail_filter,
+    )
+
+    def load_details(url: str) -> ExtratoBuffer:
+        rows = ExtratoBuffer()
+        for html in recording.detail_pages.get(url, []):
+            if detail_filter is None:
+                rows.extend(ScrapePages.parse_page(html))
+            else:
+                rows.extend(ScrapePages.parse_window(html, detail_filter)[0])
+        return rows
+
+    data = ScrapeTable(None).parse_tables(BeautifulSoup(recording.summary_html, "html.parser"))
+    records = service.format_data(data, detail_loader=load_details)
+    summary = PersonSummary(data, meta.get('cpf', 'Unknown'), meta.get('location', 'Unknown'),
+                            meta.get('screenshot', ''))
+    return service.export(records, summary)
+
+
+def replay_all(paths: Iterable[str], **options) -> Dict[str, str]:
+    """Replay every recording, logging failures instead of stopping, and return outputs by path."""
+    results = {}
+    for path in paths:
+        with job_context():
+            started = time.perf_counter()
+            try:
+                results[path] = replay(path, **options)
+                logger.info("Replayed %s in %.3fs", path, time.perf_counter() - started)
+            except Exception as e:
+                logger.error("Failed to replay %s: %s", path, e)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('recordings', nargs='*', help="recording files (default: every file in --dir)")
+    parser.add_argument('--dir', default=RECORDINGS_DIR, help="directory searched for recordings")
+    parser.add_argument('--output', help="write each result next to its name here instead of printing")
+    args = parser.parse_args()
+
+    configure_logging()
+    paths = args.recordings or Recording.find(args.dir)
+    if not paths:
+        parser.error(f"No recordings found in {args.dir}")
+
+    results = replay_all(paths)
+    for path, json_str in results.items():
+        if args.output:
+            os.makedirs(args.output, exist_ok=True)
+            name = os.path.basename(path).replace(EXTENSION, '.json')
+            with open(os.path.join(args.output, name), 'w', encoding='utf-8') as f:
+                f.write(json_str)
+        else:
+            print(json_str)
+    if len(results) < len(paths):
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,311 @@
+"""
+Indexed SQLite store for person search results.
+
+Replaces globbing timestamped JSON files: results are written as they arrive,
+committed in batches, and looked up by CPF, NIS, recurso and scrape time
+through indexed queries. Each result also keeps the full CPF it was searched
+with, since the portal only shows a masked one, and the detail filter its
+extrato was scraped with.
+"""
+
+import atexit
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from src.rpa.utils.CONSTANTS import RESULT_STORE_PATH
+from src.rpa.modules.transparency_portal.person_search_service.records import (
+    DetailFilter, ResourceRecord, dump_row, to_json_value,
+)
+from src.rpa.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    cpf TEXT NOT NULL,
+    location TEXT NOT NULL,
+    screenshot TEXT NOT NULL DEFAULT '',
+    scraped_at TEXT NOT NULL,
+    query_cpf TEXT,
+    detail_filter TEXT
+);
+CREATE TABLE IF NOT EXISTS resources (
+    id INTEGER PRIMARY KEY,
+    result_id INTEGER NOT NULL REFERENCES results(id) ON DELETE CASCADE,
+    nome TEXT,
+    nis TEXT,
+    recurso TEXT,
+    valor TEXT,
+    link TEXT,
+    extrato TEXT NOT NULL DEFAULT '[]'
+);
+CREATE TABLE IF NOT EXISTS extrato (
+    resource_id INTEGER NOT NULL REFERENCES resources(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    row TEXT NOT NULL,
+    PRIMARY KEY (resource_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_results_cpf_time ON results (cpf, scraped_at);
+CREATE INDEX IF NOT EXISTS idx_results_time ON results (scraped_at);
+CREATE INDEX IF NOT EXISTS idx_resources_result ON resources (result_id);
+CREATE INDEX IF NOT EXISTS idx_resources_nis ON resources (nis, result_id);
+CREATE INDEX IF NOT EXISTS idx_resources_recurso ON resources (recurso, result_id);
+"""
+
+Record = Union[ResourceRecord, Dict[str, Any]]
+
+ANY_FILTER = object()
+
+
+class ResultStore:
+    """
+    Batched writer and query API over the SQLite result database.
+
+    `add` writes each result straight into an open transaction, streaming its
+    extrato one row at a time into the `extrato` table, so neither the rows nor
+    the screenshot are held in memory until the next flush. The transaction is
+    committed once `batch_size` results are pending or `flush_interval` seconds
+    have passed since the last commit. A background thread commits results left
+    pending for `flush_interval`, and `close` runs at interpreter exit, so the
+    last results of a run are not lost when nothing else calls `flush`.
+
+    Results stored before the `extrato` table existed keep their rows as a JSON
+    array in `resources.extrato` and are read back from there.
+    """
+
+    def __init__(self, path: str = RESULT_STORE_PATH, batch_size: int = 20,
+                 flush_interval: float = 5.0) -> None:
+        """Open (or create) the database and its indexes."""
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._last_flush = time.monotonic()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA foreign_keys=ON')
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_periodically, name='result-store-flush', daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+
+    def _migrate(self) -> None:
+        """Add the searched-CPF and detail filter columns to databases created before they existed."""
+        columns = {row['name'] for row in self._conn.execute('PRAGMA table_info(results)')}
+        with self._conn:
+            if 'query_cpf' not in columns:
+                self._conn.execute('ALTER TABLE results ADD COLUMN query_cpf TEXT')
+            if 'detail_filter' not in columns:
+                self._conn.execute('ALTER TABLE results ADD COLUMN detail_filter TEXT')
+            self._conn.execute(
+                'CREATE INDEX IF NOT EXISTS idx_results_query_cpf_time ON results (query_cpf, scraped_at)'
+            )
+
+    def __enter__(self) -> 'ResultStore':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @staticmethod
+    def _text(value: Any) -> Optional[str]:
+        """Store parsed values (Decimal, date) as text."""
+        if value is None or isinstance(value, str):
+            return value
+        return to_json_value(value)
+
+    @staticmethod
+    def filter_key(detail_filter: Optional[DetailFilter]) -> Optional[str]:
+        """Stored form of a detail filter; None when the whole extrato was scraped."""
+        if detail_filter is None or not any(detail_filter.key()):
+            return None
+        return json.dumps(detail_filter.to_dict(), ensure_ascii=False)
+
+    def add(self, data: Iterable[Record], cpf: str, location: str, screenshot: str = '',
+            scraped_at: Optional[datetime] = None, query_cpf: Optional[str] = None,
+            detail_filter: Optional[DetailFilter] = None) -> None:
+        """
+        Write one search result.
+
+        `query_cpf` is the full CPF it was searched with and `detail_filter` the
+        filter its extrato was scraped with.
+        """
+        scraped_at = (scraped_at or datetime.now()).isoformat(timespec='seconds')
+        with self._lock:
+            if not self._conn.in_transaction:
+                self._conn.execute('BEGIN')
+            self._conn.execute('SAVEPOINT result')
+            try:
+                self._insert(data, (cpf, location, screenshot, scraped_at, query_cpf, self.filter_key(detail_filter)))
+            except BaseException:
+                self._conn.execute('ROLLBACK TO result')
+                raise
+            finally:
+                self._conn.execute('RELEASE result')
+            self._pending += 1
+            due = (self._pending >= self.batch_size
+                   or time.monotonic() - self._last_flush >= self.flush_interval)
+        if due:
+            self.flush()
+
+    def _insert(self, data: Iterable[Record], result: Tuple[Any, ...]) -> None:
+        """Insert a result and its resources, streaming each extrato from its buffer."""
+        result_id = self._conn.execute(
+            'INSERT INTO results (cpf, location, screenshot, scraped_at, query_cpf, detail_filter) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            result,
+        ).lastrowid
+        for item in data:
+            resource_id = self._conn.execute(
+                'INSERT INTO resources (result_id, nome, nis, recurso, valor, link) VALUES (?, ?, ?, ?, ?, ?)',
+                (
+                    result_id,
+                    item.get('nome', 'Desconhecido'),
+                    item.get('nis', 'Não informado'),
+                    item.get('recurso', 'Não informado'),
+                    self._text(item.get('valor', 'Não informado')),
+                    item.get('link do recurso'),
+                ),
+            ).lastrowid
+            self._conn.executemany(
+                'INSERT INTO extrato (resource_id, position, row) VALUES (?, ?, ?)',
+                ((resource_id, position, dump_row(row)) for position, row in enumerate(item.get('extrato', []))),
+            )
+
+    def flush(self) -> int:
+        """Commit all pending results and return how many."""
+        with self._lock:
+            pending, self._pending = self._pending, 0
+            self._last_flush = time.monotonic()
+            if not pending:
+                return 0
+            self._conn.commit()
+        logger.info("Stored %s result(s) in %s", pending, self.path)
+        return pending
+
+    def _flush_periodically(self) -> None:
+        while not self._closed.wait(self.flush_interval):
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                logger.error("Failed to flush results to %s: %s", self.path, e)
+
+    def close(self) -> None:
+        """Flush pending results and close the database; further calls do nothing."""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._flusher.join()
+        atexit.unregister(self.close)
+        self.flush()
+        self._conn.close()
+
+    def _resources(self, result_id: int, recurso: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Load the resources of a result, optionally restricted to one recurso."""
+        query = 'SELECT * FROM resources WHERE result_id = ?'
+        params: List[Any] = [result_id]
+        if recurso is not None:
+            query += ' AND recurso = ?'
+            params.append(recurso)
+        return [
+            {
+                'nome': row['nome'],
+                'nis': row['nis'],
+                'recurso': row['recurso'],
+                'valor': row['valor'],
+                'link do recurso': row['link'],
+                'extrato': self._extrato(row),
+            }
+            for row in self._conn.execute(query + ' ORDER BY id', params).fetchall()
+        ]
+
+    def _extrato(self, resource: sqlite3.Row) -> List[Dict[str, Any]]:
+        """Load the extrato rows of a resource, in scraped order."""
+        rows = [
+            json.loads(row['row'])
+            for row in self._conn.execute(
+                'SELECT row FROM extrato WHERE resource_id = ? ORDER BY position', (resource['id'],)
+            )
+        ]
+        return rows or json.loads(resource['extrato'])
+
+    def _document(self, row: sqlite3.Row, recurso: Optional[str] = None) -> Dict[str, Any]:
+        """Rebuild a stored result in the exporter's document layout."""
+        return {
+            'cpf': row['cpf'],
+            'localidade': row['location'],
+            'scraped_at': row['scraped_at'],
+            'screenshot': row['screenshot'],
+            'data': self._resources(row['id'], recurso),
+        }
+
+    def latest(self, cpf: Optional[str] = None, nis: Optional[str] = None, query_cpf: Optional[str] = None,
+               detail_filter: Any = ANY_FILTER) -> Optional[Dict[str, Any]]:
+        """
+        Return the most recent result for a person, by searched CPF, CPF or NIS.
+
+        `cpf` is the CPF shown by the portal, which is masked and may match
+        several people; `query_cpf` is the full CPF the result was searched with.
+        Results scraped with any detail filter are considered unless
+        `detail_filter` is given (None for an unfiltered search).
+        """
+        if not cpf and not nis and not query_cpf:
+            raise ValueError("Provide a CPF or NIS")
+        self.flush()
+        if query_cpf:
+            query, params = 'SELECT * FROM results r WHERE r.query_cpf = ?', [query_cpf]
+        elif cpf:
+            query, params = 'SELECT * FROM results r WHERE r.cpf = ?', [cpf]
+        else:
+            query = 'SELECT r.* FROM results r JOIN resources s ON s.result_id = r.id WHERE s.nis = ?'
+            params = [nis]
+        if detail_filter is not ANY_FILTER:
+            query += ' AND r.detail_filter IS ?'
+            params.append(self.filter_key(detail_filter))
+        with self._lock:
+            row = self._conn.execute(query + ' ORDER BY r.scraped_at DESC, r.id DESC LIMIT 1', params).fetchone()
+            return self._document(row) if row else None
+
+    def between(self, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                cpf: Optional[str] = None, recurso: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Return results scraped in `[since, until)`, oldest first.
+
+        Filters by CPF and/or recurso; with `recurso`, only matching resources are included.
+        """
+        self.flush()
+        clauses, params = [], []
+        if since is not None:
+            clauses.append('r.scraped_at >= ?')
+            params.append(since.isoformat(timespec='seconds'))
+        if until is not None:
+            clauses.append('r.scraped_at < ?')
+            params.append(until.isoformat(timespec='seconds'))
+        if cpf is not None:
+            clauses.append('r.cpf = ?')
+            params.append(cpf)
+        if recurso is not None:
+            clauses.append('EXISTS (SELECT 1 FROM resources s WHERE s.result_id = r.id AND s.recurso = ?)')
+            params.append(recurso)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        with self._lock:
+            rows = self._conn.execute(
+                f'SELECT r.* FROM results r {where} ORDER BY r.scraped_at, r.id', params
+            ).fetchall()
+            return [self._document(row, recurso) for row in rows]
+
+    def by_recurso(self, recurso: str, since: Optional[datetime] = None,
+                   until: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Return every stored result in which the given recurso was received."""
+        return self.between(since, until, recurso=recurso)
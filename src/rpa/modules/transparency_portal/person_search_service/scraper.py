@@ -5,13 +5,13 @@ Extracts financial resource data from tables and detail pages.
 """
 
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 
+import threading
 import time
 from bs4 import BeautifulSoup
 from selenium.webdriver.common.by import By
 from selenium.webdriver.remote.webdriver import WebDriver
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import (
     TimeoutException,
@@ -25,14 +25,23 @@ from src.rpa.modules.transparency_portal.CONSTANTS import (
     TransparencyPortalCONSTANTS,
     PersonSearchServiceCONSTANTS,
 )
+from src.rpa.modules.transparency_portal.person_search_service.records import DetailFilter, ExtratoRow, TableSchema
+from src.rpa.modules.transparency_portal.person_search_service.extrato_buffer import ExtratoBuffer
+from src.rpa.modules.transparency_portal.person_search_service.recording import SearchRecorder
+from src.rpa.utils.adaptive_timeout import wait_for
+from src.rpa.utils.logger import get_logger
+from src.rpa.utils.web_driver_config import pause_seconds
+
+logger = get_logger(__name__)
 
 
 class Bot(ABC):
     """Base class for automation actions."""
-    def __init__(self, web_bot: WebDriver, timeout: int = 10) -> None:
-        """Initialize with WebDriver and timeout."""
+    def __init__(self, web_bot: WebDriver, timeout: int = 10, recorder: Optional[SearchRecorder] = None) -> None:
+        """Initialize with WebDriver, timeout and an optional page recorder."""
         self.web_bot = web_bot
         self.timeout = timeout
+        self.recorder = recorder
 
     @abstractmethod
     def execute(self) -> None:
@@ -43,23 +52,30 @@ class Bot(ABC):
 class ScrapeTable(Bot):
     """Scrapes resource tables."""
 
-    def execute(self) -> List[Dict[str, Any]]:
-        """Extract data from tables on the current page."""
+    def execute(self, settle: bool = True) -> List[Dict[str, Any]]:
+        """Extract data from tables on the current page, first letting it settle for `timeout` seconds."""
         try:
-            soup = self.get_soup()
+            soup = self.get_soup() if settle else self.read_soup()
             data = self.parse_tables(soup)
-            print(f"Scraped {len(data)} table(s) from page")
+            logger.info("Scraped %s table(s) from page", len(data))
             if not data:
                 raise ValueError("No resource tables found")
             return data
         except Exception as e:
-            print(f"Failed to scrape tables: {str(e)}")
+            logger.error("Failed to scrape tables: %s", e)
             return []
 
     def get_soup(self) -> BeautifulSoup:
-        """Create BeautifulSoup object from page source."""
-        time.sleep(self.timeout)
-        return BeautifulSoup(self.web_bot.page_source, "html.parser")
+        """Wait for the page to settle, then read it."""
+        time.sleep(pause_seconds(self.web_bot, self.timeout))
+        return self.read_soup()
+
+    def read_soup(self) -> BeautifulSoup:
+        """Create BeautifulSoup object from page source, recording it when enabled."""
+        html = self.web_bot.page_source
+        if self.recorder is not None:
+            self.recorder.summary(html)
+        return BeautifulSoup(html, "html.parser")
 
     def parse_tables(self, soup: BeautifulSoup) -> List[Dict[str, Any]]:
         """Parse tables with class into dictionaries."""
@@ -94,27 +110,45 @@ class ScrapeTable(Bot):
 class ScrapePages(Bot):
     """Scrapes paginated resource detail tables."""
     NEXT_PAGE_XPATH = PersonSearchServiceCONSTANTS.Xpath.NEXT_PAGE_BTN.value
+    PAGE_DELAY = 5
+
+    def __init__(self, web_bot: WebDriver, timeout: int = 10, recorder: Optional[SearchRecorder] = None,
+                 resource_url: Optional[str] = None, detail_filter: Optional[DetailFilter] = None,
+                 cancel: Optional[threading.Event] = None) -> None:
+        """Initialize with WebDriver, timeout, recorder, the URL being paginated, a row filter and cancel flag."""
+        super().__init__(web_bot, timeout, recorder)
+        self.resource_url = resource_url
+        self.detail_filter = detail_filter
+        self.cancel = cancel
+        self.pages = 0
+        self.past_window = False
 
-    def execute(self) -> List[Dict[str, Any]]:
-        """Extract tables from all pages of resource details."""
-        rows: List[Dict[str, Any]] = []
+    def execute(self) -> ExtratoBuffer:
+        """Extract tables from all pages of resource details into a disk-spilling buffer."""
+        rows = ExtratoBuffer()
         try:
             while True:
                 if self.check_human_verification():
-                    raise ValueError(f"Automation stopped: Detected 'Human Verification'")
-                time.sleep(5)
+                    raise ValueError("Automation stopped: Detected 'Human Verification'")
+                time.sleep(pause_seconds(self.web_bot, self.PAGE_DELAY))
                 page_data = self.scrape_page()
                 if page_data is None:
-                    print("No data found on detail page")
+                    logger.info("No data found on detail page")
                     break
                 rows.extend(page_data)
+                if self.past_window:
+                    logger.info("Stopped at detail page %s: rows past the date window", self.pages)
+                    break
+                if self.cancel is not None and self.cancel.is_set():
+                    logger.debug("Detail scrape cancelled after page %s", self.pages)
+                    break
                 if not self.next_page():
                     break
-            print(f"Scraped {len(rows)} row(s) from detail pages")
+            logger.info("Scraped %s row(s) from detail pages", len(rows))
         except ValueError:
             raise
         except Exception as e:
-            print(f"Failed to scrape detail pages: {str(e)}")
+            logger.error("Failed to scrape detail pages: %s", e)
         return rows
 
     def check_human_verification(self) -> bool:
@@ -122,113 +156,184 @@ class ScrapePages(Bot):
         try:
             return self.web_bot.title == "Human Verification"
         except Exception as e:
-            print(f"Error checking human verification: {str(e)}")
+            logger.warning("Error checking human verification: %s", e)
             return False
 
-    def scrape_page(self) -> List[Dict[str, Any]]:
-        """Scrape table from the current page."""
+    def scrape_page(self) -> List[ExtratoRow]:
+        """Scrape table from the current page, recording its HTML when enabled."""
+        html = self.web_bot.page_source
+        if self.recorder is not None:
+            self.recorder.detail(self.resource_url, self.pages, html)
+        self.pages += 1
+        if self.detail_filter is None:
+            return self.parse_page(html)
+        rows, self.past_window = self.parse_window(html, self.detail_filter)
+        return rows
+
+    @staticmethod
+    def read_table(html: str) -> Tuple[Optional[TableSchema], List[List[str]]]:
+        """Read the detail table of a page as its shared schema and raw cell texts."""
+        soup = BeautifulSoup(html, "html.parser")
+        table = soup.find("table", class_="dataTable no-footer")
+        if not table:
+            logger.warning("No table found on detail page")
+            return None, []
+        schema = TableSchema.intern(
+            [th.text.strip() for th in table.find("thead").find_all("th")]
+        )
+        cells = [
+            [td.text.strip() for td in tr.find_all("td")]
+            for tr in table.find("tbody").find_all("tr")
+        ]
+        return schema, cells
+
+    @classmethod
+    def parse_page(cls, html: str) -> List[ExtratoRow]:
+        """Parse the detail table of a page into typed rows sharing one schema."""
         try:
-            soup = BeautifulSoup(self.web_bot.page_source, "html.parser")
-            table = soup.find("table", class_="dataTable no-footer")
-            if not table:
-                print("No table found on detail page")
-                return []
-            headers = [th.text.strip() for th in table.find("thead").find_all("th")]
-            rows = [
-                dict(zip(headers, [td.text.strip() for td in tr.find_all("td")]))
-                for tr in table.find("tbody").find_all("tr")
-            ]
-            return rows
+            schema, cell_rows = cls.read_table(html)
+            return [schema.row(cells) for cells in cell_rows] if schema else []
         except Exception as e:
-            print(f"Failed to scrape detail page: {str(e)}")
+            logger.error("Failed to scrape detail page: %s", e)
             return []
 
+    @classmethod
+    def parse_window(cls, html: str, detail_filter: DetailFilter) -> Tuple[List[ExtratoRow], bool]:
+        """
+        Parse only the rows and columns selected by `detail_filter`.
+
+        Also returns whether the page reached past the date window.
+        """
+        try:
+            schema, cell_rows = cls.read_table(html)
+            return detail_filter.rows(schema, cell_rows) if schema else ([], False)
+        except Exception as e:
+            logger.error("Failed to scrape detail page: %s", e)
+            return [], False
+
     def next_page(self) -> bool:
-        """Navigate to the next page if available."""
+        """Wait for the page to settle, then move to the next page if available."""
+        time.sleep(pause_seconds(self.web_bot, self.PAGE_DELAY))
+        return self.click_next()
+
+    def click_next(self) -> bool:
+        """
+        Click the next page button, returning False on the last page.
+
+        The current page is already read, so a missing or disabled button means
+        the last page. An enabled button is waited for like any required step; if
+        it never becomes clickable the history may be incomplete, which is logged.
+        """
+        buttons = self.web_bot.find_elements(By.XPATH, self.NEXT_PAGE_XPATH)
+        if not buttons or self.is_disabled(buttons[0]):
+            logger.debug("No more detail pages to scrape")
+            return False
         try:
-            time.sleep(5)
-            WebDriverWait(self.web_bot, self.timeout).until(
-                EC.element_to_be_clickable((By.XPATH, self.NEXT_PAGE_XPATH))
+            wait_for(
+                self.web_bot, type(self).__name__, (By.XPATH, self.NEXT_PAGE_XPATH),
+                EC.element_to_be_clickable, self.timeout
             ).click()
-            print("Moved to next detail page")
-            return True
-        except (TimeoutException, NoSuchElementException, ElementClickInterceptedException):
-            print("No more detail pages to scrape")
+        except (TimeoutException, NoSuchElementException, ElementClickInterceptedException) as e:
+            logger.warning("Next detail page of %s not reachable after page %s; extrato may be incomplete: %s",
+                           self.resource_url, self.pages, type(e).__name__,
+                           extra={'resource_url': self.resource_url, 'pages': self.pages})
             return False
+        logger.debug("Moved to next detail page")
+        return True
+
+    @staticmethod
+    def is_disabled(button: Any) -> bool:
+        """Whether a pagination button is disabled, as on the last page."""
+        classes = (button.get_attribute('class') or '').split()
+        return (not button.is_enabled() or 'disabled' in classes
+                or button.get_attribute('aria-disabled') == 'true')
 
 
 class OpenDetailPage(Bot):
     """Opens and scrapes a resource detail page."""
+    OPEN_DELAY = 5
+    CLOSE_DELAY = 2
+
     def __init__(
         self,
         web_bot: WebDriver,
         resource_url: str,
         timeout: int = 10,
+        recorder: Optional[SearchRecorder] = None,
+        detail_filter: Optional[DetailFilter] = None,
+        cancel: Optional[threading.Event] = None,
     ) -> None:
-        """Initialize with WebDriver, resource URL, and timeout."""
-        super().__init__(web_bot, timeout)
+        """Initialize with WebDriver, resource URL, timeout, page recorder, row filter and cancel flag."""
+        super().__init__(web_bot, timeout, recorder)
         self.resource_url = resource_url
+        self.detail_filter = detail_filter
+        self.cancel = cancel
 
-    def execute(self) -> list[dict[str, Any]] | None:
+    def execute(self) -> ExtratoBuffer:
         """Open resource detail page in new tab and scrape it."""
-        details: List[Dict[str, Any]] = []
+        details = ExtratoBuffer()
         try:
             self.open_tab()
             page_details = self.scrape_details()
-            details = page_details if page_details is not None else []
+            details = page_details if page_details is not None else ExtratoBuffer()
         except ValueError as e:
-            print(f"Failed to scrape details from {self.resource_url}: {str(e)}")
+            logger.error("Failed to scrape details from %s: %s", self.resource_url, e)
         except Exception as e:
-            print(f"Unexpected error scraping {self.resource_url}: {str(e)}")
+            logger.error("Unexpected error scraping %s: %s", self.resource_url, e)
         finally:
             self.close_tab()
         return details
 
-    def open_tab(self) -> None:
-        """Open resource URL in a new tab."""
+    def open_tab(self, settle: bool = True) -> None:
+        """Open resource URL in a new tab, letting it load for `OPEN_DELAY` seconds when `settle`."""
         try:
             self.web_bot.execute_script(f"window.open('{self.resource_url}', '_blank');")
             if len(self.web_bot.window_handles) < 2:
                 raise WebDriverException("No new tab")
             self.web_bot.switch_to.window(self.web_bot.window_handles[-1])
-            time.sleep(5)
+            if settle:
+                time.sleep(pause_seconds(self.web_bot, self.OPEN_DELAY))
         except (WebDriverException, NoSuchWindowException) as e:
             raise ValueError(f"Failed to open tab for {self.resource_url}: {str(e)}") from e
 
-    def scrape_details(self) -> List[Dict[str, Any]]:
+    def scrape_details(self) -> ExtratoBuffer:
         """Scrape details from the open page."""
         try:
-            return ScrapePages(self.web_bot, self.timeout).execute()
+            return ScrapePages(
+                self.web_bot, self.timeout, self.recorder, self.resource_url, self.detail_filter, self.cancel
+            ).execute()
         except ValueError:
             raise
         except Exception as e:
-            print(f"Failed to scrape details: {str(e)}")
-            return []
+            logger.error("Failed to scrape details: %s", e)
+            return ExtratoBuffer()
 
-    def close_tab(self) -> None:
-        """Close current tab and switch back to main tab."""
+    def close_tab(self, settle: bool = True) -> None:
+        """Close current tab and switch back to main tab, pausing `CLOSE_DELAY` seconds when `settle`."""
         try:
             self.web_bot.close()
             if self.web_bot.window_handles:
                 self.web_bot.switch_to.window(self.web_bot.window_handles[0])
-            time.sleep(2)
-            print("Closed detail page tab")
+            if settle:
+                time.sleep(pause_seconds(self.web_bot, self.CLOSE_DELAY))
+            logger.debug("Closed detail page tab")
         except (NoSuchWindowException, WebDriverException) as e:
-            print(f"Failed to close tab: {str(e)}")
+            logger.warning("Failed to close tab: %s", e)
 
 
 class Scraper:
     """Scrapes financial resources."""
-    def __init__(self, web_bot: WebDriver, timeout: int = 10) -> None:
-        """Initialize with WebDriver, timeout, and base URL."""
+    def __init__(self, web_bot: WebDriver, timeout: int = 10, recorder: Optional[SearchRecorder] = None) -> None:
+        """Initialize with WebDriver, timeout, optional page recorder and base URL."""
         self.web_bot = web_bot
         self.timeout = timeout
+        self.recorder = recorder
         self.base_url = TransparencyPortalCONSTANTS.Url.TRANSPARENCY_PORTAL
 
-    def scrape(self) -> List[Dict[str, Any]]:
-        """Scrape resources from the current page."""
+    def scrape(self, settle: bool = True) -> List[Dict[str, Any]]:
+        """Scrape resources from the current page; without `settle` it is read at once."""
         try:
-            return ScrapeTable(self.web_bot, self.timeout).execute()
+            return ScrapeTable(self.web_bot, self.timeout, self.recorder).execute(settle)
         except ValueError as e:
-            print(f"Failed to scrape resources: {str(e)}")
+            logger.error("Failed to scrape resources: %s", e)
             return []
\ No newline at end of file
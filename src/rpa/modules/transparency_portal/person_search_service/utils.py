@@ -1,4 +1,9 @@
+import logging
+
 from src.rpa.utils.automations_utils import normalize_name, normalize_number
+from src.rpa.utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 
 class PersonValidator:
@@ -29,7 +34,7 @@ class PersonValidator:
         """
         try:
             if not name or not name.strip() or not cpf:
-                print(f"Validation skipped: empty name or CPF")
+                logger.debug("Validation skipped: empty name or CPF")
                 return False
             is_valid = (
                 self.cpf == self.trim_cpf(cpf)
@@ -39,12 +44,13 @@ class PersonValidator:
                     if part
                 )
             )
-            print(f"Validated name '{normalize_name(name)}' and CPF"
-                  f"'{self.trim_cpf(cpf)}': {'success' if is_valid else 'failed'}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Validated name '%s' and CPF '%s': %s", normalize_name(name),
+                             self.trim_cpf(cpf), 'success' if is_valid else 'failed')
             return is_valid
 
         except Exception as e:
-            print(f"Validation failed for name '{normalize_name(name)}', CPF '{cpf}': {str(e)}")
+            logger.warning("Validation failed for name '%s', CPF '%s': %s", normalize_name(name), cpf, e)
             return False
 
 
@@ -69,4 +75,4 @@ class ResultValidator:
             )
         if values_found == 0:
             raise ValueError(f"No results found for '{input_value}'")
-        print(f"Validated {values_found} results for '{input_value}'")
\ No newline at end of file
+        logger.info("Validated %s results for '%s'", values_found, input_value)
\ No newline at end of file
@@ -0,0 +1,308 @@
+"""
+Access-frequency tracking and off-peak warming of search results.
+
+`SearchCache` keeps the last JSON result of every search key with an expiry,
+and how often each key is requested, as an exponentially decayed count. The
+decayed count is stored as a time-independent rank, so the hottest keys are an
+indexed query. `CacheWarmer` re-runs the hottest keys whose result is missing
+or close to expiry during off-peak hours, on at most a fixed number of grid
+sessions, so business-hour lookups are served from warm results.
+"""
+
+import json
+import math
+import sqlite3
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from src.rpa.modules.transparency_portal.person_search_service.batch_input import from_json, search_options, to_json
+from src.rpa.modules.transparency_portal.person_search_service.core import PersonSearchService
+from src.rpa.utils.CONSTANTS import (
+    SEARCH_CACHE_HALF_LIFE, SEARCH_CACHE_PATH, SEARCH_CACHE_TTL, SEARCH_CACHE_WARM_HORIZON,
+)
+from src.rpa.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_cache (
+    key TEXT PRIMARY KEY,
+    query TEXT NOT NULL,
+    rank REAL NOT NULL DEFAULT 0,
+    requests INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    scraped_at REAL,
+    expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_search_cache_rank ON search_cache (rank);
+"""
+
+# Bumped whenever `SearchCache.key` changes; rows keyed the old way are dropped on open.
+KEY_VERSION = 2
+
+
+class SearchCache:
+    """
+    Warm search results and request frequency per search key.
+
+    Parameters
+    ----------
+    path : str, optional
+        SQLite database file (default is `SEARCH_CACHE_PATH`).
+    ttl : float, optional
+        Seconds a result is served after it was scraped (default is `SEARCH_CACHE_TTL`).
+    half_life : float, optional
+        Seconds after which a request counts half as much towards a key's heat
+        (default is `SEARCH_CACHE_HALF_LIFE`).
+    """
+
+    def __init__(self, path: str = SEARCH_CACHE_PATH, ttl: float = SEARCH_CACHE_TTL,
+                 half_life: float = SEARCH_CACHE_HALF_LIFE) -> None:
+        """Open (or create) the cache database."""
+        if ttl <= 0 or half_life <= 0:
+            raise ValueError("ttl and half_life must be positive")
+        self.path = path
+        self.ttl = ttl
+        self.half_life = half_life
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+
+    def _migrate(self) -> None:
+        """Drop rows written under an older key format, which could be served to the wrong person."""
+        version = self._conn.execute('PRAGMA user_version').fetchone()[0]
+        if version == KEY_VERSION:
+            return
+        with self._conn:
+            dropped = self._conn.execute('DELETE FROM search_cache').rowcount
+            self._conn.execute(f'PRAGMA user_version = {KEY_VERSION}')
+        if dropped:
+            logger.info("Dropped %s search cache row(s) keyed by an older format", dropped)
+
+    def __enter__(self) -> 'SearchCache':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @staticmethod
+    def key(query: Dict[str, Any]) -> str:
+        """
+        Cache key of a query (keyword arguments of `PersonSearchService`).
+
+        Holds mode, searched value, filters, date window and the normalized name
+        and CPF the result row is matched on, so a name search is never served
+        to a caller looking for another person with the same name.
+        """
+        search_by, value, identity, filters, window = PersonSearchService.query_key(query)
+        if identity is None or not all(identity):
+            raise ValueError("A cached search needs both name and CPF")
+        return json.dumps([search_by, value, *identity, filters, window])
+
+    def heat(self, rank: float, now: Optional[float] = None) -> float:
+        """Decayed request count at `now` of a stored rank."""
+        return 2 ** (rank - (time.time() if now is None else now) / self.half_life)
+
+    def touch(self, query: Dict[str, Any], now: Optional[float] = None) -> str:
+        """
+        Count one request of `query` and return its key.
+
+        The rank is log2 of the decayed count plus now / half_life, so decay
+        never has to be applied to stored rows and ordering by rank is ordering
+        by current heat.
+        """
+        now = time.time() if now is None else now
+        key = self.key(query)
+        with self._lock, self._conn:
+            row = self._conn.execute('SELECT rank FROM search_cache WHERE key = ?', (key,)).fetchone()
+            heat = (self.heat(row[0], now) if row else 0.0) + 1
+            rank = math.log2(heat) + now / self.half_life
+            self._conn.execute(
+                'INSERT INTO search_cache (key, query, rank, requests) VALUES (?, ?, ?, 1) '
+                'ON CONFLICT(key) DO UPDATE SET rank = excluded.rank, requests = requests + 1',
+                (key, json.dumps(to_json(query), ensure_ascii=False), rank),
+            )
+        return key
+
+    def get(self, query: Dict[str, Any], now: Optional[float] = None) -> Optional[str]:
+        """The unexpired result of `query`, or None."""
+        now = time.time() if now is None else now
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT result FROM search_cache WHERE key = ? AND result IS NOT NULL AND expires_at > ?',
+                (self.key(query), now),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return row[0]
+
+    def lookup(self, query: Dict[str, Any]) -> Optional[str]:
+        """Count one request of `query` and return its unexpired result, or None."""
+        self.touch(query)
+        cached = self.get(query)
+        if cached is not None:
+            search_by = query.get('search_by', 'cpf')
+            logger.info("Serving warm result for a %s search", search_by, extra={'search_by': search_by})
+        return cached
+
+    def put(self, query: Dict[str, Any], result: str, now: Optional[float] = None) -> None:
+        """
+        Store the fresh result of `query`, served until `ttl` seconds from now.
+
+        An empty result ('[]', person not found) is not stored, since the person
+        may appear on the portal before the result would expire.
+        """
+        if result == '[]':
+            return
+        now = time.time() if now is None else now
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT INTO search_cache (key, query, result, scraped_at, expires_at) VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT(key) DO UPDATE SET result = excluded.result, scraped_at = excluded.scraped_at, '
+                'expires_at = excluded.expires_at',
+                (self.key(query), json.dumps(to_json(query), ensure_ascii=False), result, now, now + self.ttl),
+            )
+
+    def hottest(self, limit: int, horizon: float = SEARCH_CACHE_WARM_HORIZON, min_heat: float = 0.5,
+                now: Optional[float] = None) -> List[Tuple[Dict[str, Any], float]]:
+        """
+        The hottest queries whose result is missing or expires within `horizon` seconds.
+
+        Returns up to `limit` (query, heat) pairs, hottest first; keys whose
+        heat decayed below `min_heat` (by default, a single request older than
+        one half-life) are left to expire.
+        """
+        now = time.time() if now is None else now
+        min_rank = math.log2(min_heat) + now / self.half_life
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT query, rank FROM search_cache WHERE rank >= ? '
+                'AND (expires_at IS NULL OR expires_at <= ?) ORDER BY rank DESC LIMIT ?',
+                (min_rank, now + horizon, limit),
+            ).fetchall()
+        return [(from_json(json.loads(query)), self.heat(rank, now)) for query, rank in rows]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hits, misses and the number of keys and warm results."""
+        now = time.time()
+        with self._lock:
+            keys, warm = self._conn.execute(
+                'SELECT COUNT(*), COUNT(CASE WHEN expires_at > ? THEN 1 END) FROM search_cache', (now,)
+            ).fetchone()
+        total = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': round(self.hits / total, 3) if total else 0.0,
+                'keys': keys, 'warm': warm}
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class CacheWarmer:
+    """
+    Re-run the hottest searches near expiry during off-peak hours.
+
+    Parameters
+    ----------
+    cache : SearchCache
+        Cache whose hottest keys are warmed; must be the `search_cache` of the
+        scheduler's portals, which store the fresh results.
+    scheduler : SearchScheduler
+        Scheduler the warming searches are queued on, in its lowest lane.
+    sessions : int, optional
+        Warming searches queued at once, so warming holds at most this many grid
+        sessions (default is 2).
+    max_searches : int, optional
+        Searches per warming run (default is 50).
+    horizon : float, optional
+        Results expiring within this many seconds are refreshed
+        (default is `SEARCH_CACHE_WARM_HORIZON`).
+    off_peak : tuple of int, optional
+        Start and end hour of the off-peak window, which may wrap midnight
+        (default is (20, 7)).
+    interval : float, optional
+        Seconds between checks of the background thread (default is 300).
+    """
+    CLIENT = 'cache-warmer'
+
+    def __init__(self, cache: SearchCache, scheduler: Any, sessions: int = 2, max_searches: int = 50,
+                 horizon: float = SEARCH_CACHE_WARM_HORIZON, off_peak: Tuple[int, int] = (20, 7),
+                 interval: float = 300.0) -> None:
+        """Initialize the warmer."""
+        if scheduler.portal_options.get('search_cache') is not cache:
+            raise ValueError("The scheduler's portals must use the warmed search_cache")
+        if sessions < 1:
+            raise ValueError("sessions must be at least 1")
+        if not all(0 <= hour < 24 for hour in off_peak):
+            raise ValueError("off_peak hours must be in [0, 24)")
+        self.cache = cache
+        self.scheduler = scheduler
+        self.sessions = sessions
+        self.max_searches = max_searches
+        self.horizon = horizon
+        self.off_peak = off_peak
+        self.interval = interval
+        self.warmed = 0
+        self.failed = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def is_off_peak(self, now: Optional[datetime] = None) -> bool:
+        start, end = self.off_peak
+        hour = (now or datetime.now()).hour
+        return start <= hour < end if start <= end else hour >= start or hour < end
+
+    def run_once(self, now: Optional[datetime] = None) -> int:
+        """Warm the hottest keys near expiry if off-peak; returns how many were refreshed."""
+        if not self.is_off_peak(now):
+            return 0
+        candidates = self.cache.hottest(self.max_searches, self.horizon)
+        if not candidates:
+            return 0
+        logger.info("Warming %s search(es), hottest at %.1f request(s)", len(candidates), candidates[0][1])
+        futures: List[Future] = []
+        pending: Set[Future] = set()
+        for query, _ in candidates:
+            if len(pending) >= self.sessions:
+                pending = wait(pending, return_when=FIRST_COMPLETED).not_done
+            future = self.scheduler.search(self.CLIENT, lane=self.scheduler.lanes[-1], refresh=True,
+                                           **search_options(query))
+            futures.append(future)
+            pending.add(future)
+        wait(pending)
+        warmed = sum(1 for future in futures if future.exception() is None)
+        self.warmed += warmed
+        self.failed += len(futures) - warmed
+        logger.info("Warmed %s of %s search(es); cache: %s", warmed, len(futures), self.cache.stats())
+        return warmed
+
+    def start(self) -> None:
+        """Warm in the background, checking every `interval` seconds."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='cache-warmer', daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.warning("Cache warming failed: %s", e)
+            self._stop.wait(self.interval)
+
+    def stop(self) -> None:
+        """Stop the background thread after the current run."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,292 @@
+"""
+Priority lanes and per-client fair share over a fixed set of browser sessions.
+
+Work is queued per lane and client. A free session always serves the highest
+lane with runnable work; within a lane, the client with the fewest running
+jobs (then the one served least recently) goes first, so one client's large
+batch cannot starve the others. Sessions reserved for the top lane stay idle
+until it needs them, so an interactive lookup does not wait for a batch search
+to finish.
+"""
+
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from src.rpa.modules.transparency_portal.core import TransparencyPortal
+from src.rpa.modules.transparency_portal.person_search_service.batch_input import search_query
+from src.rpa.modules.transparency_portal.person_search_service.core import PersonSearchService
+from src.rpa.utils.adaptive_timeout import StepLatency
+from src.rpa.utils.driver_session import DriverSession
+from src.rpa.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+LANES = ('interactive', 'batch')
+
+
+@dataclass
+class ScheduledJob:
+    """A queued call and the future that receives its result."""
+    fn: Callable[..., Any]
+    args: Tuple[Any, ...]
+    kwargs: Dict[str, Any]
+    client: str
+    lane: str
+    future: Future = field(default_factory=Future)
+    submitted: float = field(default_factory=time.perf_counter)
+
+
+class LaneStats:
+    """Queue waits and outcomes of one lane."""
+    __slots__ = ('waits', 'submitted', 'started', 'failed')
+
+    def __init__(self, window: int) -> None:
+        self.waits = StepLatency(window)
+        self.submitted = 0
+        self.started = 0
+        self.failed = 0
+
+
+class SearchScheduler:
+    """
+    Run searches on a pool of browser sessions with priority lanes and fair share.
+
+    Parameters
+    ----------
+    sessions : sequence of DriverSession
+        Sessions to run work on; each is served by its own worker thread. Give them a
+        shared `browser_state` (`get_cache.portal_state_service()`) so every new or
+        recycled driver starts with the portal snapshot.
+    lanes : sequence of str, optional
+        Lane names, highest priority first (default is `LANES`). Work submitted
+        without a lane goes to the lowest one, so it never takes reserved sessions.
+    reserved : int, optional
+        Sessions that only the top lane may use; capped so at least one session
+        serves the other lanes (default is 1).
+    client_limit : int, optional
+        Concurrent sessions any one client may hold (default is None, no limit).
+    client_limits : dict, optional
+        Per-client overrides of `client_limit` (default is None).
+    window : int, optional
+        Recent queue waits kept per lane for percentiles (default is 500).
+    **portal_options
+        Keyword arguments of the `TransparencyPortal` used by `search()`.
+
+    Examples
+    --------
+    >>> state = portal_state_service()
+    >>> state.start()
+    >>> sessions = [DriverSession(profile='lightweight', browser_state=state) for _ in range(4)]
+    >>> with SearchScheduler(sessions, client_limit=2) as scheduler:
+    ...     nightly = [scheduler.search('etl', lane='batch', **query) for query in queries]
+    ...     result = scheduler.search('desk', lane='interactive', name="Alen Silva", cpf="12345678901").result()
+    """
+
+    def __init__(self, sessions: Sequence[DriverSession], lanes: Sequence[str] = LANES, reserved: int = 1,
+                 client_limit: Optional[int] = None, client_limits: Optional[Dict[str, int]] = None,
+                 window: int = 500, **portal_options: Any) -> None:
+        """Initialize the queues; workers start with `start()` or on entering the context."""
+        if not sessions:
+            raise ValueError("SearchScheduler needs at least one session")
+        if not lanes or len(set(lanes)) != len(lanes):
+            raise ValueError("Lanes must be unique and non-empty")
+        if client_limit is not None and client_limit < 1:
+            raise ValueError("client_limit must be at least 1")
+        self.sessions = list(sessions)
+        self.lanes = tuple(lanes)
+        self.reserved = max(0, min(reserved, len(self.sessions) - 1))
+        self.client_limit = client_limit
+        self.client_limits = dict(client_limits or {})
+        self.portal_options = portal_options
+        self._queues: Dict[str, 'OrderedDict[str, Deque[ScheduledJob]]'] = {lane: OrderedDict() for lane in lanes}
+        self._lane_stats = {lane: LaneStats(window) for lane in lanes}
+        self._running: Dict[str, int] = {}
+        self._last_served: Dict[str, float] = {}
+        self._idle = 0
+        self._closed = False
+        self._changed = threading.Condition()
+        self._workers: List[threading.Thread] = []
+
+    def __enter__(self) -> 'SearchScheduler':
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def start(self) -> None:
+        """Start one worker thread per session."""
+        if self._workers:
+            return
+        for index, session in enumerate(self.sessions):
+            worker = threading.Thread(target=self._work, args=(index, session),
+                                      name=f"scheduler-{index}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def limit(self, client: str) -> Optional[int]:
+        return self.client_limits.get(client, self.client_limit)
+
+    def submit(self, fn: Callable[..., Any], *args: Any, client: str = 'default', lane: Optional[str] = None,
+               **kwargs: Any) -> Future:
+        """
+        Queue `fn(driver, *args, **kwargs)` for `client` on `lane` (default: lowest lane).
+
+        Returns a future; cancelling it before a session picks it up drops the job.
+        """
+        lane = self.lanes[-1] if lane is None else lane
+        if lane not in self._queues:
+            raise ValueError(f"Invalid lane '{lane}'. Use: {', '.join(self.lanes)}")
+        job = ScheduledJob(fn, args, kwargs, client, lane)
+        with self._changed:
+            if self._closed:
+                raise RuntimeError("Scheduler is closed")
+            self._queues[lane].setdefault(client, deque()).append(job)
+            self._lane_stats[lane].submitted += 1
+            self._changed.notify_all()
+        return job.future
+
+    def search(self, client: str, lane: Optional[str] = None, refresh: bool = False, **query: Any) -> Future:
+        """
+        Queue a person search (keyword arguments of `person_search_service`) for `client`.
+
+        Each session keeps one `TransparencyPortal`, so searches after the first
+        skip the home page; lane defaults to the lowest lane, as in `submit`.
+
+        With the portals' `search_cache`, the request is counted here and an
+        unexpired result is returned as an already completed future, without
+        waiting for a session; `refresh` always queues a scrape.
+        """
+        cache = None if self.portal_options.get('delta') else self.portal_options.get('search_cache')
+        if cache is not None and not refresh:
+            future: Future = Future()
+            try:
+                PersonSearchService.check_input(query.get('name'), query.get('cpf'), query.get('nis'))
+                cached = cache.lookup(search_query(**query))
+            except (TypeError, ValueError) as e:
+                future.set_exception(e)
+                return future
+            if cached is not None:
+                future.set_result(cached)
+                return future
+            refresh = True  # counted above; the portal scrapes and stores the result without counting again
+        return self.submit(self._search, client=client, lane=lane, refresh=refresh, **query)
+
+    def _search(self, driver: WebDriver, **query: Any) -> str:
+        return self._portal(driver).person_search_service(**query)
+
+    def _portal(self, driver: WebDriver) -> Any:
+        """The portal orchestrator of `driver`; a recycled session is a new driver and gets a new one."""
+        portal = getattr(driver, 'transparency_portal', None)
+        if portal is None:
+            portal = driver.transparency_portal = TransparencyPortal(driver, **self.portal_options)
+        return portal
+
+    def _pick(self) -> Optional[ScheduledJob]:
+        """Dequeue the next job a free session may run. Caller holds the lock."""
+        for rank, lane in enumerate(self.lanes):
+            if rank > 0 and self._idle <= self.reserved:
+                return None
+            clients = self._queues[lane]
+            runnable = [
+                client for client in clients
+                if self.limit(client) is None or self._running.get(client, 0) < self.limit(client)
+            ]
+            if not runnable:
+                continue
+            client = min(runnable, key=lambda c: (self._running.get(c, 0), self._last_served.get(c, 0.0)))
+            queue = clients[client]
+            job = queue.popleft()
+            if not queue:
+                del clients[client]
+            return job
+        return None
+
+    def _next(self) -> Optional[ScheduledJob]:
+        """Block until there is a job for this worker, or None once closed and drained."""
+        with self._changed:
+            self._idle += 1
+            try:
+                while True:
+                    job = self._pick()
+                    if job is not None:
+                        if not job.future.set_running_or_notify_cancel():
+                            continue
+                        self._running[job.client] = self._running.get(job.client, 0) + 1
+                        self._last_served[job.client] = time.monotonic()
+                        return job
+                    if self._closed and not any(self._queues.values()):
+                        return None
+                    self._changed.wait()
+            finally:
+                self._idle -= 1
+
+    def _work(self, index: int, session: DriverSession) -> None:
+        while (job := self._next()) is not None:
+            wait = time.perf_counter() - job.submitted
+            stats = self._lane_stats[job.lane]
+            with self._changed:
+                stats.waits.samples.append(wait)
+                stats.started += 1
+            logger.debug("Session %s runs %s job of '%s' after %.2fs in queue", index, job.lane, job.client, wait,
+                         extra={'lane': job.lane, 'client': job.client, 'queue_wait': round(wait, 3)})
+            try:
+                with session.job() as driver:
+                    result = job.fn(driver, *job.args, **job.kwargs)
+            except BaseException as e:
+                with self._changed:
+                    stats.failed += 1
+                job.future.set_exception(e)
+            else:
+                job.future.set_result(result)
+            finally:
+                with self._changed:
+                    self._running[job.client] -= 1
+                    self._changed.notify_all()
+        session.close()
+
+    def close(self, cancel: bool = False) -> None:
+        """
+        Stop accepting work, wait for the workers, close the sessions and flush the result store.
+
+        `cancel` drops queued jobs.
+        """
+        with self._changed:
+            self._closed = True
+            if cancel:
+                for clients in self._queues.values():
+                    for queue in clients.values():
+                        for job in queue:
+                            job.future.cancel()
+                    clients.clear()
+            self._changed.notify_all()
+        for worker in self._workers:
+            worker.join()
+        self._workers = []
+        if self.portal_options.get('result_store') is not None:
+            self.portal_options['result_store'].flush()
+        for lane, stats in self.stats()['lanes'].items():
+            logger.info("Lane %s: %s", lane, stats, extra={'lane': lane, **stats})
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth and p50/p95/max queue wait per lane, and running jobs per client."""
+        with self._changed:
+            lanes = {
+                lane: {
+                    'queued': sum(len(queue) for queue in self._queues[lane].values()),
+                    'submitted': stats.submitted,
+                    'started': stats.started,
+                    'failed': stats.failed,
+                    'wait_p50_s': round(stats.waits.percentile(0.5) or 0.0, 3),
+                    'wait_p95_s': round(stats.waits.percentile(0.95) or 0.0, 3),
+                    'wait_max_s': round(max(stats.waits.samples, default=0.0), 3),
+                }
+                for lane, stats in self._lane_stats.items()
+            }
+            return {'lanes': lanes, 'running': {c: n for c, n in self._running.items() if n}}
@@ -1,8 +1,20 @@
 import os
 
-USER_DATA_PATH = os.path.join(
-    os.getenv('LOCALAPPDATA'), 'Google', 'Chrome', 'User Data', 'Default'
-)
+
+def user_data_path() -> str:
+    """Chrome's default profile directory, resolved from LOCALAPPDATA when first needed."""
+    local_app_data = os.getenv('LOCALAPPDATA')
+    if not local_app_data:
+        raise RuntimeError("LOCALAPPDATA is not set; cannot locate the Chrome user data directory")
+    return os.path.join(local_app_data, 'Google', 'Chrome', 'User Data', 'Default')
+
+
+def __getattr__(name: str) -> str:
+    """Resolve USER_DATA_PATH on access, so importing constants does not read the environment."""
+    if name == 'USER_DATA_PATH':
+        return user_data_path()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 RPA_BASE_DIR = os.path.abspath(
     os.path.join(os.path.dirname(__file__), '..')
@@ -14,6 +26,44 @@ COOKIE_PATH = os.path.join(CACHE_DIR, 'cookies.json')
 
 LOCAL_STORAGE_PATH = os.path.join(CACHE_DIR, 'local_storage.json')
 
-ERROR_PATH = os.path.join(RPA_BASE_DIR, 'log', 'error.txt')
+ERROR_PATH = os.path.join(RPA_BASE_DIR, 'logs', 'error.txt')
 
 SCREENSHOT_ERROR_PATH = os.path.join(RPA_BASE_DIR, 'logs', 'error.png')
+
+EXTRATO_BUFFER_MAX_ROWS = 5000
+
+RESULT_STORE_PATH = os.path.join(CACHE_DIR, 'results.db')
+
+ARCHIVE_DIR = os.path.join(CACHE_DIR, 'archive')
+
+ARCHIVE_MAX_BYTES = 512 * 1024 * 1024
+
+ARCHIVE_MAX_AGE = 30 * 24 * 60 * 60
+
+DRIVER_MAX_JOBS = 50
+
+DRIVER_MAX_HEAP_MB = 512
+
+DRIVER_MAX_DOCUMENTS = 25
+
+RECORDINGS_DIR = os.path.join(CACHE_DIR, 'recordings')
+
+BROWSER_STATE_DIR = os.path.join(CACHE_DIR, 'browser_state')
+
+BROWSER_STATE_MAX_AGE = 6 * 60 * 60
+
+BROWSER_STATE_REFRESH_MARGIN = 15 * 60
+
+BROWSER_STATE_KEEP = 3
+
+SEARCH_CACHE_PATH = os.path.join(CACHE_DIR, 'search_cache.db')
+
+SEARCH_CACHE_TTL = 24 * 60 * 60
+
+SEARCH_CACHE_HALF_LIFE = 7 * 24 * 60 * 60
+
+SEARCH_CACHE_WARM_HORIZON = 16 * 60 * 60
+
+BROWSER_STATE_MIN_COOKIE_LIFETIME = 60 * 60
+
+BROWSER_STATE_MIN_REFRESH_INTERVAL = 10 * 60
@@ -0,0 +1,196 @@
+"""
+Adaptive wait timeouts learned from observed step latencies.
+
+Every wait is recorded per step and selector; once enough samples exist, the
+timeout of that wait is derived from a recent high percentile instead of the
+fixed configured value, shorter than it on a fast portal and longer (up to a
+ceiling) on a slow one. Optional elements (cookie prompt, tutorial, next page)
+are probed briefly and fail fast when they are not coming.
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.remote.webdriver import WebDriver
+from selenium.webdriver.support.ui import WebDriverWait
+
+from src.rpa.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class StepLatency:
+    """Recent wait latencies and misses of one step."""
+    __slots__ = ('samples', 'hits', 'misses', 'missed_last', 'last_timeout')
+
+    def __init__(self, window: int) -> None:
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.hits = 0
+        self.misses = 0
+        self.missed_last = False
+        self.last_timeout: Optional[float] = None
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Nearest-rank percentile of the recent samples, or None without samples."""
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+
+class LatencyTracker:
+    """
+    Record wait latencies per step and derive timeouts from them.
+
+    Parameters
+    ----------
+    window : int, optional
+        Number of recent samples kept per step (default is 50).
+    percentile : float, optional
+        Percentile of recent latencies the timeout is based on (default is 0.95).
+    multiplier : float, optional
+        Headroom applied to the percentile (default is 2.0).
+    min_samples : int, optional
+        Samples needed before the configured timeout is replaced (default is 5).
+    floor, ceiling : float, optional
+        Bounds of learned timeouts in seconds (defaults are 2.0 and 60.0); a
+        learned timeout may exceed the caller's configured one up to `ceiling`.
+    probe : float, optional
+        Wait in seconds for optional elements never seen before (default is 1.5).
+    """
+
+    def __init__(self, window: int = 50, percentile: float = 0.95, multiplier: float = 2.0,
+                 min_samples: int = 5, floor: float = 2.0, ceiling: float = 60.0, probe: float = 1.5) -> None:
+        """Initialize an empty tracker."""
+        if not 0 < percentile <= 1:
+            raise ValueError("percentile must be in (0, 1]")
+        if floor <= 0 or ceiling < floor:
+            raise ValueError("Timeout bounds must satisfy 0 < floor <= ceiling")
+        self.window = window
+        self.percentile = percentile
+        self.multiplier = multiplier
+        self.min_samples = min_samples
+        self.floor = floor
+        self.ceiling = ceiling
+        self.probe = probe
+        self._steps: Dict[str, StepLatency] = {}
+        self._lock = threading.Lock()
+
+    def _step(self, key: str) -> StepLatency:
+        step = self._steps.get(key)
+        if step is None:
+            step = self._steps.setdefault(key, StepLatency(self.window))
+        return step
+
+    def record(self, key: str, seconds: float, found: bool = True, optional: bool = False) -> None:
+        """
+        Record one wait.
+
+        Only found elements are latency samples. A timed-out wait is counted as a
+        miss: many steps wait for elements that are legitimately absent (no
+        location, no results), and feeding their full wait back would escalate
+        every later timeout of the step.
+        """
+        with self._lock:
+            step = self._step(key)
+            step.missed_last = not found
+            if found:
+                step.hits += 1
+                step.samples.append(seconds)
+            else:
+                step.misses += 1
+
+    def quantile(self, key: str, q: float, min_samples: Optional[int] = None) -> Optional[float]:
+        """Recent latency percentile of a step, or None with fewer than `min_samples` samples."""
+        with self._lock:
+            step = self._steps.get(key)
+            if step is None or len(step.samples) < (self.min_samples if min_samples is None else min_samples):
+                return None
+            return step.percentile(q)
+
+    def timeout(self, key: str, default: float) -> float:
+        """
+        Timeout for a required step: learned once enough samples exist, else `default`.
+
+        The learned value follows the recent percentile of successful waits,
+        slow ones included, within `[floor, ceiling]`: it shrinks below
+        `default` on a fast portal and grows past it on a slow one. Right after
+        a miss at least `default` is used, so a portal that became slower than
+        the learned timeout gets its real latency sampled instead of missing
+        repeatedly.
+        """
+        with self._lock:
+            step = self._steps.get(key)
+            if step is None or len(step.samples) < self.min_samples:
+                return default
+            learned = min(self.ceiling, max(self.floor, step.percentile(self.percentile) * self.multiplier))
+            return max(default, learned) if step.missed_last else learned
+
+    def probe_timeout(self, key: str, default: float) -> float:
+        """
+        Short timeout for an optional step.
+
+        Until the element has been seen the probe is used; afterwards the learned
+        latency of its appearances, never more than `default`.
+        """
+        with self._lock:
+            step = self._steps.get(key)
+            seen = step is not None and step.hits > 0
+            learned = step.percentile(self.percentile) * self.multiplier if seen else 0.0
+        return min(default, max(self.probe, learned))
+
+    def wait(self, web_bot: WebDriver, key: str, condition: Callable[[WebDriver], Any],
+             default: float = 10, optional: bool = False) -> Any:
+        """
+        Run `WebDriverWait(...).until(condition)` with the adaptive timeout of `key`.
+
+        Raises TimeoutException like the plain wait; the timeout used is logged
+        with the step and kept in `stats()`.
+        """
+        timeout = self.probe_timeout(key, default) if optional else self.timeout(key, default)
+        with self._lock:
+            self._step(key).last_timeout = timeout
+        started = time.perf_counter()
+        try:
+            result = WebDriverWait(web_bot, timeout).until(condition)
+        except TimeoutException:
+            elapsed = time.perf_counter() - started
+            self.record(key, elapsed, found=False, optional=optional)
+            logger.debug("Step %s not ready after %.1fs", key, timeout,
+                         extra={'step': key, 'timeout': round(timeout, 2), 'optional': optional})
+            raise
+        elapsed = time.perf_counter() - started
+        self.record(key, elapsed, optional=optional)
+        logger.debug("Step %s ready in %.2fs (timeout %.1fs)", key, elapsed, timeout,
+                     extra={'step': key, 'timeout': round(timeout, 2), 'elapsed': round(elapsed, 3)})
+        return result
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return samples, hits, misses, p50/p95 latency and last timeout used per step."""
+        with self._lock:
+            return {
+                key: {
+                    'samples': len(step.samples),
+                    'hits': step.hits,
+                    'misses': step.misses,
+                    'p50_s': round(step.percentile(0.5) or 0.0, 3),
+                    'p95_s': round(step.percentile(0.95) or 0.0, 3),
+                    'timeout_s': None if step.last_timeout is None else round(step.last_timeout, 2),
+                }
+                for key, step in self._steps.items()
+            }
+
+
+latency_tracker = LatencyTracker()
+
+
+def wait_for(web_bot: WebDriver, step: str, locator: Any, condition: Callable[[Any], Callable],
+             default: float = 10, optional: bool = False,
+             tracker: Optional[LatencyTracker] = None) -> Any:
+    """Wait for `condition(locator)` on the shared tracker, keyed by step name and locator."""
+    tracker = tracker or latency_tracker
+    return tracker.wait(web_bot, f"{step} {locator[-1]}", condition(locator), default, optional)
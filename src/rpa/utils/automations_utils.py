@@ -1,5 +1,17 @@
 import os
 import re
+from typing import Iterable, List
+
+from src.rpa.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+NON_DIGIT = re.compile(r'\D')
+NON_DIGIT_LINE = re.compile(r'[^\d\n]')
+NON_WORD = re.compile(r'[^\w\s]')
+SPACES = re.compile(r'\s+')
+INLINE_SPACES = re.compile(r'[^\S\n]+')
+LINE_EDGES = re.compile(r' ?\n ?')
 
 
 def clear_cache(path) -> None:
@@ -8,17 +20,14 @@ def clear_cache(path) -> None:
         if filename.endswith(extension):
             file_path = os.path.join(path, filename)
             os.remove(file_path)
-            print(f'File {filename} has been deleted.')
+            logger.debug('File %s has been deleted.', filename)
 
 
 def normalize_number(number: str) -> str:
     """
     Normalize a numeric string by removing extra spaces and non-numeric characters.
     """
-    number = re.sub(r'\D', '', number)
-    number = re.sub(r'\s+', ' ', number.strip())
-
-    return number
+    return NON_DIGIT.sub('', number)
 
 
 def normalize_name(name: str) -> str:
@@ -26,7 +35,51 @@ def normalize_name(name: str) -> str:
     Normalize a name string by removing extra spaces, converting to uppercase,
     and removing special characters.
     """
-    name = re.sub(r'[^\w\s]', '', name)
-    name = re.sub(r'\s+', ' ', name.strip())
+    name = NON_WORD.sub('', name)
+    name = SPACES.sub(' ', name.strip())
 
     return name.upper()
+
+
+def normalize_numbers(numbers: Iterable[str]) -> List[str]:
+    """
+    Normalize many numeric strings at once, as `normalize_number` does one.
+
+    The values are joined into one text so each pattern runs once over the
+    whole column instead of once per value.
+    """
+    numbers = list(numbers)
+    if any('\n' in number for number in numbers):
+        return [normalize_number(number) for number in numbers]
+    return NON_DIGIT_LINE.sub('', '\n'.join(numbers)).split('\n') if numbers else []
+
+
+def normalize_names(names: Iterable[str]) -> List[str]:
+    """
+    Normalize many names at once, as `normalize_name` does one.
+
+    The values are joined into one text so each pattern runs once over the
+    whole column instead of once per value.
+    """
+    names = list(names)
+    if any('\n' in name for name in names):
+        return [normalize_name(name) for name in names]
+    if not names:
+        return []
+    text = INLINE_SPACES.sub(' ', NON_WORD.sub('', '\n'.join(names)))
+    return LINE_EDGES.sub('\n', text).strip(' ').upper().split('\n')
+
+
+def is_valid_cpf(cpf: str) -> bool:
+    """
+    Check that a normalized CPF has 11 digits, is not a repeated digit and has
+    correct check digits.
+    """
+    if len(cpf) != 11 or not cpf.isdigit() or cpf == cpf[0] * 11:
+        return False
+    digits = [int(d) for d in cpf]
+    for position in (9, 10):
+        total = sum(digit * weight for digit, weight in zip(digits[:position], range(position + 1, 1, -1)))
+        if digits[position] != total * 10 % 11 % 10:
+            return False
+    return True
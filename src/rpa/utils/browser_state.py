@@ -0,0 +1,356 @@
+"""
+Versioned snapshots of a site's browser state (cookies and localStorage).
+
+A snapshot is captured once on a dedicated session, stored as a numbered JSON
+file and injected into every new session in bulk: one `Network.setCookies`
+call for the cookies and one script registered with
+`Page.addScriptToEvaluateOnNewDocument` that fills localStorage before the
+site's own scripts run, so sessions start already known to the site. A
+background thread captures a new version shortly before the current one
+expires.
+"""
+
+import glob
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from src.rpa.utils.CONSTANTS import (
+    BROWSER_STATE_DIR, BROWSER_STATE_KEEP, BROWSER_STATE_MAX_AGE, BROWSER_STATE_MIN_COOKIE_LIFETIME,
+    BROWSER_STATE_MIN_REFRESH_INTERVAL, BROWSER_STATE_REFRESH_MARGIN,
+)
+from src.rpa.utils.web_driver_config import execute_cdp, web_driver
+from src.rpa.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+SAME_SITE = {'strict': 'Strict', 'lax': 'Lax', 'none': 'None'}
+
+SEED_SCRIPT = """
+(function (origin, items) {
+    if (window.location.origin !== origin) { return; }
+    for (var key in items) {
+        if (window.localStorage.getItem(key) === null) { window.localStorage.setItem(key, items[key]); }
+    }
+})(%s, %s);
+"""
+
+
+class BrowserState:
+    """
+    One captured version of the browser state of a site.
+
+    Parameters
+    ----------
+    url : str
+        Page the state was captured on; localStorage is only seeded on its origin.
+    cookies : list of dict
+        Cookies as returned by `WebDriver.get_cookies()`.
+    local_storage : dict
+        localStorage items of the page's origin.
+    version : int, optional
+        Snapshot version, increasing with every capture (default is 0).
+    captured_at : float, optional
+        Capture time as a Unix timestamp (default is now).
+    expires_at : float, optional
+        Time after which the snapshot is no longer injected (default is the
+        earliest expiry of the cookies living at least `BROWSER_STATE_MIN_COOKIE_LIFETIME`
+        past capture, at most `BROWSER_STATE_MAX_AGE` after capture). Shorter-lived
+        cookies (analytics, request tokens) do not bound the snapshot; they are
+        simply left out of injection once expired.
+    """
+    __slots__ = ('url', 'cookies', 'local_storage', 'version', 'captured_at', 'expires_at')
+
+    def __init__(self, url: str, cookies: List[Dict[str, Any]], local_storage: Dict[str, str],
+                 version: int = 0, captured_at: Optional[float] = None, expires_at: Optional[float] = None) -> None:
+        self.url = url
+        self.cookies = cookies
+        self.local_storage = local_storage
+        self.version = version
+        self.captured_at = time.time() if captured_at is None else captured_at
+        if expires_at is None:
+            lasting = self.captured_at + BROWSER_STATE_MIN_COOKIE_LIFETIME
+            expiries = [c['expiry'] for c in cookies if c.get('expiry', 0) >= lasting]
+            expires_at = min(expiries + [self.captured_at + BROWSER_STATE_MAX_AGE])
+        self.expires_at = expires_at
+
+    @property
+    def origin(self) -> str:
+        parts = urlsplit(self.url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    def expired(self, now: Optional[float] = None) -> bool:
+        return (time.time() if now is None else now) >= self.expires_at
+
+    def cdp_cookies(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Unexpired cookies in the format of `Network.setCookies`."""
+        now = time.time() if now is None else now
+        cookies = []
+        for cookie in self.cookies:
+            if cookie.get('expiry') is not None and cookie['expiry'] <= now:
+                continue
+            param = {
+                'name': cookie['name'],
+                'value': cookie['value'],
+                'domain': cookie.get('domain') or urlsplit(self.url).hostname,
+                'path': cookie.get('path', '/'),
+                'secure': cookie.get('secure', False),
+                'httpOnly': cookie.get('httpOnly', False),
+            }
+            if cookie.get('expiry') is not None:
+                param['expires'] = cookie['expiry']
+            if str(cookie.get('sameSite', '')).lower() in SAME_SITE:
+                param['sameSite'] = SAME_SITE[cookie['sameSite'].lower()]
+            cookies.append(param)
+        return cookies
+
+    def seed_script(self) -> str:
+        """Script that fills the missing localStorage items when a page of the origin loads."""
+        return SEED_SCRIPT % (json.dumps(self.origin), json.dumps(self.local_storage))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'BrowserState':
+        return cls(**{name: data[name] for name in cls.__slots__ if name in data})
+
+
+def capture(driver: WebDriver, url: str, prepare: Optional[Callable[[WebDriver], None]] = None,
+            version: int = 0) -> BrowserState:
+    """Load `url`, run `prepare` (e.g. accept the cookie prompt) and capture the resulting state."""
+    driver.get(url)
+    if prepare is not None:
+        prepare(driver)
+    items = driver.execute_script(
+        "var items = {};"
+        "for (var i = 0; i < localStorage.length; i++) {"
+        "  var key = localStorage.key(i); items[key] = localStorage.getItem(key);"
+        "}"
+        "return items;"
+    ) or {}
+    return BrowserState(url, driver.get_cookies(), items, version=version)
+
+
+def inject(driver: WebDriver, state: BrowserState) -> bool:
+    """
+    Inject `state` into a new session before its first navigation, in bulk through CDP.
+
+    Returns False when the session does not support CDP; `restore()` must then
+    be called once the session is on the site.
+    """
+    try:
+        execute_cdp(driver, 'Network.enable')
+        execute_cdp(driver, 'Network.setCookies', {'cookies': state.cdp_cookies()})
+        if state.local_storage:
+            execute_cdp(driver, 'Page.addScriptToEvaluateOnNewDocument', {'source': state.seed_script()})
+    except (WebDriverException, AttributeError, KeyError) as e:
+        logger.warning("CDP injection of browser state v%s failed: %s", state.version, e)
+        driver.browser_state = state
+        driver.browser_state_injected = False
+        return False
+    driver.browser_state = state
+    driver.browser_state_injected = True
+    logger.debug("Injected browser state v%s: %s cookie(s), %s localStorage item(s)",
+                 state.version, len(state.cookies), len(state.local_storage))
+    return True
+
+
+def restore(driver: WebDriver, state: BrowserState) -> None:
+    """
+    Restore `state` on a session already showing a page of its site, without CDP.
+
+    localStorage is written with a single script; WebDriver has no bulk cookie
+    command, so cookies are added one by one.
+    """
+    if state.local_storage:
+        driver.execute_script(
+            "for (var key in arguments[0]) { localStorage.setItem(key, arguments[0][key]); }",
+            state.local_storage
+        )
+    for cookie in state.cookies:
+        if cookie.get('expiry') is None or cookie['expiry'] > time.time():
+            driver.add_cookie(cookie)
+    driver.browser_state_injected = True
+
+
+class BrowserStateService:
+    """
+    Keep a current browser-state snapshot of a site and inject it into new sessions.
+
+    Parameters
+    ----------
+    url : str
+        Page on which the state is captured.
+    prepare : callable, optional
+        Run on the capture session after loading `url`, e.g. to accept the cookie
+        prompt (default is None).
+    factory : callable, optional
+        Creates the session used for capturing; it is quit afterwards
+        (default is `web_driver`).
+    directory : str, optional
+        Where versioned snapshots are stored (default is `BROWSER_STATE_DIR`).
+    refresh_margin : float, optional
+        Seconds before expiry at which the background thread captures a new
+        version (default is `BROWSER_STATE_REFRESH_MARGIN`).
+    keep : int, optional
+        Snapshot versions kept on disk (default is `BROWSER_STATE_KEEP`).
+    min_interval : float, optional
+        Minimum seconds between background captures, whatever the snapshot's
+        expiry (default is `BROWSER_STATE_MIN_REFRESH_INTERVAL`).
+
+    Examples
+    --------
+    >>> service = BrowserStateService(TransparencyPortalCONSTANTS.Url.TRANSPARENCY_PORTAL)
+    >>> service.start()
+    >>> session = DriverSession(browser_state=service)
+    """
+
+    def __init__(self, url: str, prepare: Optional[Callable[[WebDriver], None]] = None,
+                 factory: Callable[[], WebDriver] = web_driver, directory: str = BROWSER_STATE_DIR,
+                 refresh_margin: float = BROWSER_STATE_REFRESH_MARGIN, keep: int = BROWSER_STATE_KEEP,
+                 min_interval: float = BROWSER_STATE_MIN_REFRESH_INTERVAL) -> None:
+        """Initialize the service with the newest snapshot on disk, if any."""
+        if keep < 1:
+            raise ValueError("keep must be at least 1")
+        self.url = url
+        self.prepare = prepare
+        self.factory = factory
+        self.directory = directory
+        self.refresh_margin = refresh_margin
+        self.keep = keep
+        self.min_interval = min_interval
+        self._state: Optional[BrowserState] = None
+        self._lock = threading.Lock()
+        self._refreshing = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.load()
+
+    def path(self, version: int) -> str:
+        return os.path.join(self.directory, f"v{version:06d}.json")
+
+    def versions(self) -> List[int]:
+        """Versions stored on disk, oldest first."""
+        names = (os.path.basename(path) for path in glob.glob(os.path.join(self.directory, 'v*.json')))
+        return sorted(int(name[1:-5]) for name in names if name[1:-5].isdigit())
+
+    def load(self) -> Optional[BrowserState]:
+        """Load the newest readable snapshot from disk."""
+        for version in reversed(self.versions()):
+            try:
+                with open(self.path(version), encoding='utf-8') as file:
+                    state = BrowserState.from_dict(json.load(file))
+            except (OSError, ValueError, TypeError) as e:
+                logger.warning("Skipping unreadable browser state v%s: %s", version, e)
+                continue
+            with self._lock:
+                self._state = state
+            return state
+        return None
+
+    def save(self, state: BrowserState) -> None:
+        """Write `state` atomically as its version and prune old versions."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(state.version)
+        with open(path + '.tmp', 'w', encoding='utf-8') as file:
+            json.dump(state.to_dict(), file)
+        os.replace(path + '.tmp', path)
+        for version in self.versions()[:-self.keep]:
+            try:
+                os.remove(self.path(version))
+            except OSError:
+                pass
+
+    @property
+    def state(self) -> Optional[BrowserState]:
+        """The current snapshot, or None if none was captured yet."""
+        with self._lock:
+            return self._state
+
+    def refresh(self) -> BrowserState:
+        """Capture a new version on a dedicated session; concurrent calls share one capture."""
+        if not self._refreshing.acquire(blocking=False):
+            with self._refreshing:
+                return self.state
+        try:
+            current = self.state
+            version = max([current.version if current else 0] + self.versions()) + 1
+            driver = self.factory()
+            try:
+                state = capture(driver, self.url, self.prepare, version)
+            finally:
+                driver.quit()
+            self.save(state)
+            with self._lock:
+                self._state = state
+            logger.info("Captured browser state v%s: %s cookie(s), %s localStorage item(s), expires in %.0f min",
+                        state.version, len(state.cookies), len(state.local_storage),
+                        (state.expires_at - time.time()) / 60)
+            return state
+        finally:
+            self._refreshing.release()
+
+    def current(self, refresh: bool = False) -> Optional[BrowserState]:
+        """The snapshot to inject: None when it expired, unless `refresh` captures a new one."""
+        state = self.state
+        if state is not None and not state.expired():
+            return state
+        if refresh:
+            return self.refresh()
+        return None
+
+    def apply(self, driver: WebDriver) -> bool:
+        """Inject the current snapshot into a new session; returns whether one was available."""
+        state = self.current()
+        if state is None:
+            logger.warning("No valid browser state to inject; the session starts unknown to the site")
+            return False
+        inject(driver, state)
+        return True
+
+    def next_refresh(self) -> float:
+        """
+        Seconds until the background thread should capture a new version.
+
+        Never less than `min_interval` after the last capture, so a snapshot that
+        expires sooner than the margin cannot make captures run back to back.
+        """
+        state = self.state
+        if state is None:
+            return 0.0
+        now = time.time()
+        return max(0.0, state.expires_at - self.refresh_margin - now, state.captured_at + self.min_interval - now)
+
+    def start(self) -> None:
+        """Start refreshing in the background before each snapshot expires."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='browser-state-refresh', daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        retry = 30.0
+        while not self._stop.wait(self.next_refresh()):
+            try:
+                self.refresh()
+                retry = 30.0
+            except Exception as e:
+                logger.warning("Browser state refresh failed, retrying in %.0fs: %s", retry, e)
+                if self._stop.wait(retry):
+                    return
+                retry = min(retry * 2, 600.0)
+
+    def stop(self) -> None:
+        """Stop the background refresh."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,227 @@
+"""
+Circuit breaker shared by every session talking to the portal.
+
+Consecutive failures of guarded steps (portal start-up and navigation) open
+the circuit; while it is open, guarded steps fail at once with
+`CircuitOpenError` instead of spending their retries and wait timeouts, or
+wait for the circuit to recover when asked to. After a cool-down, a single
+half-open probe is let through: its success closes the circuit, its failure
+opens it again with a longer cool-down.
+"""
+
+import contextlib
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple, Type
+
+from selenium.common.exceptions import WebDriverException
+
+from src.rpa.utils.web_driver_config import is_session_error
+from src.rpa.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of running a guarded step while the circuit is open."""
+
+    def __init__(self, name: str, retry_after: float) -> None:
+        super().__init__(f"Circuit '{name}' is open; retry in {retry_after:.0f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Fail fast while a dependency is down, probing it before resuming.
+
+    Parameters
+    ----------
+    name : str
+        Name used in logs and errors.
+    failure_threshold : int, optional
+        Consecutive failures that open the circuit (default is 5).
+    reset_timeout : float, optional
+        Seconds the circuit stays open before a probe is allowed (default is 30.0).
+    max_reset_timeout : float, optional
+        Upper bound of the cool-down, which doubles after every failed probe
+        (default is 300.0).
+    failure_types : tuple of exception types, optional
+        Exceptions that count as failures; others pass through without
+        affecting the circuit (default is `(Exception,)`).
+    ignore : callable, optional
+        Predicate for `failure_types` exceptions that say nothing about the
+        dependency (e.g. the caller's browser session died) and pass through
+        like other exceptions (default is None).
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 max_reset_timeout: float = 300.0,
+                 failure_types: Tuple[Type[BaseException], ...] = (Exception,),
+                 ignore: Optional[Callable[[BaseException], bool]] = None) -> None:
+        """Initialize a closed circuit."""
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold must be at least 1")
+        if reset_timeout <= 0 or max_reset_timeout < reset_timeout:
+            raise ValueError("Cool-downs must satisfy 0 < reset_timeout <= max_reset_timeout")
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.failure_types = failure_types
+        self.ignore = ignore
+        self.state = CLOSED
+        self.failures = 0
+        self.cooldown = reset_timeout
+        self.opened_at = 0.0
+        self.probing = False
+        self.rejected = 0
+        self.trips = 0
+        self._changed = threading.Condition()
+
+    def retry_after(self) -> float:
+        """Seconds until a probe may run; 0.0 when calls are allowed now."""
+        with self._changed:
+            return self._retry_after()
+
+    def _retry_after(self) -> float:
+        if self.state == CLOSED:
+            return 0.0
+        if self.state == OPEN:
+            return max(0.0, self.opened_at + self.cooldown - time.monotonic())
+        return self.cooldown if self.probing else 0.0
+
+    def _acquire(self) -> bool:
+        """Admit one call; returns whether it is the half-open probe. Caller holds the lock."""
+        if self.state == OPEN and self._retry_after() == 0.0:
+            self._transition(HALF_OPEN)
+        if self.state == CLOSED:
+            return False
+        if self.state == HALF_OPEN and not self.probing:
+            self.probing = True
+            return True
+        raise CircuitOpenError(self.name, self._retry_after())
+
+    def acquire(self, wait: float = 0.0) -> bool:
+        """
+        Admit one call, waiting up to `wait` seconds for the circuit to allow it.
+
+        Returns whether the call is the half-open probe, whose outcome must be
+        reported with `success()` or `failure()`.
+
+        Raises
+        ------
+        CircuitOpenError
+            If the circuit still rejects calls after `wait` seconds.
+        """
+        deadline = time.monotonic() + wait
+        with self._changed:
+            while True:
+                try:
+                    return self._acquire()
+                except CircuitOpenError:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.rejected += 1
+                        raise
+                    delay = self._retry_after() if self.state == OPEN else remaining
+                    self._changed.wait(min(remaining, max(delay, 0.05)))
+
+    def success(self, probe: bool = False) -> None:
+        """Report a successful call; a successful probe closes the circuit."""
+        with self._changed:
+            if probe:
+                self.probing = False
+            self.failures = 0
+            if self.state != CLOSED:
+                self.cooldown = self.reset_timeout
+                self._transition(CLOSED)
+
+    def failure(self, probe: bool = False, error: Optional[BaseException] = None) -> None:
+        """Report a failed call; opens the circuit on a failed probe or at the threshold."""
+        with self._changed:
+            if probe:
+                self.probing = False
+            self.failures += 1
+            if self.state == HALF_OPEN and probe:
+                self.cooldown = min(self.cooldown * 2, self.max_reset_timeout)
+                self._open(error)
+            elif self.state == CLOSED and self.failures >= self.failure_threshold:
+                self._open(error)
+
+    def _open(self, error: Optional[BaseException]) -> None:
+        self.opened_at = time.monotonic()
+        self.trips += 1
+        self._transition(OPEN)
+        logger.warning("Circuit '%s' open for %.0fs after %s failure(s): %s", self.name, self.cooldown,
+                       self.failures, error, extra={'circuit': self.name, 'cooldown_s': self.cooldown})
+
+    def _transition(self, state: str) -> None:
+        if state != self.state:
+            logger.info("Circuit '%s': %s -> %s", self.name, self.state, state,
+                        extra={'circuit': self.name, 'circuit_state': state})
+            self.state = state
+            self._changed.notify_all()
+
+    def counts(self, error: BaseException) -> bool:
+        """Whether `error` counts as a failure of the dependency."""
+        if isinstance(error, CircuitOpenError) or not isinstance(error, self.failure_types):
+            return False
+        return self.ignore is None or not self.ignore(error)
+
+    @contextlib.contextmanager
+    def guard(self, step: str, wait: float = 0.0) -> Iterator[None]:
+        """
+        Run the enclosed step through the circuit.
+
+        Exceptions that `counts()` count as failures and are re-raised; any
+        other exception leaves the circuit as it was. A rejected step raises
+        `CircuitOpenError` without running. Each guarded step is one call, so
+        retries belong inside the guard.
+        """
+        probe = self.acquire(wait)
+        if probe:
+            logger.info("Circuit '%s': probing with %s", self.name, step)
+        try:
+            yield
+        except BaseException as e:
+            if self.counts(e):
+                self.failure(probe, e)
+            else:
+                self._release(probe)
+            raise
+        self.success(probe)
+
+    def _release(self, probe: bool) -> None:
+        """Give up the probe slot without a verdict, letting the next call probe."""
+        if probe:
+            with self._changed:
+                self.probing = False
+                self._changed.notify_all()
+
+    def reset(self) -> None:
+        """Close the circuit and forget past failures."""
+        with self._changed:
+            self.failures = 0
+            self.probing = False
+            self.cooldown = self.reset_timeout
+            self._transition(CLOSED)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the state, consecutive failures, trips, rejected calls and seconds until a probe."""
+        with self._changed:
+            return {
+                'state': self.state,
+                'failures': self.failures,
+                'trips': self.trips,
+                'rejected': self.rejected,
+                'retry_after_s': round(self._retry_after(), 1),
+            }
+
+
+portal_breaker = CircuitBreaker('transparency_portal', failure_types=(RuntimeError, WebDriverException),
+                                ignore=is_session_error)
@@ -0,0 +1,162 @@
+"""
+Recycling policy for long-lived browser sessions.
+
+Tracks how many jobs a WebDriver session has served and samples its memory
+through Chrome DevTools performance metrics, replacing the session between jobs
+once it passes the configured thresholds.
+"""
+
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from src.rpa.utils.CONSTANTS import DRIVER_MAX_DOCUMENTS, DRIVER_MAX_HEAP_MB, DRIVER_MAX_JOBS
+from src.rpa.utils.web_driver_config import execute_cdp, web_driver, webdriver_cause
+from src.rpa.utils.browser_state import BrowserStateService
+from src.rpa.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class DriverSession:
+    """
+    A WebDriver session that is recycled proactively between jobs.
+
+    Parameters
+    ----------
+    factory : callable, optional
+        Creates a new WebDriver (default is `web_driver`).
+    max_jobs : int, optional
+        Jobs served before the session is replaced (default is `DRIVER_MAX_JOBS`).
+    max_heap_mb : float, optional
+        JS heap size (MB) above which the session is replaced (default is `DRIVER_MAX_HEAP_MB`).
+    max_documents : int, optional
+        Live documents (leaked tabs and frames) above which the session is replaced
+        (default is `DRIVER_MAX_DOCUMENTS`).
+    browser_state : BrowserStateService, optional
+        Snapshot service whose current cookies and localStorage are injected into
+        every new driver, including recycled ones (default is None).
+    **driver_options
+        Keyword arguments passed to `factory`.
+
+    Examples
+    --------
+    >>> session = DriverSession(max_jobs=20, profile='lightweight')
+    >>> with session.job() as driver:
+    ...     TransparencyPortal(driver).person_search_service(name="Alen Silva", cpf="12345678901")
+    """
+
+    def __init__(self, factory: Callable[..., WebDriver] = web_driver, max_jobs: int = DRIVER_MAX_JOBS,
+                 max_heap_mb: float = DRIVER_MAX_HEAP_MB, max_documents: int = DRIVER_MAX_DOCUMENTS,
+                 browser_state: Optional[BrowserStateService] = None, **driver_options: Any) -> None:
+        """Initialize the policy; the driver is created on first use."""
+        if max_jobs < 1:
+            raise ValueError("max_jobs must be at least 1")
+        self.factory = factory
+        self.max_jobs = max_jobs
+        self.max_heap_mb = max_heap_mb
+        self.max_documents = max_documents
+        self.browser_state = browser_state
+        self.driver_options = driver_options
+        self.jobs = 0
+        self.generation = 0
+        self.recycled = 0
+        self.last_metrics: Dict[str, float] = {}
+        self._driver: Optional[WebDriver] = None
+
+    @property
+    def started(self) -> bool:
+        """Whether a WebDriver has been created and not closed since."""
+        return self._driver is not None
+
+    @property
+    def driver(self) -> WebDriver:
+        """The current WebDriver, created on first access."""
+        if self._driver is None:
+            self._driver = self.factory(**self.driver_options)
+            if self.browser_state is not None:
+                self.browser_state.apply(self._driver)
+            self.generation += 1
+            self.jobs = 0
+        return self._driver
+
+    def metrics(self) -> Dict[str, float]:
+        """Sample heap size and document count of the session through CDP."""
+        try:
+            execute_cdp(self.driver, 'Performance.enable', {'timeDomain': 'timeTicks'})
+            values = {
+                metric['name']: metric['value']
+                for metric in execute_cdp(self.driver, 'Performance.getMetrics')['metrics']
+            }
+        except (WebDriverException, KeyError) as e:
+            logger.warning("Failed to sample browser metrics: %s", e)
+            return {}
+        self.last_metrics = {
+            'js_heap_used_mb': values.get('JSHeapUsedSize', 0) / 2 ** 20,
+            'js_heap_total_mb': values.get('JSHeapTotalSize', 0) / 2 ** 20,
+            'documents': values.get('Documents', 0),
+            'nodes': values.get('Nodes', 0),
+        }
+        return self.last_metrics
+
+    def recycle_reason(self) -> Optional[str]:
+        """Return why the session should be replaced, or None if it is healthy."""
+        if self._driver is None:
+            return None
+        if self.jobs >= self.max_jobs:
+            return f"served {self.jobs} job(s)"
+        metrics = self.metrics()
+        if not metrics:
+            return None
+        if metrics['js_heap_total_mb'] > self.max_heap_mb:
+            return f"JS heap at {metrics['js_heap_total_mb']:.0f} MB"
+        if metrics['documents'] > self.max_documents:
+            return f"{metrics['documents']:.0f} live documents"
+        return None
+
+    def recycle(self, reason: str = 'requested') -> WebDriver:
+        """Quit the current session and start a new one."""
+        logger.info("Recycling browser session %s: %s", self.generation, reason)
+        self.close()
+        self.recycled += 1
+        return self.driver
+
+    @contextmanager
+    def job(self) -> Iterator[WebDriver]:
+        """
+        Run one job on the session, recycling it first if it is past a threshold.
+
+        A session that raised a WebDriver error, directly or wrapped in another
+        exception (e.g. `TransparencyPortal.start_bot`'s `RuntimeError`), is
+        replaced before the next job.
+        """
+        if reason := self.recycle_reason():
+            self.recycle(reason)
+        try:
+            yield self.driver
+        except Exception as e:
+            if webdriver_cause(e) is not None:
+                self.close()
+            raise
+        finally:
+            self.jobs += 1
+
+    def close(self) -> None:
+        """Quit the current session, if any."""
+        if self._driver is not None:
+            try:
+                self._driver.quit()
+            except WebDriverException as e:
+                logger.warning("Failed to quit browser session: %s", e)
+            self._driver = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Return jobs served, recycles and last sampled metrics."""
+        return {
+            'generation': self.generation,
+            'jobs': self.jobs,
+            'recycled': self.recycled,
+            **{k: round(v, 1) for k, v in self.last_metrics.items()},
+        }
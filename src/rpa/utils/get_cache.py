@@ -1,57 +1,63 @@
 import json
 import os
-from typing import Any
+
+from selenium.webdriver.remote.webdriver import WebDriver
 
 from src.rpa.modules.transparency_portal.CONSTANTS import TransparencyPortalCONSTANTS
-from src.rpa.utils.CONSTANTS import LOCAL_STORAGE_PATH, COOKIE_PATH, SCREENSHOT_PATH
-from src.rpa.utils.web_driver_config import web_driver
+from src.rpa.modules.transparency_portal.actions import AcceptCookies, CloseTutorial
+from src.rpa.utils.CONSTANTS import LOCAL_STORAGE_PATH, COOKIE_PATH
+from src.rpa.utils.browser_state import BrowserState, BrowserStateService
+from src.rpa.utils.logger import configure_logging, get_logger, shutdown_logging
 
-web_bot = web_driver(headless=False, userdata=True)
+logger = get_logger(__name__)
 
 
-def get_cache(driver, url: str,
-              local_storage_path: str, cookie_path: str) -> Any | None:
+def prepare_portal(driver: WebDriver) -> None:
+    """Dismiss the cookie prompt and tutorial, so the captured state records them as seen."""
+    AcceptCookies(driver).execute()
+    CloseTutorial(driver).execute()
 
-    driver.get(f'{url}')
-    driver.implicitly_wait(10)
 
-    local_storage = driver.execute_script(
-        "return JSON.stringify(localStorage);"
+def portal_state_service(**options) -> BrowserStateService:
+    """Browser-state snapshot service of the Transparency Portal."""
+    return BrowserStateService(
+        TransparencyPortalCONSTANTS.Url.TRANSPARENCY_PORTAL, prepare=prepare_portal, **options
     )
 
+
+def get_cache(state: BrowserState, local_storage_path: str, cookie_path: str) -> None:
+    """Write a snapshot as the cookie and localStorage files restored by sessions without one."""
     os.makedirs(
         os.path.dirname(local_storage_path), exist_ok=True
     )
 
     with open(local_storage_path, 'w', encoding='utf-8') as file:
-        file.write(local_storage)
-        print(f"Local Storage saved in '{local_storage_path}'!")
-
-    cookies = driver.get_cookies()
+        file.write(json.dumps(state.local_storage))
+        logger.info("Local Storage saved in '%s'!", local_storage_path)
 
     os.makedirs(
         os.path.dirname(cookie_path), exist_ok=True
     )
 
     with open(cookie_path, 'w', encoding='utf-8') as file:
-        file.write(json.dumps(cookies))
-        print(f"Cookies salved in '{cookie_path}'!")
+        file.write(json.dumps(state.cookies))
+        logger.info("Cookies salved in '%s'!", cookie_path)
 
 
 def main():
 
-    get_cache(driver=web_bot,
-              url=TransparencyPortalCONSTANTS.Url.TRANSPARENCY_PORTAL,
+    state = portal_state_service().refresh()
+    get_cache(state=state,
               local_storage_path=LOCAL_STORAGE_PATH,
               cookie_path=COOKIE_PATH,
               )
 
 
 if __name__ == '__main__':
+    configure_logging()
     try:
         main()
     except Exception as error:
-        web_bot.save_screenshot(SCREENSHOT_PATH)
-        print(error)
+        logger.exception("Failed to capture browser cache: %s", error)
     finally:
-        web_bot.quit()
+        shutdown_logging()
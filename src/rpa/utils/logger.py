@@ -0,0 +1,125 @@
+"""
+Structured, non-blocking logging for the RPA.
+
+Records are handed to a queue by the calling thread and written as JSON lines by
+a background listener, so workers never block on stdout. Every record carries
+the correlation ID of the job it belongs to.
+
+Hot loops log at DEBUG; with the level at INFO or WARNING those calls are
+rejected by `isEnabledFor` before any formatting happens.
+"""
+
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Iterator, Optional, TextIO, Union
+
+ROOT_LOGGER = 'src.rpa'
+
+job_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar('job_id', default=None)
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+STANDARD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'job_id'}
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Return a module logger under the RPA hierarchy."""
+    return logging.getLogger(name if name.startswith(ROOT_LOGGER) else f'{ROOT_LOGGER}.{name}')
+
+
+def new_job_id() -> str:
+    """Generate a short correlation ID."""
+    return uuid.uuid4().hex[:12]
+
+
+@contextmanager
+def job_context(job_id: Optional[str] = None) -> Iterator[str]:
+    """Tag every record logged inside the block (in this thread or task) with a job ID."""
+    job_id = job_id or new_job_id()
+    token = job_id_var.set(job_id)
+    try:
+        yield job_id
+    finally:
+        job_id_var.reset(token)
+
+
+class JobIdFilter(logging.Filter):
+    """Attach the current job ID to records when they are created."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.job_id = job_id_var.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line, including `extra` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'job_id': getattr(record, 'job_id', None),
+            'thread': record.threadName,
+            'msg': record.getMessage(),
+        }
+        entry.update({k: v for k, v in vars(record).items() if k not in STANDARD_ATTRIBUTES})
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def configure_logging(level: Union[int, str, None] = None, levels: Optional[Dict[str, Union[int, str]]] = None,
+                      stream: TextIO = sys.stderr, path: Optional[str] = None) -> None:
+    """
+    Route RPA logs through a queue to a background JSON-lines writer.
+
+    Args:
+        level: Level of the RPA logger tree (default: `RPA_LOG_LEVEL` env var or INFO).
+        levels: Per-module overrides, e.g. {'modules.transparency_portal.person_search_service.scraper': 'WARNING'}.
+        stream: Where to write records when no `path` is given (default: stderr).
+        path: Optional file to append records to instead of `stream`.
+    """
+    global _listener
+    shutdown_logging()
+
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(level or os.getenv('RPA_LOG_LEVEL', 'INFO'))
+    root.propagate = False
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    for name, module_level in (levels or {}).items():
+        get_logger(name).setLevel(module_level)
+
+    if path:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        target = logging.FileHandler(path, encoding='utf-8')
+    else:
+        target = logging.StreamHandler(stream)
+    target.setFormatter(JsonFormatter())
+
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(records)
+    queue_handler.addFilter(JobIdFilter())
+    root.addHandler(queue_handler)
+
+    _listener = logging.handlers.QueueListener(records, target, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the background writer."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
@@ -0,0 +1,137 @@
+"""
+Opt-in per-job memory profiling with tracemalloc.
+
+Takes a snapshot at every stage boundary of a job and reports, per stage, the
+peak traced memory, the memory still retained when the stage ended and the
+allocation sites that grew the most. tracemalloc and its peak are process-wide,
+so profiled jobs run one at a time.
+"""
+
+import contextlib
+import threading
+import tracemalloc
+from typing import Any, Dict, Iterator, List, Optional
+
+from src.rpa.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+IGNORED_FILES = (tracemalloc.__file__, '<frozen importlib._bootstrap>', '<frozen importlib._bootstrap_external>')
+
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+_tracing_owned = False
+# Held by the profiler whose job is being measured, from its first stage to `finish()`.
+_profiling = threading.Lock()
+
+
+def _start_tracing(frames: int) -> None:
+    """Start tracemalloc for one more profiler, if nobody else is tracing."""
+    global _tracing_users, _tracing_owned
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+            _tracing_owned = True
+        _tracing_users += 1
+
+
+def _stop_tracing() -> None:
+    """Stop tracemalloc once the last profiler using it finishes, unless it was started elsewhere."""
+    global _tracing_users, _tracing_owned
+    with _tracing_lock:
+        _tracing_users -= 1
+        if _tracing_users == 0 and _tracing_owned:
+            tracemalloc.stop()
+            _tracing_owned = False
+
+
+class MemoryProfiler:
+    """
+    Measure memory of one job stage by stage.
+
+    tracemalloc traces the whole process and `reset_peak` is global, so a
+    profiler holds a process-wide lock from its first stage until `finish()`:
+    other profiled jobs wait for it, which serializes them. Allocations of
+    unprofiled threads running meanwhile still count towards the job. Tracing
+    slows allocation-heavy code noticeably, hence opt-in.
+
+    Parameters
+    ----------
+    enabled : bool, optional
+        Whether to profile; a disabled profiler does nothing (default is True).
+    top : int, optional
+        Allocation sites reported per stage (default is 5).
+    frames : int, optional
+        Traceback depth stored per allocation (default is 1).
+    """
+
+    def __init__(self, enabled: bool = True, top: int = 5, frames: int = 1) -> None:
+        """Initialize the profiler; tracing starts with the first stage and stops at `finish()`."""
+        self.enabled = enabled
+        self.top = top
+        self.frames = frames
+        self.stages: List[Dict[str, Any]] = []
+        self._started_tracing = False
+
+    def snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, filename) for filename in IGNORED_FILES]
+        )
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Profile the enclosed block as stage `name`."""
+        if not self.enabled:
+            yield
+            return
+        if not self._started_tracing:
+            if not _profiling.acquire(blocking=False):
+                logger.debug("Waiting for another job's memory profile to finish")
+                _profiling.acquire()
+            _start_tracing(self.frames)
+            self._started_tracing = True
+
+        before = self.snapshot()
+        start_current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            current, peak = tracemalloc.get_traced_memory()
+            growth = self.snapshot().compare_to(before, 'lineno')
+            self.stages.append({
+                'stage': name,
+                'peak_kb': round((peak - start_current) / 1024, 1),
+                'retained_kb': round((current - start_current) / 1024, 1),
+                'top': [
+                    {
+                        'site': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                        'size_kb': round(stat.size_diff / 1024, 1),
+                        'count': stat.count_diff,
+                    }
+                    for stat in growth[:self.top] if stat.size_diff > 0
+                ],
+            })
+
+    def report(self) -> Dict[str, Any]:
+        """Return the stages profiled so far and the largest stage peak."""
+        return {
+            'stages': self.stages,
+            'peak_kb': max((stage['peak_kb'] for stage in self.stages), default=0.0),
+        }
+
+    def finish(self, context: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Log the report, release tracing and the profiling lock, and return the report."""
+        if not self.enabled:
+            return None
+        report = self.report()
+        for stage in self.stages:
+            logger.info("Memory %s: peak %.1f KiB, retained %.1f KiB", stage['stage'], stage['peak_kb'],
+                        stage['retained_kb'], extra={'memory_stage': stage})
+        logger.info("Memory profile%s: peak %.1f KiB", f" of {context}" if context else '', report['peak_kb'],
+                    extra={'memory_profile': report})
+        if self._started_tracing:
+            _stop_tracing()
+            self._started_tracing = False
+            _profiling.release()
+        return report
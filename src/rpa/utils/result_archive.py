@@ -0,0 +1,202 @@
+"""
+Size-bounded, compressed archive of exported results.
+
+Entries are stored compressed (zstd when `zstandard` is installed, gzip
+otherwise) and evicted least-recently-used first once the archive exceeds its
+size limit, or when they are older than the age limit.
+
+Each entry's mtime records when it was written and its atime when it was last
+read, so LRU order and ages survive restarts.
+"""
+
+import gzip
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+from src.rpa.utils.CONSTANTS import ARCHIVE_DIR, ARCHIVE_MAX_AGE, ARCHIVE_MAX_BYTES
+from src.rpa.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+EXTENSIONS = {'zstd': '.json.zst', 'gzip': '.json.gz'}
+KEY_PATTERN = re.compile(r'^[\w.-]+$')
+
+
+class ResultArchive:
+    """
+    Compressed key/value archive with size and age limits and LRU eviction.
+
+    Parameters
+    ----------
+    directory : str, optional
+        Where entries are stored (default is `ARCHIVE_DIR`).
+    max_bytes : int, optional
+        Maximum total compressed size before LRU eviction (default is `ARCHIVE_MAX_BYTES`).
+    max_age : float, optional
+        Seconds after which an entry expires, None to disable (default is `ARCHIVE_MAX_AGE`).
+    codec : str, optional
+        'zstd', 'gzip' or 'auto' to prefer zstd when available (default is 'auto').
+    """
+
+    def __init__(self, directory: str = ARCHIVE_DIR, max_bytes: int = ARCHIVE_MAX_BYTES,
+                 max_age: Optional[float] = ARCHIVE_MAX_AGE, codec: str = 'auto') -> None:
+        """Open the archive directory and index existing entries."""
+        if max_bytes <= 0:
+            raise ValueError("max_bytes must be positive")
+        if codec == 'auto':
+            codec = 'zstd' if zstandard is not None else 'gzip'
+        if codec not in EXTENSIONS:
+            raise ValueError(f"Invalid codec '{codec}'. Use: {', '.join(EXTENSIONS)}")
+        if codec == 'zstd' and zstandard is None:
+            raise ValueError("Codec 'zstd' requires the 'zstandard' package")
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.codec = codec
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[str, Tuple[str, int, float]]' = OrderedDict()
+        self._size = 0
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._entries and not self._expired(self._entries[key][2])
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        """Total compressed size of the archive in bytes."""
+        return self._size
+
+    def _load_index(self) -> None:
+        """Index entries on disk, least recently read first."""
+        found = []
+        for filename in os.listdir(self.directory):
+            for extension in EXTENSIONS.values():
+                if filename.endswith(extension):
+                    stat = os.stat(os.path.join(self.directory, filename))
+                    found.append((stat.st_atime, filename[:-len(extension)], filename, stat))
+        for _, key, filename, stat in sorted(found):
+            self._entries[key] = (os.path.join(self.directory, filename), stat.st_size, stat.st_mtime)
+            self._size += stat.st_size
+        self.evict()
+
+    def _expired(self, written_at: float) -> bool:
+        return self.max_age is not None and time.time() - written_at > self.max_age
+
+    def _remove(self, key: str) -> None:
+        path, size, _ = self._entries.pop(key)
+        self._size -= size
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def put(self, key: str, content: Union[str, bytes, Iterable[str]]) -> str:
+        """
+        Compress and store `content` under `key`, replacing any previous entry.
+
+        `content` may be an iterable of text chunks, which is compressed as it is
+        consumed. Returns the path of the stored entry.
+        """
+        if not KEY_PATTERN.match(key):
+            raise ValueError(f"Invalid archive key: {key!r}")
+        chunks = [content] if isinstance(content, (str, bytes)) else content
+        path = os.path.join(self.directory, key + EXTENSIONS[self.codec])
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as raw, self._writer(raw) as writer:
+                for chunk in chunks:
+                    writer.write(chunk.encode('utf-8') if isinstance(chunk, str) else chunk)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        size = os.path.getsize(path)
+        with self._lock:
+            if key in self._entries:
+                old_path, old_size, _ = self._entries.pop(key)
+                self._size -= old_size
+                if old_path != path and os.path.exists(old_path):
+                    os.remove(old_path)
+            self._entries[key] = (path, size, time.time())
+            self._size += size
+        self.evict()
+        logger.debug("Archived '%s' (%s bytes, %s)", key, size, self.codec)
+        return path
+
+    def _writer(self, raw):
+        """Return a compressing writer over a binary file."""
+        if self.codec == 'zstd':
+            return zstandard.ZstdCompressor(level=3).stream_writer(raw, closefd=False)
+        return gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=6)
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the decompressed entry, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            path, _, written_at = entry
+            if self._expired(written_at):
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+        try:
+            with open(path, 'rb') as raw:
+                if path.endswith(EXTENSIONS['zstd']):
+                    if zstandard is None:
+                        raise ValueError(f"Entry '{key}' needs the 'zstandard' package to be read")
+                    data = zstandard.ZstdDecompressor().stream_reader(raw).read()
+                else:
+                    data = gzip.GzipFile(fileobj=raw, mode='rb').read()
+            os.utime(path, (time.time(), written_at))
+        except FileNotFoundError:
+            with self._lock:
+                if key in self._entries:
+                    self._remove(key)
+            return None
+        return data.decode('utf-8')
+
+    def delete(self, key: str) -> bool:
+        """Remove an entry; return whether it existed."""
+        with self._lock:
+            if key not in self._entries:
+                return False
+            self._remove(key)
+            return True
+
+    def evict(self) -> int:
+        """Drop expired entries, then least recently used ones until under `max_bytes`."""
+        removed = 0
+        with self._lock:
+            for key in [k for k, (_, _, written_at) in self._entries.items() if self._expired(written_at)]:
+                self._remove(key)
+                removed += 1
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                self._remove(next(iter(self._entries)))
+                removed += 1
+        if removed:
+            logger.info("Evicted %s archive entry(ies)", removed)
+        return removed
+
+    def stats(self) -> Dict[str, Union[int, str]]:
+        """Return entry count, total size and limits."""
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self._size,
+                    'max_bytes': self.max_bytes, 'codec': self.codec}
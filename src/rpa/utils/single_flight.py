@@ -0,0 +1,84 @@
+"""
+Single-flight call deduplication.
+
+Concurrent callers asking for the same key share one in-flight execution and
+receive the same result (or the same exception).
+"""
+
+import threading
+from typing import Any, Callable, Dict, Hashable, Iterable, List, TypeVar
+
+from src.rpa.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar('T')
+
+
+class _Call:
+    """State of one in-flight execution shared by every caller of a key."""
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into a single execution."""
+
+    def __init__(self) -> None:
+        """Initialize an empty in-flight registry."""
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Run `fn` for `key`, or wait for the execution already in flight.
+
+        The first caller of a key executes `fn`; callers arriving before it
+        finishes block and receive its result. Once the call completes the key
+        is released, so later callers trigger a fresh execution.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            logger.info("Joining in-flight search: %s", key)
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self) -> int:
+        """Return how many keys are currently executing."""
+        with self._lock:
+            return len(self._calls)
+
+
+def unique_by(items: Iterable[T], key: Callable[[T], Hashable]) -> List[T]:
+    """Remove items whose key was already seen, preserving input order."""
+    seen = set()
+    unique = []
+    for item in items:
+        item_key = key(item)
+        if item_key in seen:
+            continue
+        seen.add(item_key)
+        unique.append(item)
+    return unique
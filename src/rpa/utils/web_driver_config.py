@@ -1,37 +1,213 @@
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options as ChromeOptions
-from typing import Any
+from selenium.common.exceptions import (
+    InvalidSessionIdException, NoSuchWindowException, TimeoutException, WebDriverException,
+)
+from selenium.webdriver.support.ui import WebDriverWait
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, Tuple
 import json
 import os
 
-from src.rpa.utils.CONSTANTS import USER_DATA_PATH
+from src.rpa.utils.CONSTANTS import user_data_path
+from src.rpa.utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 
 def local_storage(driver, local_storage_path) -> Any | None:
+    """Restore every localStorage item saved in `local_storage_path` with a single script."""
     if os.path.exists(local_storage_path):
         try:
             with open(local_storage_path, 'r', encoding='utf-8') as file:
                 local_storage_data = json.load(file)
-            for key, value in local_storage_data.items():
-                driver.execute_script(f"localStorage.setItem('{key}', '{value}');")
-                return driver
+            driver.execute_script(
+                "for (var key in arguments[0]) { localStorage.setItem(key, arguments[0][key]); }",
+                local_storage_data
+            )
+            return driver
         except Exception as e:
-            print(f"Error loading local storage from {local_storage_path}: {e}")
+            logger.warning("Error loading local storage from %s: %s", local_storage_path, e)
 
 
 def load_cookies(driver, cookie_path) -> Any | None:
+    """Restore every cookie saved in `cookie_path`."""
     if os.path.exists(cookie_path):
         try:
             with open(cookie_path, 'r', encoding='utf-8') as file:
                 cookies = json.load(file)
             for cookie in cookies:
                 driver.add_cookie(cookie)
-                return driver
+            return driver
         except Exception as e:
-            print(f"Error loading cookies from {cookie_path}: {e}")
-
-
-def web_driver(headless: bool = True, userdata: bool = False) -> webdriver.Chrome:
+            logger.warning("Error loading cookies from %s: %s", cookie_path, e)
+
+
+@dataclass(frozen=True)
+class PageProfile:
+    """
+    Page-load behaviour of a browser session.
+
+    Attributes
+    ----------
+    page_load_strategy : str
+        Selenium page load strategy ('normal' or 'eager').
+    blocked_urls : tuple of str
+        URL patterns blocked through Chrome DevTools (`Network.setBlockedURLs`).
+    screenshot_assets : bool
+        Whether the screenshot step allows every asset and loads the images of
+        the captured element.
+    """
+    page_load_strategy: str = 'normal'
+    blocked_urls: Tuple[str, ...] = ()
+    screenshot_assets: bool = False
+
+
+BLOCKED_URL_PATTERNS = (
+    # Images
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico',
+    # Fonts
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    # Media
+    '*.mp4', '*.webm', '*.mp3', '*.ogg',
+    # Analytics and third-party trackers
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*',
+    '*hotjar.com*', '*facebook.net*', '*clarity.ms*',
+)
+
+# Re-requests what failed while blocked for arguments[0]: its images, its CSS background images
+# and the web fonts that failed on the page, re-added from their @font-face rules. Returns how many.
+RELOAD_ASSETS_SCRIPT = """
+const root = arguments[0];
+const assets = window.__reloadedAssets = [];
+for (const image of root.querySelectorAll('img')) {
+    const src = image.src, srcset = image.srcset;
+    image.srcset = ''; image.src = ''; image.srcset = srcset; image.src = src;
+    assets.push(image);
+}
+for (const element of [root, ...root.querySelectorAll('*')]) {
+    const urls = [...getComputedStyle(element).backgroundImage.matchAll(/url\\("?(.*?)"?\\)/g)].map(m => m[1]);
+    if (!urls.length) continue;
+    for (const url of urls) { const image = new Image(); image.src = url; assets.push(image); }
+    const inline = element.style.backgroundImage;
+    element.style.backgroundImage = 'none'; void element.offsetWidth; element.style.backgroundImage = inline;
+}
+const failed = new Set([...document.fonts].filter(font => font.status === 'error').map(font => font.family));
+for (const sheet of document.styleSheets) {
+    let rules;
+    try { rules = sheet.cssRules; } catch (e) { continue; }
+    for (const rule of rules) {
+        if (!(rule instanceof CSSFontFaceRule)) continue;
+        const style = rule.style, family = style.getPropertyValue('font-family');
+        if (!failed.has(family)) continue;
+        const base = sheet.href || location.href;
+        const src = style.getPropertyValue('src')
+            .replace(/url\\("?(.*?)"?\\)/g, (_, url) => `url("${new URL(url, base)}")`);
+        const font = new FontFace(family, src, {
+            weight: style.getPropertyValue('font-weight') || 'normal',
+            style: style.getPropertyValue('font-style') || 'normal',
+        });
+        document.fonts.add(font);
+        font.load().catch(() => {});
+        assets.push(font);
+    }
+}
+return assets.length;
+"""
+ASSETS_LOADED_SCRIPT = """
+return (window.__reloadedAssets || []).every(asset =>
+    asset instanceof FontFace ? !['unloaded', 'loading'].includes(asset.status) : asset.complete);
+"""
+
+SESSION_ERRORS = (InvalidSessionIdException, NoSuchWindowException)
+SESSION_ERROR_MESSAGES = ('invalid session id', 'session deleted', 'chrome not reachable', 'disconnected')
+
+PAGE_PROFILES: Dict[str, PageProfile] = {
+    'default': PageProfile(),
+    'lightweight': PageProfile(
+        page_load_strategy='eager', blocked_urls=BLOCKED_URL_PATTERNS, screenshot_assets=True
+    ),
+}
+
+
+def execute_cdp(driver, cmd: str, params: Dict[str, Any] | None = None) -> Any:
+    """
+    Run a Chrome DevTools command, also on Remote (grid) sessions.
+
+    A Remote session started with Chrome options talks through Selenium's
+    `ChromeRemoteConnection`, which already knows the command.
+    """
+    if hasattr(driver, 'execute_cdp_cmd'):
+        return driver.execute_cdp_cmd(cmd, params or {})
+    return driver.execute('executeCdpCommand', {'cmd': cmd, 'params': params or {}})['value']
+
+
+def webdriver_cause(error: BaseException | None) -> WebDriverException | None:
+    """The WebDriver error `error` is, or was raised from (e.g. a `RuntimeError` wrapping it)."""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        if isinstance(error, WebDriverException):
+            return error
+        seen.add(id(error))
+        error = error.__cause__
+    return None
+
+
+def is_session_error(error: BaseException | None) -> bool:
+    """Whether `error` comes from the WebDriver session itself (closed, crashed or expired), not the page."""
+    cause = webdriver_cause(error)
+    if cause is None:
+        return False
+    message = (cause.msg or '').lower()
+    return isinstance(cause, SESSION_ERRORS) or any(text in message for text in SESSION_ERROR_MESSAGES)
+
+
+def block_urls(driver, patterns: Tuple[str, ...]) -> None:
+    """Block requests matching the URL patterns for the whole session."""
+    execute_cdp(driver, 'Network.enable')
+    execute_cdp(driver, 'Network.setBlockedURLs', {'urls': list(patterns)})
+
+
+def pause_seconds(driver, seconds: float) -> float:
+    """Length of a fixed page pause on `driver`, scaled by its `pause_scale` attribute if it has one."""
+    return seconds * getattr(driver, 'pause_scale', 1)
+
+
+@contextmanager
+def page_assets(driver, element: Any = None, reload: bool = False, timeout: float = 10.0) -> Iterator[None]:
+    """
+    Temporarily allow every asset for a step that needs it (e.g. an element screenshot).
+
+    Does nothing unless the session profile blocks assets and opts in to
+    `screenshot_assets`. With `element`, what failed while blocked is requested
+    again without leaving the page (the element's images and CSS background
+    images, and the page's failed web fonts), waiting up to `timeout` seconds
+    for it; `reload` instead reloads the whole page so every previously blocked
+    asset is fetched.
+    """
+    profile: PageProfile = getattr(driver, 'page_profile', PAGE_PROFILES['default'])
+    if not profile.blocked_urls or not profile.screenshot_assets:
+        yield
+        return
+    block_urls(driver, ())
+    try:
+        if reload:
+            driver.refresh()
+        elif element is not None and driver.execute_script(RELOAD_ASSETS_SCRIPT, element):
+            try:
+                WebDriverWait(driver, timeout).until(lambda d: d.execute_script(ASSETS_LOADED_SCRIPT))
+            except TimeoutException:
+                logger.debug("Assets still loading after %ss; capturing anyway", timeout)
+        yield
+    finally:
+        block_urls(driver, profile.blocked_urls)
+
+
+def web_driver(headless: bool = True, userdata: bool = False, profile: str = 'default') -> webdriver.Chrome:
+    if profile not in PAGE_PROFILES:
+        raise ValueError(f"Invalid profile '{profile}'. Use: {', '.join(PAGE_PROFILES)}")
+    page_profile = PAGE_PROFILES[profile]
 
     options = ChromeOptions()
 
@@ -47,7 +223,7 @@ def web_driver(headless: bool = True, userdata: bool = False) -> webdriver.Chrom
         )
 
     if userdata:
-        options.add_argument(rf'--user-data-dir={USER_DATA_PATH}')
+        options.add_argument(rf'--user-data-dir={user_data_path()}')
 
     options.add_argument('--disable-blink-features=AutomationControlled')
 
@@ -61,7 +237,7 @@ def web_driver(headless: bool = True, userdata: bool = False) -> webdriver.Chrom
     options.add_experimental_option('useAutomationExtension', False)
     options.add_experimental_option('excludeSwitches', ['enable-automation'])
 
-    options.page_load_strategy = 'normal'
+    options.page_load_strategy = page_profile.page_load_strategy
     options.set_capability('platformName', 'ANY')
     options.set_capability('browserName', 'chrome')
 
@@ -70,4 +246,8 @@ def web_driver(headless: bool = True, userdata: bool = False) -> webdriver.Chrom
 
     driver.maximize_window()
 
+    driver.page_profile = page_profile
+    if page_profile.blocked_urls:
+        block_urls(driver, page_profile.blocked_urls)
+
     return driver
\ No newline at end of file
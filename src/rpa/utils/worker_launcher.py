@@ -0,0 +1,89 @@
+"""
+Fork-server worker launcher.
+
+A fork server process imports the heavy modules (Selenium, BeautifulSoup,
+tenacity and the portal automation) once; every worker is then forked from it
+with those modules already loaded, instead of importing them on each start.
+"""
+
+import multiprocessing
+import sys
+from multiprocessing.context import BaseContext
+from typing import Any, Callable, Iterable, Optional, Sequence
+
+from src.rpa.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+PRELOAD_MODULES = (
+    'selenium.webdriver',
+    'selenium.webdriver.remote.webdriver',
+    'selenium.webdriver.support.ui',
+    'bs4',
+    'tenacity',
+    'src.rpa.utils.web_driver_config',
+    'src.rpa.utils.driver_session',
+    'src.rpa.modules.transparency_portal.core',
+    'src.rpa.modules.transparency_portal.person_search_service.core',
+)
+
+
+class WorkerLauncher:
+    """
+    Start worker processes from a pre-imported fork server.
+
+    Parameters
+    ----------
+    preload : Sequence[str], optional
+        Modules imported once by the fork server (default is `PRELOAD_MODULES`).
+    method : str, optional
+        Start method; 'forkserver' where available, otherwise 'spawn', which
+        imports everything in each worker (default is None, pick automatically).
+
+    Examples
+    --------
+    >>> launcher = WorkerLauncher()
+    >>> with launcher.pool(4) as pool:
+    ...     results = pool.map(run_search, queries)
+    """
+
+    def __init__(self, preload: Sequence[str] = PRELOAD_MODULES, method: Optional[str] = None) -> None:
+        """Initialize the start context; the fork server itself starts with the first worker."""
+        available = multiprocessing.get_all_start_methods()
+        if method is None:
+            method = 'forkserver' if 'forkserver' in available else 'spawn'
+        if method not in available:
+            raise ValueError(f"Invalid start method '{method}'. Use: {', '.join(available)}")
+        self.method = method
+        self.preload = list(preload)
+        self.context: BaseContext = multiprocessing.get_context(method)
+        if method == 'forkserver':
+            self.context.set_forkserver_preload(self.preload)
+        else:
+            logger.info("Start method '%s' has no fork server; workers import modules on start", method)
+
+    def process(self, target: Callable[..., Any], *args: Any, name: Optional[str] = None,
+                **kwargs: Any) -> multiprocessing.Process:
+        """Start one worker process running `target(*args, **kwargs)`."""
+        process = self.context.Process(target=target, args=args, kwargs=kwargs, name=name, daemon=False)
+        process.start()
+        return process
+
+    def pool(self, processes: int, initializer: Optional[Callable[..., None]] = None,
+             initargs: Iterable[Any] = ()) -> Any:
+        """Create a process pool whose workers come from the fork server."""
+        return self.context.Pool(processes, initializer=initializer, initargs=tuple(initargs))
+
+    def warm(self) -> None:
+        """Start the fork server now, so the first real worker does not pay for its imports."""
+        process = self.process(_noop, name='warm-up')
+        process.join()
+
+
+def _noop() -> None:
+    """Worker that exits immediately; used to start the fork server."""
+
+
+def preloaded(modules: Sequence[str] = PRELOAD_MODULES) -> bool:
+    """Whether every module in `modules` is already imported in this process."""
+    return all(module in sys.modules for module in modules)
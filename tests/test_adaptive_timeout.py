@@ -0,0 +1,78 @@
+import pytest
+from selenium.common.exceptions import TimeoutException
+
+from src.rpa.utils.adaptive_timeout import LatencyTracker
+
+
+def trained(seconds, samples=5, **options):
+    tracker = LatencyTracker(**options)
+    for _ in range(samples):
+        tracker.record('step', seconds)
+    return tracker
+
+
+def test_default_until_enough_samples():
+    assert trained(1.0, samples=4).timeout('step', 10) == 10
+
+
+def test_timeout_shrinks_on_a_fast_portal():
+    assert trained(1.5).timeout('step', 10) == 3.0
+
+
+def test_timeout_shrinks_no_further_than_the_floor():
+    assert trained(0.1).timeout('step', 10) == 2.0
+
+
+def test_timeout_grows_past_the_default_on_a_slow_portal():
+    assert trained(8.0).timeout('step', 10) == 16.0
+
+
+def test_timeout_grows_no_further_than_the_ceiling():
+    assert trained(40.0).timeout('step', 10) == 60.0
+
+
+def test_misses_are_not_latency_samples():
+    tracker = trained(1.5)
+    tracker.record('step', 10.0, found=False)
+    assert tracker.stats()['step']['samples'] == 5
+
+
+def test_a_miss_falls_back_to_at_least_the_default():
+    tracker = trained(1.5)
+    tracker.record('step', 3.0, found=False)
+    assert tracker.timeout('step', 10) == 10
+    tracker.record('step', 1.5)
+    assert tracker.timeout('step', 10) == 3.0
+
+
+def test_a_miss_keeps_a_longer_learned_timeout():
+    tracker = trained(8.0)
+    tracker.record('step', 16.0, found=False)
+    assert tracker.timeout('step', 10) == 16.0
+
+
+def test_probe_stays_short_until_seen():
+    tracker = LatencyTracker(probe=1.5)
+    assert tracker.probe_timeout('optional', 10) == 1.5
+    tracker.record('optional', 3.0, optional=True)
+    assert tracker.probe_timeout('optional', 10) == 6.0
+
+
+def test_wait_records_slow_successful_waits():
+    tracker = LatencyTracker()
+    polls = []
+
+    def ready(_):
+        polls.append(None)
+        return len(polls) > 1
+
+    assert tracker.wait(object(), 'step', ready, default=5)
+    stats = tracker.stats()['step']
+    assert stats['hits'] == 1 and stats['samples'] == 1 and stats['p50_s'] > 0
+
+
+def test_wait_counts_timeouts_as_misses():
+    tracker = LatencyTracker()
+    with pytest.raises(TimeoutException):
+        tracker.wait(object(), 'step', lambda _: False, default=0.1)
+    assert tracker.stats()['step']['misses'] == 1
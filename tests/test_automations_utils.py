@@ -0,0 +1,128 @@
+import json
+
+import pytest
+
+from src.rpa.utils.automations_utils import (
+    is_valid_cpf, normalize_name, normalize_names, normalize_number, normalize_numbers,
+)
+
+NAMES = [
+    'Maria da Silva',
+    '  joão   DE souza ',
+    'Ana\tMaria',
+    'Ana\r\nMaria',
+    'Ana\rMaria\r',
+    'José\xa0Pereira\xa0',
+    '\x85Luís\x85Costa\x85',
+    "D'Ávila-Santos, Jr.",
+    '\t \xa0\x85',
+    '',
+]
+
+NUMBERS = [
+    '529.982.247-25',
+    ' 111 444 777 35 ',
+    '123\t456',
+    '123\r\n456',
+    '\xa0987\x85654\r',
+    'abc',
+    '',
+]
+
+
+@pytest.mark.parametrize('cpf', ['52998224725', '11144477735', '39053344705'])
+def test_valid_cpf(cpf):
+    assert is_valid_cpf(cpf)
+
+
+@pytest.mark.parametrize('digit', '0123456789')
+def test_repeated_digits_are_invalid(digit):
+    assert not is_valid_cpf(digit * 11)
+
+
+@pytest.mark.parametrize('cpf', ['52998224726', '52998224715', '11144477734'])
+def test_wrong_check_digit_is_invalid(cpf):
+    assert not is_valid_cpf(cpf)
+
+
+@pytest.mark.parametrize('cpf', ['5299822472', '529982247250', '529.982.247-25', ''])
+def test_malformed_cpf_is_invalid(cpf):
+    assert not is_valid_cpf(cpf)
+
+
+def test_normalize_names_matches_normalize_name():
+    assert normalize_names(NAMES) == [normalize_name(name) for name in NAMES]
+
+
+@pytest.mark.parametrize('name', NAMES)
+def test_normalize_names_matches_normalize_name_alone(name):
+    assert normalize_names([name]) == [normalize_name(name)]
+
+
+def test_normalize_numbers_matches_normalize_number():
+    assert normalize_numbers(NUMBERS) == [normalize_number(number) for number in NUMBERS]
+
+
+def test_bulk_normalization_of_nothing():
+    assert normalize_names([]) == []
+    assert normalize_numbers([]) == []
+
+
+VALID_ROW = {'name': 'Ana Silva', 'cpf': '529.982.247-25'}
+
+
+def check_rows(rows):
+    from src.rpa.modules.transparency_portal.person_search_service.batch_input import BatchValidator
+    return list(BatchValidator().iter_checked(list(enumerate(rows, start=1))))
+
+
+@pytest.mark.parametrize('fields', [
+    {'since': 2024},
+    {'until': ['01/2024']},
+    {'search_filter': 5},
+    {'search_filter': ['social_programs', 3]},
+    {'search_filter': 'bolsa_familia'},
+    {'columns': [1]},
+    {'columns': {'Valor': True}},
+    {'name': ['Ana']},
+    {'cpf': 5.29},
+    {'nis': True},
+    {'search_by': 1},
+    {'detail_filter': 'since=01/2024'},
+    {'detail_filter': {'since': 2024}},
+    {'detail_filter': {'columns': [1]}},
+])
+def test_malformed_batch_rows_are_rejected(fields):
+    (_, _, query, errors), = check_rows([{**VALID_ROW, **fields}])
+    assert query is None
+    assert errors
+
+
+def test_one_malformed_row_does_not_stop_the_others():
+    results = check_rows([{**VALID_ROW, 'since': 2024}, VALID_ROW, {**VALID_ROW, 'columns': [1]}])
+    assert [query is not None for _, _, query, _ in results] == [False, True, False]
+
+
+def test_integer_cpf_is_coerced():
+    (_, _, query, errors), = check_rows([{'name': 'Ana Silva', 'cpf': 52998224725}])
+    assert errors == []
+    assert query['cpf'] == '52998224725'
+
+
+def test_validated_queries_round_trip_through_the_output_file(tmp_path):
+    from src.rpa.modules.transparency_portal.person_search_service.batch_input import (
+        BatchValidator, read_rows, to_json,
+    )
+    rows = [
+        {**VALID_ROW, 'since': '01/2024', 'until': '06/2024', 'columns': 'Data; Valor'},
+        {'name': 'Bruno Lima', 'cpf': '11144477735', 'search_filter': 'social_programs'},
+    ]
+    queries = BatchValidator().validate(list(enumerate(rows, start=1)))
+    assert len(queries) == 2
+    path = tmp_path / 'queries.valid.jsonl'
+    path.write_text(''.join(json.dumps(to_json(query)) + '\n' for query in queries), encoding='utf-8')
+
+    reread = BatchValidator().validate(list(read_rows(str(path))))
+
+    assert [to_json(query) for query in reread] == [to_json(query) for query in queries]
+    assert reread[0]['detail_filter'].columns == ('Data', 'Valor')
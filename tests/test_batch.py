@@ -0,0 +1,101 @@
+import json
+from concurrent.futures import Future
+
+import pytest
+
+from src.rpa.batch import BatchRunner, Checkpoint
+
+CPF = '52998224725'
+
+
+class Scheduler:
+    lanes = ('interactive', 'batch')
+    sessions = [None, None]
+
+    def __init__(self, failing=(), kill_after=None):
+        self.failing = set(failing)
+        self.kill_after = kill_after
+        self.searched = []
+
+    def search(self, client, lane=None, **options):
+        if self.kill_after is not None and len(self.searched) == self.kill_after:
+            raise KeyboardInterrupt
+        self.searched.append(options['name'])
+        future = Future()
+        if options['name'] in self.failing:
+            future.set_exception(RuntimeError('Failed to load Transparency Portal'))
+        else:
+            future.set_result(json.dumps([{'nome': options['name']}]))
+        return future
+
+    def close(self, cancel=False):
+        pass
+
+
+def write_input(path, rows):
+    path.write_text(''.join(json.dumps(row) + '\n' for row in rows), encoding='utf-8')
+
+
+def read_output(path):
+    return [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+
+
+@pytest.fixture
+def files(tmp_path):
+    rows = [{'name': f'Pessoa {index}', 'cpf': CPF} for index in range(10)]
+    rows[3] = {'name': 'Pessoa 3', 'cpf': '123'}
+    write_input(tmp_path / 'queries.jsonl', rows)
+    return tmp_path / 'queries.jsonl', tmp_path / 'results.jsonl'
+
+
+def runner(files, scheduler, **options):
+    source, output = files
+    return BatchRunner(str(source), str(output), scheduler, checkpoint_every=0, progress_every=60, **options)
+
+
+def test_rejected_records_hold_the_raw_input(files):
+    runner(files, Scheduler()).run()
+    rejected, = [record for record in read_output(files[1]) if record['status'] == 'rejected']
+    assert rejected['line'] == 4
+    assert rejected['input'] == {'name': 'Pessoa 3', 'cpf': '123'}
+    assert rejected['errors']
+
+
+def test_killed_run_resumes_without_losing_or_repeating_lines(files):
+    with pytest.raises(KeyboardInterrupt):
+        runner(files, Scheduler(kill_after=4)).run()
+    done = read_output(files[1])
+    assert len(done) == 5
+    with open(files[1], 'ab') as output:
+        output.write(b'{"line": 9, "status": "o')
+
+    resumed = Scheduler()
+    counts = runner(files, resumed).run()
+
+    records = read_output(files[1])
+    assert sorted(record['line'] for record in records) == list(range(1, 11))
+    assert counts == {'ok': 5, 'error': 0, 'rejected': 0, 'deferred': 0}
+    assert resumed.searched == [f'PESSOA {index}' for index in range(5, 10)]
+    assert Checkpoint.load(str(files[1]) + '.checkpoint.json', str(files[0])).finished
+
+
+def test_outage_defers_a_line_at_most_max_deferrals_times(files):
+    for _ in range(2):
+        counts = runner(files, Scheduler(failing={'PESSOA 5'}), max_deferrals=2).run()
+        assert counts['deferred'] == 1
+        assert not any(record['line'] == 6 for record in read_output(files[1]))
+
+    counts = runner(files, Scheduler(failing={'PESSOA 5'}), max_deferrals=2).run()
+
+    assert counts == {'ok': 0, 'error': 1, 'rejected': 0, 'deferred': 0}
+    error, = [record for record in read_output(files[1]) if record['line'] == 6]
+    assert error['status'] == 'error' and error['query']['name'] == 'PESSOA 5'
+    checkpoint = Checkpoint.load(str(files[1]) + '.checkpoint.json', str(files[0]))
+    assert checkpoint.finished and checkpoint.deferred == {}
+
+
+def test_deferred_line_that_succeeds_later_is_recorded_once(files):
+    runner(files, Scheduler(failing={'PESSOA 5'})).run()
+    counts = runner(files, Scheduler()).run()
+    assert counts['ok'] == 1
+    assert sorted(record['line'] for record in read_output(files[1])) == list(range(1, 11))
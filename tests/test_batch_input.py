@@ -0,0 +1,81 @@
+import json
+
+import pytest
+
+from src.rpa.modules.transparency_portal.person_search_service.batch_input import (
+    BatchValidator, load_queries, read_rows, search_options, search_query,
+)
+
+ANA = {'name': 'Ana Silva', 'cpf': '529.982.247-25'}
+
+
+def validate(*rows, **options):
+    validator = BatchValidator(**options)
+    return validator, validator.validate(list(enumerate(rows, start=1)))
+
+
+def test_csv_rows_are_numbered_after_the_header(tmp_path):
+    path = tmp_path / 'queries.csv'
+    path.write_text('name,cpf\nAna Silva,52998224725\nBruno Lima,11144477735\n', encoding='utf-8')
+    assert [line for line, _ in read_rows(str(path))] == [2, 3]
+
+
+def test_unreadable_jsonl_lines_become_rejects(tmp_path):
+    path = tmp_path / 'queries.jsonl'
+    path.write_text(json.dumps(ANA) + '\n\n{broken\n[1, 2]\n', encoding='utf-8')
+    errors = tmp_path / 'out' / 'rejects.jsonl'
+
+    queries = load_queries(str(path), str(errors))
+
+    assert [query['name'] for query in queries] == ['ANA SILVA']
+    rejects = [json.loads(line) for line in errors.read_text(encoding='utf-8').splitlines()]
+    assert [reject['line'] for reject in rejects] == [3, 4]
+    assert rejects[0]['input'] == '{broken' and rejects[0]['errors'][0].startswith('invalid JSON')
+    assert rejects[1]['errors'] == ['not a JSON object']
+
+
+@pytest.mark.parametrize('fields, error', [
+    ({'name': ' '}, 'name is empty'),
+    ({'cpf': ''}, 'cpf is empty'),
+    ({'cpf': '52998224726'}, "invalid CPF '52998224726'"),
+    ({'nis': '123'}, "invalid NIS '123'"),
+    ({'search_by': 'email'}, "invalid search_by 'email'"),
+    ({'search_by': 'nis'}, "search_by 'nis' without a NIS"),
+    ({'search_filter': 'social_programs; bolsa'}, 'invalid filters: bolsa'),
+    ({'since': '06/2024', 'until': '01/2024'}, "'since' must not be after 'until'"),
+    ({'since': '01/2024', 'detail_filter': {'since': '2024-01-01'}},
+     'give either detail_filter or since/until/columns'),
+])
+def test_rows_that_cannot_be_searched_are_rejected_with_a_reason(fields, error):
+    validator, queries = validate({**ANA, **fields})
+    assert queries == []
+    assert error in validator.rejects[0]['errors']
+
+
+def test_rows_are_normalized():
+    _, (query,) = validate({**ANA, 'name': ' ana  silva ', 'nis': '123.45678.90-1', 'search_by': ' NIS ',
+                            'search_filter': 'social_programs|social_programs', 'columns': 'Data; Valor'})
+    assert query['name'] == 'ANA SILVA' and query['cpf'] == '52998224725' and query['nis'] == '12345678901'
+    assert query['search_by'] == 'nis' and query['search_filter'] == ['social_programs']
+    assert query['detail_filter'].columns == ('Data', 'Valor')
+
+
+def test_repeated_queries_are_counted_once():
+    validator, queries = validate(ANA, {**ANA, 'name': 'ANA SILVA', 'cpf': '52998224725'}, {**ANA, 'since': '01/2024'})
+    assert len(queries) == 2
+    assert validator.duplicates == 1 and validator.rejects == []
+
+
+def test_default_search_mode_applies_to_rows_without_one():
+    _, (query,) = validate(ANA, search_by='name')
+    assert query['search_by'] == 'name'
+    with pytest.raises(ValueError):
+        BatchValidator(search_by='email')
+
+
+def test_search_query_inverts_search_options():
+    _, (query,) = validate({**ANA, 'since': '01/2024', 'columns': ['Data']})
+    rebuilt = search_query(**search_options(query))
+    assert rebuilt['detail_filter'].key() == query['detail_filter'].key()
+    assert {k: v for k, v in rebuilt.items() if k != 'detail_filter'} == \
+        {k: v for k, v in query.items() if k != 'detail_filter'}
@@ -0,0 +1,134 @@
+import pytest
+from selenium.common.exceptions import InvalidSessionIdException, WebDriverException
+from tenacity import wait_none
+
+from src.rpa.utils.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, portal_breaker
+from src.rpa.utils.web_driver_config import is_session_error
+
+
+def breaker(**options):
+    options = {'failure_threshold': 2, 'reset_timeout': 0.05, 'max_reset_timeout': 0.2, **options}
+    return CircuitBreaker('test', failure_types=(RuntimeError, WebDriverException),
+                          ignore=is_session_error, **options)
+
+
+def fail(circuit, error):
+    with pytest.raises(type(error)):
+        with circuit.guard('step'):
+            raise error
+
+
+def trip(circuit):
+    for _ in range(circuit.failure_threshold):
+        fail(circuit, RuntimeError('portal down'))
+
+
+def test_opens_at_the_threshold_and_rejects_calls():
+    circuit = breaker()
+    fail(circuit, RuntimeError('portal down'))
+    assert circuit.state == CLOSED
+    fail(circuit, RuntimeError('portal down'))
+    assert circuit.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        with circuit.guard('step'):
+            pytest.fail('ran while open')
+    assert circuit.stats()['rejected'] == 1
+
+
+def test_success_resets_the_count():
+    circuit = breaker()
+    fail(circuit, RuntimeError('portal down'))
+    with circuit.guard('step'):
+        pass
+    fail(circuit, RuntimeError('portal down'))
+    assert circuit.state == CLOSED
+
+
+@pytest.mark.parametrize('error', [
+    ValueError('bad input'),
+    InvalidSessionIdException('invalid session id'),
+    WebDriverException('disconnected: not connected to DevTools'),
+])
+def test_other_errors_do_not_count(error):
+    circuit = breaker(failure_threshold=1)
+    fail(circuit, error)
+    assert circuit.state == CLOSED and circuit.failures == 0
+
+
+def test_wrapped_session_errors_do_not_count():
+    circuit = breaker(failure_threshold=1)
+    error = RuntimeError('Failed to load Transparency Portal')
+    error.__cause__ = InvalidSessionIdException('invalid session id')
+    fail(circuit, error)
+    assert circuit.state == CLOSED
+
+
+def test_successful_probe_closes_the_circuit():
+    circuit = breaker()
+    trip(circuit)
+    with circuit.guard('probe', wait=1.0):
+        assert circuit.state == HALF_OPEN
+    assert circuit.state == CLOSED
+
+
+def test_failed_probe_doubles_the_cooldown():
+    circuit = breaker()
+    trip(circuit)
+    with pytest.raises(RuntimeError):
+        with circuit.guard('probe', wait=1.0):
+            raise RuntimeError('still down')
+    assert circuit.state == OPEN and circuit.cooldown == 0.1
+
+
+def test_only_one_probe_at_a_time():
+    circuit = breaker()
+    trip(circuit)
+    with circuit.guard('probe', wait=1.0):
+        with pytest.raises(CircuitOpenError):
+            with circuit.guard('second'):
+                pass
+
+
+def test_ignored_error_gives_up_the_probe():
+    circuit = breaker()
+    trip(circuit)
+    error = InvalidSessionIdException('invalid session id')
+    with pytest.raises(InvalidSessionIdException):
+        with circuit.guard('probe', wait=1.0):
+            raise error
+    assert circuit.state == HALF_OPEN and not circuit.probing
+
+
+class Driver:
+    def __init__(self, error):
+        self.error = error
+        self.loads = 0
+
+    def get(self, url):
+        self.loads += 1
+        raise self.error
+
+
+@pytest.fixture
+def portal(monkeypatch):
+    from src.rpa.modules.transparency_portal.core import TransparencyPortal
+    monkeypatch.setattr(TransparencyPortal._TransparencyPortal__load_portal.retry, 'wait', wait_none())
+    portal_breaker.reset()
+    yield TransparencyPortal
+    portal_breaker.reset()
+
+
+def test_portal_start_counts_once_after_its_retries(portal):
+    driver = Driver(WebDriverException('net::ERR_CONNECTION_RESET'))
+    with pytest.raises(RuntimeError):
+        portal(driver)
+    assert driver.loads == 3
+    assert portal_breaker.failures == 1
+
+
+def test_portal_start_on_a_dead_session_is_neither_retried_nor_counted(portal):
+    driver = Driver(InvalidSessionIdException('invalid session id'))
+    with pytest.raises(RuntimeError):
+        portal(driver)
+    assert driver.loads == 1
+    assert portal_breaker.failures == 0
@@ -0,0 +1,57 @@
+import json
+
+from src.rpa.modules.transparency_portal.person_search_service.delta import DeltaExporter
+
+
+def resource(extrato, recurso='Programa', valor='600,00'):
+    return {'nome': 'ANA', 'nis': '12345678901', 'recurso': recurso, 'valor': valor,
+            'link do recurso': f'/detalhe/{recurso}', 'extrato': extrato}
+
+
+def month(number):
+    return {'Mês folha': f'{number:02d}/2024', 'Valor (R$)': '600,00'}
+
+
+def previous(*resources):
+    return {'cpf': 'cpf', 'localidade': 'SP', 'scraped_at': '2024-01-01T00:00:00', 'data': list(resources)}
+
+
+def test_first_result_reports_every_resource_as_added():
+    delta = DeltaExporter().build(None, [resource([month(1)])], 'cpf', 'SP')
+    assert delta['changed']
+    assert delta['summary']['added_resources'] == 1 and delta['summary']['new_rows'] == 1
+
+
+def test_unchanged_result_is_a_small_record():
+    delta = DeltaExporter().build(previous(resource([month(1)])), [resource([month(1)])], 'cpf', 'SP')
+    assert delta == {'cpf': 'cpf', 'changed': False, 'previous_scraped_at': '2024-01-01T00:00:00'}
+
+
+def test_new_and_removed_rows_are_reported():
+    delta = DeltaExporter().build(previous(resource([month(1), month(2)])), [resource([month(2), month(3)])],
+                                  'cpf', 'SP')
+    updated, = delta['updated']
+    assert updated['new_rows'] == [month(3)]
+    assert updated['removed_rows'] == [month(1)]
+    assert delta['summary']['new_rows'] == 1 and delta['summary']['removed_rows'] == 1
+
+
+def test_removed_resources_and_changed_values_are_reported():
+    delta = DeltaExporter().build(previous(resource([]), resource([], recurso='Outro')),
+                                  [resource([], valor='700,00')], 'RJ', 'RJ')
+    assert delta['removed'] == [{'recurso': 'Outro', 'nis': '12345678901', 'link do recurso': '/detalhe/Outro'}]
+    assert delta['updated'][0]['changes'] == {'valor': {'old': '600,00', 'new': '700,00'}}
+    assert delta['localidade'] == {'old': 'SP', 'new': 'RJ'}
+    assert delta['summary']['changed_values'] == 2
+
+
+def test_save_returns_the_delta_as_json():
+    assert json.loads(DeltaExporter().save(None, [], 'cpf', 'SP'))['changed'] is False
+
+
+def test_resources_sharing_recurso_nis_and_link_are_not_collapsed():
+    first, second = resource([], valor='600,00'), resource([], valor='700,00')
+    delta = DeltaExporter().build(previous(first), [first, second], 'cpf', 'SP')
+    assert delta['summary']['added_resources'] == 1
+    assert delta['added'][0]['valor'] == '700,00'
+    assert delta['updated'] == [] and delta['removed'] == []
@@ -0,0 +1,84 @@
+from datetime import date
+
+import pytest
+
+from src.rpa.modules.transparency_portal.person_search_service.records import DetailFilter, TableSchema
+
+SCHEMA = TableSchema.intern(('Mês folha', 'Data', 'UF', 'Valor (R$)'))
+PAGE = [
+    ('04/2024', '10/04/2024', 'SP', '600,00'),
+    ('03/2024', '10/03/2024', 'SP', '600,00'),
+    ('02/2024', 'Sem data', 'SP', '600,00'),
+    ('01/2024', '10/01/2024', 'SP', '600,00'),
+]
+
+
+def months(rows):
+    return [row.to_dict()['Mês folha'] for row in rows]
+
+
+def test_rows_outside_the_window_are_dropped():
+    rows, past = DetailFilter(since='02/2024', until='03/2024').rows(SCHEMA, PAGE)
+    assert months(rows) == ['03/2024', '02/2024']
+    assert past
+
+
+def test_rows_whose_date_cannot_be_parsed_are_kept():
+    rows, _ = DetailFilter(since='01/2024', date_column='Data').rows(SCHEMA, PAGE)
+    assert months(rows) == ['04/2024', '03/2024', '02/2024', '01/2024']
+    rows, _ = DetailFilter(since='05/2024', date_column='Data').rows(SCHEMA, PAGE)
+    assert months(rows) == ['02/2024']
+
+
+def test_the_first_date_column_is_used_by_default():
+    assert DetailFilter().plan(SCHEMA)[2] == 0
+    assert DetailFilter(date_column='data').plan(SCHEMA)[2] == 1
+
+
+def test_columns_are_projected_case_insensitively_in_the_requested_order():
+    rows, _ = DetailFilter(columns=['valor (r$)', 'Mês folha', 'Ausente']).rows(SCHEMA, PAGE[:1])
+    assert rows[0].to_dict() == {'Valor (R$)': '600,00', 'Mês folha': '04/2024'}
+
+
+def test_the_window_applies_to_a_date_column_that_is_not_kept():
+    rows, _ = DetailFilter(since='03/2024', columns=['UF']).rows(SCHEMA, PAGE)
+    assert [row.to_dict() for row in rows] == [{'UF': 'SP'}, {'UF': 'SP'}]
+
+
+@pytest.mark.parametrize('dates, expected', [
+    ([date(2024, 3, 1), date(2024, 2, 1)], False),
+    ([date(2024, 3, 1), date(2023, 12, 1)], True),
+    ([date(2023, 11, 1), date(2023, 12, 1)], False),
+    ([date(2024, 11, 1), date(2025, 1, 1)], True),
+    ([], False),
+])
+def test_past_window_follows_the_page_order(dates, expected):
+    assert DetailFilter(since='01/2024', until='12/2024').past_window(dates) is expected
+
+
+def test_last_months_covers_the_current_month():
+    window = DetailFilter.last_months(3, today=date(2024, 2, 15))
+    assert window.since == date(2023, 12, 1) and window.until is None
+
+
+def test_round_trips_through_its_dict():
+    window = DetailFilter(since='01/2024', until='15/06/2024', columns=['Data', 'Valor (R$)'], date_column='Data')
+    assert DetailFilter.from_dict(window.to_dict()).key() == window.key()
+    assert DetailFilter.from_dict(DetailFilter().to_dict()).key() == (None, None, None, None)
+
+
+@pytest.mark.parametrize('options', [
+    {'since': '06/2024', 'until': '01/2024'},
+    {'since': '2024-01-01'},
+    {'until': '31/02/2024'},
+    {'columns': []},
+    {'columns': ['Data', ' ']},
+])
+def test_invalid_filters_are_rejected(options):
+    with pytest.raises(ValueError):
+        DetailFilter(**options)
+
+
+def test_last_months_must_be_positive():
+    with pytest.raises(ValueError):
+        DetailFilter.last_months(0)
@@ -0,0 +1,49 @@
+import pytest
+from selenium.common.exceptions import InvalidSessionIdException, WebDriverException
+
+from src.rpa.utils.driver_session import DriverSession
+
+
+class Driver:
+    def __init__(self):
+        self.quits = 0
+
+    def execute_cdp_cmd(self, cmd, params):
+        raise WebDriverException('no metrics')
+
+    def quit(self):
+        self.quits += 1
+
+
+def session():
+    return DriverSession(factory=Driver, max_jobs=100)
+
+
+def wrapped(error, cause):
+    error.__cause__ = cause
+    return error
+
+
+@pytest.mark.parametrize('error', [
+    InvalidSessionIdException('invalid session id'),
+    wrapped(RuntimeError('Failed to load Transparency Portal'), InvalidSessionIdException('invalid session id')),
+])
+def test_webdriver_errors_recycle_the_session(error):
+    drivers = session()
+    with pytest.raises(type(error)):
+        with drivers.job() as driver:
+            raise error
+    assert driver.quits == 1
+    assert not drivers.started
+    with drivers.job() as replacement:
+        assert replacement is not driver
+
+
+def test_other_errors_keep_the_session():
+    drivers = session()
+    with pytest.raises(RuntimeError):
+        with drivers.job() as driver:
+            raise RuntimeError('No results')
+    assert driver.quits == 0
+    with drivers.job() as same:
+        assert same is driver
@@ -0,0 +1,61 @@
+import pytest
+
+from src.rpa.modules.transparency_portal.person_search_service.extrato_buffer import ExtratoBuffer
+from src.rpa.modules.transparency_portal.person_search_service.records import TableSchema
+
+MONTHS = TableSchema.intern(('Mês folha', 'Valor (R$)'))
+PLACES = TableSchema.intern(('Mês folha', 'UF', 'Valor (R$)'))
+
+
+def rows(count, schema=MONTHS):
+    return [schema.row((f'{month:02d}/2024', *(['SP'] if schema is PLACES else []), f'{month},00'))
+            for month in range(1, count + 1)]
+
+
+def test_rows_stay_in_memory_below_the_threshold():
+    with ExtratoBuffer(max_rows=3) as buffer:
+        buffer.extend(rows(2))
+        assert buffer.spilled == 0
+        assert list(buffer) == rows(2)
+
+
+def test_rows_past_the_threshold_are_spilled_and_read_back_in_order():
+    with ExtratoBuffer(max_rows=3) as buffer:
+        buffer.extend(rows(8))
+        assert len(buffer) == 8 and buffer.spilled == 6
+        assert list(buffer) == rows(8)
+        assert list(buffer) == rows(8)
+
+
+def test_spilled_rows_keep_their_shared_schema():
+    with ExtratoBuffer(max_rows=2) as buffer:
+        buffer.extend(rows(2) + rows(2, PLACES))
+        read = list(buffer)
+        assert read == rows(2) + rows(2, PLACES)
+        assert read[0].schema is MONTHS and read[2].schema is PLACES
+
+
+def test_rows_can_be_appended_after_reading():
+    with ExtratoBuffer(max_rows=2) as buffer:
+        buffer.extend(rows(3))
+        list(buffer)
+        buffer.extend(rows(5)[3:])
+        assert list(buffer) == rows(5)
+
+
+def test_spill_dir_holds_the_spill_file(tmp_path):
+    with ExtratoBuffer(max_rows=1, spill_dir=str(tmp_path)) as buffer:
+        buffer.append(rows(1)[0])
+        assert buffer.spilled == 1
+
+
+def test_close_discards_the_rows():
+    buffer = ExtratoBuffer(max_rows=2)
+    buffer.extend(rows(5))
+    buffer.close()
+    assert len(buffer) == 0 and list(buffer) == []
+
+
+def test_threshold_must_be_positive():
+    with pytest.raises(ValueError):
+        ExtratoBuffer(max_rows=0)
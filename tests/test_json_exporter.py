@@ -0,0 +1,92 @@
+import json
+
+import pytest
+
+from src.rpa.modules.transparency_portal.person_search_service.extrato_buffer import ExtratoBuffer
+from src.rpa.modules.transparency_portal.person_search_service.json_exporter import JsonExporter
+from src.rpa.modules.transparency_portal.person_search_service.records import (
+    ResourceRecord, TableSchema, to_json_value,
+)
+from src.rpa.utils.result_archive import ResultArchive
+
+
+def record(name, **fields):
+    return ResourceRecord(nome=name, nis='12345678901', recurso='Programa', valor='R$ 600,00', **fields)
+
+
+@pytest.fixture
+def archive(tmp_path):
+    return ResultArchive(str(tmp_path / 'archive'), codec='gzip')
+
+
+def test_archive_key_tells_apart_cpfs_with_the_same_visible_digits():
+    assert JsonExporter.archive_key('52998224725') != JsonExporter.archive_key('11998224700')
+
+
+def test_archive_key_does_not_hold_the_cpf():
+    assert '52998224725' not in JsonExporter.archive_key('52998224725')
+
+
+def test_archive_entries_are_kept_per_searched_cpf(archive):
+    exporter = JsonExporter(archive=archive)
+    for cpf, name in (('52998224725', 'ANA'), ('11998224700', 'BRUNO')):
+        exporter.save([record(name)], '982247', 'SP', save=True, query_cpf=cpf)
+    exporter.save([record('ANA 2')], '982247', 'SP', save=True, query_cpf='52998224725')
+
+    assert len(archive) == 2
+    latest = json.loads(archive.get(JsonExporter.archive_key('52998224725')))
+    assert latest['data'][0]['nome'] == 'ANA 2'
+
+
+def test_archive_needs_the_searched_cpf(archive):
+    with pytest.raises(ValueError):
+        JsonExporter(archive=archive).save([record('ANA')], '982247', 'SP', save=True)
+
+
+def document(records, screenshot=''):
+    return {
+        'data': [JsonExporter.enrich(item.to_dict(), '982247', 'SP') for item in records],
+        'screenshot': screenshot,
+    }
+
+
+def spilled_extrato(count):
+    buffer = ExtratoBuffer(max_rows=2)
+    schema = TableSchema.intern(('Mês folha', 'Valor (R$)'))
+    buffer.extend(schema.row((f'{month:02d}/2024', '600,00')) for month in range(1, count + 1))
+    return buffer
+
+
+@pytest.mark.parametrize('records', [
+    [],
+    [record('ANA')],
+    [record('ANA', extrato=spilled_extrato(5)), record('BRUNO')],
+])
+def test_streamed_json_matches_the_whole_document(records):
+    streamed = JsonExporter().save(records, '982247', 'SP', screenshot='shot')
+    expected = document(records, 'shot')
+    assert streamed == json.dumps(expected, ensure_ascii=False, indent=4, default=to_json_value)
+
+
+def test_extrato_rows_are_written_as_they_are_read():
+    consumed = []
+
+    def extrato():
+        for month in range(1, 4):
+            consumed.append(month)
+            yield {'Mês folha': f'{month:02d}/2024'}
+
+    chunks = JsonExporter().iter_json([record('ANA', extrato=extrato())], '982247', 'SP')
+    for chunk in chunks:
+        if '01/2024' in chunk:
+            break
+    assert consumed == [1]
+
+
+def test_streamed_archive_entry_returns_its_path(archive):
+    records = [record('ANA', extrato=spilled_extrato(3))]
+    path = JsonExporter(archive=archive).save(records, '982247', 'SP', save=True, return_json=False,
+                                              query_cpf='52998224725')
+    key = JsonExporter.archive_key('52998224725')
+    assert key in path
+    assert len(json.loads(archive.get(key))['data'][0]['extrato']) == 3
@@ -0,0 +1,61 @@
+import json
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from src.rpa.modules.transparency_portal.person_search_service.records import TableSchema, dump_row
+
+HEADERS = ('Mês folha', 'Data', 'UF', 'Valor (R$)')
+
+
+def row(*cells):
+    return TableSchema.intern(HEADERS).row(cells)
+
+
+@pytest.mark.parametrize('cells', [
+    ('01/2024', '15/03/2024', 'SP', '1.234,56'),
+    ('12/1999', '01/01/2000', 'RJ', '-600,00'),
+    ('01/2024', '15/03/2024', 'SP', '0,05'),
+])
+def test_packed_cells_are_exported_as_scraped(cells):
+    extrato_row = row(*cells)
+    assert all(isinstance(value, int) for i, value in enumerate(extrato_row.values) if i != 2)
+    assert list(extrato_row.to_dict().values()) == list(cells)
+
+
+@pytest.mark.parametrize('cell', ['R$ 1.234,56', '1234,56', '1.234,5', '1.234,567', ' 1.234,56', 'Não informado', ''])
+def test_currency_that_would_not_format_back_stays_text(cell):
+    extrato_row = row('01/2024', '15/03/2024', 'SP', cell)
+    assert extrato_row.values[3] == cell
+    assert extrato_row.to_dict()['Valor (R$)'] == cell
+
+
+@pytest.mark.parametrize('cell', ['1/2024', '2024-01-15', '31/02/2024', '01/2024 ', 'Sem data'])
+def test_dates_that_would_not_format_back_stay_text(cell):
+    extrato_row = row(cell, cell, 'SP', '1,00')
+    assert extrato_row.values[:2] == (cell, cell)
+    assert list(extrato_row.to_dict().values())[:2] == [cell, cell]
+
+
+def test_get_reads_typed_values():
+    extrato_row = row('02/2024', '15/03/2024', 'SP', '1.234,56')
+    assert extrato_row.get('Mês folha') == date(2024, 2, 1)
+    assert extrato_row.get('Data') == date(2024, 3, 15)
+    assert extrato_row.get('Valor (R$)') == Decimal('1234.56')
+    assert extrato_row.get('UF') == 'SP'
+    assert extrato_row.get('Nome', 'missing') == 'missing'
+
+
+def test_schema_is_shared_and_text_cells_are_interned():
+    first, second = row('01/2024', '15/03/2024', ''.join(['S', 'P']), '1,00'), row('02/2024', '', 'SP', '2,00')
+    assert first.schema is second.schema
+    assert first.values[2] is second.values[2]
+
+
+def test_dump_row_writes_the_scraped_texts():
+    rows = [row('01/2024', '15/03/2024', 'SP', '1.234,56'), row('02/2024', '', 'RJ', 'R$ 5,00')]
+    assert [json.loads(dump_row(extrato_row)) for extrato_row in rows] == [
+        {'Mês folha': '01/2024', 'Data': '15/03/2024', 'UF': 'SP', 'Valor (R$)': '1.234,56'},
+        {'Mês folha': '02/2024', 'Data': '', 'UF': 'RJ', 'Valor (R$)': 'R$ 5,00'},
+    ]
@@ -0,0 +1,97 @@
+import os
+import secrets
+import time
+
+import pytest
+
+from src.rpa.utils.result_archive import ResultArchive
+
+
+def archive(tmp_path, **options):
+    return ResultArchive(str(tmp_path), codec='gzip', **options)
+
+
+def entry_size(tmp_path, content):
+    sized = ResultArchive(str(tmp_path / 'sizing'), codec='gzip')
+    sized.put('entry', content)
+    return sized.size
+
+
+@pytest.fixture
+def content():
+    return secrets.token_hex(2000)
+
+
+def test_entries_round_trip_from_text_or_chunks(tmp_path):
+    results = archive(tmp_path)
+    results.put('whole', '{"nome": "JOSÉ"}')
+    results.put('chunks', iter(['{"nome": ', '"JOSÉ"}']))
+    assert results.get('whole') == results.get('chunks') == '{"nome": "JOSÉ"}'
+    assert 'whole' in results and 'missing' not in results
+    assert results.get('missing') is None
+
+
+def test_replacing_an_entry_keeps_one_copy(tmp_path, content):
+    results = archive(tmp_path)
+    results.put('entry', 'old')
+    results.put('entry', content)
+    assert len(results) == 1
+    assert results.get('entry') == content
+    assert results.size == os.path.getsize(os.path.join(str(tmp_path), 'entry.json.gz'))
+
+
+def test_least_recently_read_entry_is_evicted_first(tmp_path, content):
+    results = archive(tmp_path / 'archive', max_bytes=int(entry_size(tmp_path, content) * 2.5))
+    results.put('a', content)
+    results.put('b', content)
+    results.get('a')
+    results.put('c', content)
+    assert 'a' in results and 'b' not in results and 'c' in results
+    assert results.size <= results.max_bytes
+
+
+def test_reads_order_eviction_after_a_restart(tmp_path, content):
+    directory = tmp_path / 'archive'
+    results = archive(directory)
+    results.put('a', content)
+    results.put('b', content)
+    results.get('a')
+
+    reopened = archive(directory, max_bytes=int(entry_size(tmp_path, content) * 1.5))
+    assert 'a' in reopened and 'b' not in reopened
+
+
+def test_the_newest_entry_is_kept_even_past_the_limit(tmp_path, content):
+    results = archive(tmp_path, max_bytes=10)
+    results.put('a', content)
+    results.put('b', content)
+    assert len(results) == 1 and results.get('b') == content
+
+
+def test_expired_entries_are_dropped(tmp_path):
+    results = archive(tmp_path, max_age=0.05)
+    results.put('a', 'x')
+    time.sleep(0.1)
+    assert 'a' not in results
+    assert results.get('a') is None
+    assert len(results) == 0 and not os.listdir(str(tmp_path))
+
+
+def test_delete(tmp_path):
+    results = archive(tmp_path)
+    results.put('a', 'x')
+    assert results.delete('a')
+    assert not results.delete('a')
+    assert results.size == 0
+
+
+@pytest.mark.parametrize('key', ['', '../escape', 'with space', 'a/b'])
+def test_invalid_keys_are_rejected(tmp_path, key):
+    with pytest.raises(ValueError):
+        archive(tmp_path).put(key, 'x')
+
+
+@pytest.mark.parametrize('options', [{'max_bytes': 0}, {'codec': 'lz4'}])
+def test_invalid_options_are_rejected(tmp_path, options):
+    with pytest.raises(ValueError):
+        ResultArchive(str(tmp_path), **options)
@@ -0,0 +1,182 @@
+import sqlite3
+import time
+from datetime import datetime
+
+import pytest
+
+from src.rpa.modules.transparency_portal.person_search_service.extrato_buffer import ExtratoBuffer
+from src.rpa.modules.transparency_portal.person_search_service.records import (
+    DetailFilter, ResourceRecord, TableSchema,
+)
+from src.rpa.modules.transparency_portal.person_search_service.result_store import ResultStore
+
+HEADERS = ('Mês folha', 'UF', 'Valor (R$)')
+
+
+def extrato(count, max_rows=2):
+    buffer = ExtratoBuffer(max_rows=max_rows)
+    schema = TableSchema.intern(HEADERS)
+    buffer.extend(schema.row((f'{month:02d}/2024', 'SP', f'{month},00')) for month in range(1, count + 1))
+    return buffer
+
+
+def record(name, rows=(), **fields):
+    return ResourceRecord(**{'nome': name, 'nis': '12345678901', 'recurso': 'Programa', 'valor': 'R$ 600,00',
+                             'extrato': rows, **fields})
+
+
+@pytest.fixture
+def store(tmp_path):
+    with ResultStore(str(tmp_path / 'results.db'), batch_size=2, flush_interval=60) as store:
+        yield store
+
+
+def test_spilled_extrato_is_stored_row_by_row_in_order(store):
+    rows = extrato(5)
+    assert rows.spilled == 4
+    store.add([record('ANA', rows)], '***.982.247-**', 'SP', query_cpf='52998224725')
+
+    stored = store.latest(query_cpf='52998224725')['data'][0]['extrato']
+    assert stored == [{'Mês folha': f'{month:02d}/2024', 'UF': 'SP', 'Valor (R$)': f'{month},00'}
+                      for month in range(1, 6)]
+
+
+def test_results_are_written_on_add_and_committed_per_batch(store):
+    reader = sqlite3.connect(store.path)
+    store.add([record('ANA')], '***.982.247-**', 'SP', screenshot='shot-1', query_cpf='52998224725')
+    assert reader.execute('SELECT COUNT(*) FROM results').fetchone() == (0,)
+    assert [row['screenshot'] for row in store._conn.execute('SELECT screenshot FROM results')] == ['shot-1']
+
+    store.add([record('BRUNO')], '***.444.777-**', 'SP', screenshot='shot-2', query_cpf='11144477735')
+    assert reader.execute('SELECT COUNT(*) FROM results').fetchone() == (2,)
+    reader.close()
+
+
+def test_a_failed_result_leaves_the_pending_ones_intact(store):
+    def broken():
+        yield record('BRUNO', extrato(3))
+        raise RuntimeError('scrape failed')
+
+    store.add([record('ANA', extrato(1))], '***.982.247-**', 'SP', query_cpf='52998224725')
+    with pytest.raises(RuntimeError):
+        store.add(broken(), '***.444.777-**', 'SP', query_cpf='11144477735')
+
+    assert store.flush() == 1
+    assert store.latest(query_cpf='11144477735') is None
+    assert store.latest(query_cpf='52998224725')['data'][0]['nome'] == 'ANA'
+    assert store._conn.execute('SELECT COUNT(*) FROM extrato').fetchone()[0] == 1
+
+
+def test_extrato_stored_as_json_before_the_extrato_table_is_read_back(store):
+    store._conn.execute("INSERT INTO results (id, cpf, location, scraped_at, query_cpf) "
+                        "VALUES (1, 'cpf', 'SP', '2024-01-01T00:00:00', '52998224725')")
+    store._conn.execute("INSERT INTO resources (result_id, nome, extrato) VALUES (1, 'ANA', '[{\"UF\": \"SP\"}]')")
+
+    assert store.latest(query_cpf='52998224725')['data'][0]['extrato'] == [{'UF': 'SP'}]
+
+
+def test_latest_can_be_restricted_to_one_detail_filter(store):
+    window = DetailFilter(since='01/2024')
+    store.add([record('ANA')], 'cpf', 'SP', scraped_at=datetime(2024, 1, 1), query_cpf='52998224725')
+    store.add([record('ANA 2')], 'cpf', 'SP', scraped_at=datetime(2024, 2, 1), query_cpf='52998224725',
+              detail_filter=window)
+
+    def name(**options):
+        return store.latest(query_cpf='52998224725', **options)['data'][0]['nome']
+
+    assert name() == 'ANA 2'
+    assert name(detail_filter=DetailFilter(since='01/2024')) == 'ANA 2'
+    assert name(detail_filter=None) == 'ANA'
+    assert name(detail_filter=DetailFilter()) == 'ANA'
+    assert store.latest(query_cpf='52998224725', detail_filter=DetailFilter(since='02/2024')) is None
+
+
+def scraped(store, name, day, **fields):
+    options = {key: fields.pop(key) for key in ('cpf', 'query_cpf') if key in fields}
+    store.add([record(name, **fields)], options.get('cpf', 'cpf'), 'SP', scraped_at=datetime(2024, 1, day),
+              query_cpf=options.get('query_cpf', '52998224725'))
+
+
+def names(documents):
+    return [document['data'][0]['nome'] if document['data'] else None for document in documents]
+
+
+def test_latest_by_cpf_nis_or_searched_cpf(store):
+    scraped(store, 'ANA', 1, cpf='***.982.247-**', nis='111')
+    scraped(store, 'ANA 2', 3, cpf='***.982.247-**', nis='111')
+    scraped(store, 'BRUNO', 2, cpf='***.982.247-**', nis='222', query_cpf='11998224700')
+
+    assert store.latest(cpf='***.982.247-**')['data'][0]['nome'] == 'ANA 2'
+    assert store.latest(nis='222')['data'][0]['nome'] == 'BRUNO'
+    assert store.latest(query_cpf='11998224700')['data'][0]['nome'] == 'BRUNO'
+    assert store.latest(nis='333') is None
+    with pytest.raises(ValueError):
+        store.latest()
+
+
+def test_between_is_a_half_open_window_oldest_first(store):
+    for day, name in ((3, 'C'), (1, 'A'), (2, 'B')):
+        scraped(store, name, day)
+    assert names(store.between()) == ['A', 'B', 'C']
+    assert names(store.between(datetime(2024, 1, 2), datetime(2024, 1, 3))) == ['B']
+
+
+def test_recurso_filter_keeps_only_its_resources(store):
+    store.add([record('ANA', recurso='Programa'), record('ANA', recurso='Outro')], 'cpf', 'SP',
+              scraped_at=datetime(2024, 1, 1))
+    scraped(store, 'BRUNO', 2, recurso='Programa')
+
+    documents = store.by_recurso('Outro')
+    assert len(documents) == 1
+    assert [item['recurso'] for item in documents[0]['data']] == ['Outro']
+    assert len(store.by_recurso('Programa')) == 2
+
+
+def test_documents_use_the_exporter_layout(store):
+    store.add([record('ANA', link='/detalhe')], 'cpf', 'SP', screenshot='shot', scraped_at=datetime(2024, 1, 1))
+    assert store.latest(cpf='cpf') == {
+        'cpf': 'cpf', 'localidade': 'SP', 'scraped_at': '2024-01-01T00:00:00', 'screenshot': 'shot',
+        'data': [{'nome': 'ANA', 'nis': '12345678901', 'recurso': 'Programa', 'valor': 'R$ 600,00',
+                  'link do recurso': '/detalhe', 'extrato': []}],
+    }
+
+
+def test_close_commits_pending_results(tmp_path):
+    path = str(tmp_path / 'results.db')
+    store = ResultStore(path, batch_size=10, flush_interval=60)
+    scraped(store, 'ANA', 1)
+    store.close()
+    store.close()
+    with ResultStore(path) as reopened:
+        assert reopened.latest(query_cpf='52998224725')['data'][0]['nome'] == 'ANA'
+
+
+def test_results_pending_past_the_interval_are_committed_in_the_background(tmp_path):
+    with ResultStore(str(tmp_path / 'results.db'), batch_size=10, flush_interval=0.05) as store:
+        scraped(store, 'ANA', 1)
+        reader = sqlite3.connect(store.path)
+        deadline = time.monotonic() + 5
+        while reader.execute('SELECT COUNT(*) FROM results').fetchone()[0] == 0:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        reader.close()
+
+
+def test_databases_from_before_the_searched_cpf_column_are_migrated(tmp_path):
+    path = str(tmp_path / 'results.db')
+    old = sqlite3.connect(path)
+    old.execute('CREATE TABLE results (id INTEGER PRIMARY KEY, cpf TEXT NOT NULL, location TEXT NOT NULL, '
+                "screenshot TEXT NOT NULL DEFAULT '', scraped_at TEXT NOT NULL)")
+    old.execute("INSERT INTO results (cpf, location, scraped_at) VALUES ('cpf', 'SP', '2024-01-01T00:00:00')")
+    old.commit()
+    old.close()
+
+    with ResultStore(path) as store:
+        assert store.latest(cpf='cpf')['localidade'] == 'SP'
+        scraped(store, 'ANA', 2)
+        assert store.latest(query_cpf='52998224725', detail_filter=None)['data'][0]['nome'] == 'ANA'
+
+
+def test_batch_size_must_be_positive(tmp_path):
+    with pytest.raises(ValueError):
+        ResultStore(str(tmp_path / 'results.db'), batch_size=0)
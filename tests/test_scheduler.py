@@ -0,0 +1,144 @@
+import threading
+
+import pytest
+
+from src.rpa.modules.transparency_portal.person_search_service.batch_input import search_query
+from src.rpa.modules.transparency_portal.person_search_service.warm_cache import SearchCache
+from src.rpa.modules.transparency_portal.scheduler import SearchScheduler
+from src.rpa.utils.driver_session import DriverSession
+
+ANA = dict(name='Ana Silva', cpf='52998224725')
+RESULT = '[{"nome": "ANA SILVA"}]'
+
+
+class Driver:
+    def execute_cdp_cmd(self, cmd, params):
+        return {'metrics': []}
+
+    def quit(self):
+        pass
+
+
+def scheduler(sessions=1, **options):
+    return SearchScheduler([DriverSession(factory=Driver) for _ in range(sessions)], **options)
+
+
+def job(driver, name):
+    return name
+
+
+def picked(searches, idle):
+    """Names of the jobs free sessions would start next, `idle` of them being free."""
+    names = []
+    searches._idle = idle
+    while (next_job := searches._pick()) is not None:
+        names.append(next_job.args[0])
+        searches._running[next_job.client] = searches._running.get(next_job.client, 0) + 1
+        searches._idle -= 1
+    return names
+
+
+@pytest.fixture
+def cache(tmp_path):
+    with SearchCache(str(tmp_path / 'cache.db')) as cache:
+        yield cache
+
+
+def test_cache_hit_returns_a_completed_future_without_queueing(cache):
+    cache.put(search_query(**ANA), RESULT)
+    searches = scheduler(search_cache=cache)
+    future = searches.search('desk', **ANA)
+    assert future.done() and future.result() == RESULT
+    assert searches.stats()['lanes']['interactive']['submitted'] == 0
+
+
+def test_cache_miss_is_counted_once_and_queued_as_a_refresh(cache):
+    searches = scheduler(search_cache=cache)
+    future = searches.search('desk', lane='interactive', **ANA)
+    assert not future.done()
+    (job,), = searches._queues['interactive'].values()
+    assert job.kwargs['refresh'] is True
+    assert cache.stats()['misses'] == 1
+    assert cache.hottest(10)[0][1] == pytest.approx(1, rel=0.01)
+    searches.close(cancel=True)
+    assert future.cancelled()
+
+
+def test_invalid_cached_search_fails_its_future(cache):
+    future = scheduler(search_cache=cache).search('desk', name='', cpf='52998224725')
+    with pytest.raises(ValueError):
+        future.result()
+
+
+def test_delta_searches_skip_the_cache(cache):
+    cache.put(search_query(**ANA), RESULT)
+    assert not scheduler(search_cache=cache, delta=True).search('desk', **ANA).done()
+
+
+def test_search_and_submit_default_to_the_same_lane():
+    searches = scheduler()
+    searches.submit(job, 'submitted')
+    searches.search('desk', **ANA)
+    assert {lane: stats['queued'] for lane, stats in searches.stats()['lanes'].items()} == {
+        'interactive': 0, 'batch': 2,
+    }
+
+
+def test_invalid_lane_is_rejected():
+    with pytest.raises(ValueError):
+        scheduler().submit(job, 'x', lane='urgent')
+
+
+def test_top_lane_goes_first():
+    searches = scheduler(sessions=3, reserved=0)
+    searches.submit(job, 'batch 1', lane='batch')
+    searches.submit(job, 'interactive 1', lane='interactive')
+    searches.submit(job, 'batch 2', lane='batch')
+    assert picked(searches, idle=3) == ['interactive 1', 'batch 1', 'batch 2']
+
+
+def test_client_with_fewer_running_jobs_goes_first():
+    searches = scheduler(sessions=4, reserved=0)
+    for i in range(3):
+        searches.submit(job, f'etl {i}', client='etl')
+    searches.submit(job, 'desk 0', client='desk')
+    assert picked(searches, idle=3) == ['etl 0', 'desk 0', 'etl 1']
+
+
+def test_client_limit_leaves_sessions_to_other_clients():
+    searches = scheduler(sessions=3, reserved=0, client_limit=1)
+    for i in range(3):
+        searches.submit(job, f'etl {i}', client='etl')
+    assert picked(searches, idle=3) == ['etl 0']
+
+
+def test_reserved_sessions_only_serve_the_top_lane():
+    searches = scheduler(sessions=3, reserved=1)
+    for i in range(3):
+        searches.submit(job, f'batch {i}', lane='batch')
+    assert picked(searches, idle=3) == ['batch 0', 'batch 1']
+    searches.submit(job, 'interactive 0', lane='interactive')
+    assert picked(searches, idle=1) == ['interactive 0']
+
+
+@pytest.mark.parametrize('sessions, reserved, expected', [(1, 1, 0), (2, 5, 1), (4, 2, 2)])
+def test_reserved_sessions_leave_one_for_the_other_lanes(sessions, reserved, expected):
+    assert scheduler(sessions=sessions, reserved=reserved).reserved == expected
+
+
+def test_interactive_search_runs_while_batch_work_holds_the_other_sessions():
+    started, release = threading.Event(), threading.Event()
+
+    def blocking(driver, name):
+        started.set()
+        release.wait(5)
+        return name
+
+    with scheduler(sessions=2, reserved=1) as searches:
+        batch = [searches.submit(blocking, f'batch {i}', lane='batch') for i in range(2)]
+        assert started.wait(5)
+        interactive = searches.submit(job, 'interactive', lane='interactive')
+        assert interactive.result(timeout=5) == 'interactive'
+        assert [future.running() for future in batch] == [True, False]
+        release.set()
+        assert [future.result(timeout=5) for future in batch] == ['batch 0', 'batch 1']
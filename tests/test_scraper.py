@@ -0,0 +1,53 @@
+from src.rpa.modules.transparency_portal.person_search_service.scraper import ScrapePages
+
+
+class Button:
+    def __init__(self, enabled=True, displayed=True, classes=''):
+        self.enabled = enabled
+        self.displayed = displayed
+        self.classes = classes
+        self.clicks = 0
+
+    def is_enabled(self):
+        return self.enabled
+
+    def is_displayed(self):
+        return self.displayed
+
+    def get_attribute(self, name):
+        return self.classes if name == 'class' else None
+
+    def click(self):
+        self.clicks += 1
+
+
+class Driver:
+    def __init__(self, *buttons):
+        self.buttons = list(buttons)
+
+    def find_elements(self, by, value):
+        return self.buttons
+
+    def find_element(self, by, value):
+        return self.buttons[0]
+
+
+def test_no_button_is_the_last_page():
+    assert not ScrapePages(Driver(), timeout=1).click_next()
+
+
+def test_disabled_button_is_the_last_page():
+    assert not ScrapePages(Driver(Button(enabled=False)), timeout=1).click_next()
+    assert not ScrapePages(Driver(Button(classes='paginate_button disabled')), timeout=1).click_next()
+
+
+def test_enabled_button_is_clicked():
+    button = Button()
+    assert ScrapePages(Driver(button), timeout=1).click_next()
+    assert button.clicks == 1
+
+
+def test_button_that_never_becomes_clickable_is_logged(caplog):
+    pages = ScrapePages(Driver(Button(displayed=False)), timeout=0.2, resource_url='/detalhe')
+    assert not pages.click_next()
+    assert 'extrato may be incomplete' in caplog.text
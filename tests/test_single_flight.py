@@ -0,0 +1,122 @@
+import threading
+import time
+
+import pytest
+
+from src.rpa.utils.single_flight import SingleFlight, unique_by
+
+
+def run_together(count, target):
+    results = [None] * count
+    errors = [None] * count
+
+    def run(index):
+        try:
+            results[index] = target()
+        except Exception as e:
+            errors[index] = e
+
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.02)
+    return threads, results, errors
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def scrape():
+        calls.append(None)
+        release.wait(5)
+        return '[{"nome": "ANA SILVA"}]'
+
+    threads, results, errors = run_together(4, lambda: flight.do('key', scrape))
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert results == ['[{"nome": "ANA SILVA"}]'] * 4
+    assert errors == [None] * 4
+    assert flight.in_flight() == 0
+
+
+def test_error_reaches_every_caller():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def scrape():
+        release.wait(5)
+        raise RuntimeError('portal down')
+
+    threads, results, errors = run_together(3, lambda: flight.do('key', scrape))
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert all(isinstance(error, RuntimeError) for error in errors)
+    assert len({id(error) for error in errors}) == 1
+    assert flight.in_flight() == 0
+
+
+def test_key_is_released_after_the_call():
+    flight = SingleFlight()
+    assert flight.do('key', lambda: 1) == 1
+    assert flight.do('key', lambda: 2) == 2
+    with pytest.raises(ValueError):
+        flight.do('key', lambda: int('x'))
+    assert flight.do('key', lambda: 3) == 3
+
+
+def test_unique_by_keeps_the_first_of_each_key():
+    assert unique_by(['a', 'B', 'b', 'A', 'c'], str.lower) == ['a', 'B', 'c']
+
+
+def searches_in_flight(monkeypatch, *options):
+    from src.rpa.modules.transparency_portal.person_search_service.core import PersonSearchService
+    monkeypatch.setattr(PersonSearchService, 'single_flight', SingleFlight())
+    release = threading.Event()
+    started = []
+
+    def run_search(self, input_value):
+        started.append(self)
+        release.wait(5)
+        return 'result' if self.return_json else 'path'
+
+    monkeypatch.setattr(PersonSearchService, 'run_search', run_search)
+    services = [PersonSearchService(None, name='Ana Silva', cpf='52998224725', **kwargs) for kwargs in options]
+    results = [None] * len(services)
+
+    def search(index):
+        results[index] = services[index].search()
+
+    threads = [threading.Thread(target=search, args=(index,)) for index in range(len(services))]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.05)
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    return started, results
+
+
+def test_same_search_and_output_share_a_scrape(monkeypatch):
+    started, results = searches_in_flight(monkeypatch, {}, {})
+    assert len(started) == 1
+    assert results == ['result', 'result']
+
+
+@pytest.mark.parametrize('options', [
+    {'return_json': False},
+    {'save_json': False},
+    {'recording_dir': 'recordings'},
+])
+def test_different_output_settings_scrape_separately(monkeypatch, options):
+    started, results = searches_in_flight(monkeypatch, {}, options)
+    assert len(started) == 2
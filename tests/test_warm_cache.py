@@ -0,0 +1,132 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pytest
+
+from src.rpa.modules.transparency_portal.person_search_service.batch_input import search_query
+from src.rpa.modules.transparency_portal.person_search_service.warm_cache import CacheWarmer, SearchCache
+
+ANA = search_query('Ana Silva', '529.982.247-25')
+BRUNO = search_query('Bruno Lima', '11144477735')
+RESULT = '[{"nome": "ANA SILVA"}]'
+NIGHT = datetime(2024, 1, 1, 22)
+NOON = datetime(2024, 1, 1, 12)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    with SearchCache(str(tmp_path / 'cache.db'), ttl=100, half_life=1000) as cache:
+        yield cache
+
+
+def test_result_is_served_until_it_expires(cache):
+    cache.put(ANA, RESULT, now=0)
+    assert cache.get(ANA, now=99) == RESULT
+    assert cache.get(ANA, now=100) is None
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+
+
+def test_key_holds_the_searched_person_and_window(cache):
+    cache.put(ANA, RESULT, now=0)
+    assert cache.get(search_query('Ana Silva', '52998224725'), now=1) == RESULT
+    assert cache.get(search_query('Ana Silva', '11144477735', search_by='name'), now=1) is None
+    assert cache.get(search_query('Ana Silva', '52998224725', since='01/2024'), now=1) is None
+
+
+def test_key_needs_name_and_cpf(cache):
+    with pytest.raises(ValueError):
+        cache.key(search_query('', '52998224725'))
+
+
+def test_empty_results_are_not_cached(cache):
+    cache.put(ANA, '[]')
+    assert cache.get(ANA) is None
+
+
+def test_lookup_counts_requests(cache):
+    assert cache.lookup(ANA) is None
+    cache.put(ANA, RESULT)
+    assert cache.lookup(ANA) == RESULT
+    assert cache.hottest(10, horizon=1000)[0][1] == pytest.approx(2, rel=0.01)
+
+
+def test_hottest_orders_by_decayed_requests(cache):
+    for _ in range(4):
+        cache.touch(ANA, now=0)
+    for _ in range(3):
+        cache.touch(BRUNO, now=1000)
+    hottest = cache.hottest(10, now=1000)
+    assert [query['name'] for query, _ in hottest] == ['Bruno Lima', 'Ana Silva']
+    assert [round(heat, 2) for _, heat in hottest] == [3.0, 2.0]
+
+
+def test_hottest_skips_fresh_and_cold_keys(cache):
+    cache.touch(ANA, now=0)
+    cache.put(ANA, RESULT, now=0)
+    cache.touch(BRUNO, now=0)
+    assert [query['name'] for query, _ in cache.hottest(10, horizon=10, now=0)] == ['Bruno Lima']
+    assert cache.hottest(10, now=2000) == []
+
+
+class Scheduler:
+    lanes = ('interactive', 'batch')
+
+    def __init__(self, cache):
+        self.portal_options = {'search_cache': cache}
+        self.client_limits = {}
+        self.executor = ThreadPoolExecutor(max_workers=10)
+        self.lock = threading.Lock()
+        self.running = 0
+        self.most_running = 0
+        self.searches = []
+
+    def search(self, client, lane=None, **options):
+        self.searches.append(dict(options, client=client, lane=lane))
+        return self.executor.submit(self.scrape)
+
+    def scrape(self):
+        with self.lock:
+            self.running += 1
+            self.most_running = max(self.most_running, self.running)
+        time.sleep(0.05)
+        with self.lock:
+            self.running -= 1
+        return RESULT
+
+
+def hot_keys(cache, count):
+    for index in range(count):
+        cache.touch(search_query(f'Pessoa {index}', '52998224725'))
+
+
+def test_warmer_needs_the_scheduler_cache(cache, tmp_path):
+    with SearchCache(str(tmp_path / 'other.db')) as other:
+        with pytest.raises(ValueError):
+            CacheWarmer(other, Scheduler(cache))
+
+
+def test_warmer_refreshes_hot_keys_off_peak_only(cache):
+    hot_keys(cache, 3)
+    scheduler = Scheduler(cache)
+    warmer = CacheWarmer(cache, scheduler)
+    assert warmer.run_once(NOON) == 0
+    assert scheduler.searches == []
+    assert warmer.run_once(NIGHT) == 3
+    assert all(search['refresh'] and search['lane'] == 'batch' for search in scheduler.searches)
+
+
+def test_warmer_queues_no_more_than_its_sessions(cache):
+    hot_keys(cache, 6)
+    scheduler = Scheduler(cache)
+    assert CacheWarmer(cache, scheduler, sessions=2).run_once(NIGHT) == 6
+    assert scheduler.most_running == 2
+    assert scheduler.client_limits == {}
+
+
+def test_off_peak_window_wraps_midnight(cache):
+    warmer = CacheWarmer(cache, Scheduler(cache), off_peak=(20, 7))
+    assert warmer.is_off_peak(NIGHT)
+    assert warmer.is_off_peak(datetime(2024, 1, 1, 3))
+    assert not warmer.is_off_peak(NOON)
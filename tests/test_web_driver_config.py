@@ -0,0 +1,87 @@
+import pytest
+from selenium.common.exceptions import InvalidSessionIdException, WebDriverException
+
+from src.rpa.utils.web_driver_config import (
+    ASSETS_LOADED_SCRIPT, PAGE_PROFILES, RELOAD_ASSETS_SCRIPT, execute_cdp, is_session_error, page_assets,
+)
+
+
+class RemoteDriver:
+    """A Remote session: CDP only through `execute`, scripts answered from `loaded`."""
+
+    def __init__(self, profile='lightweight', assets=3, loaded=(True,)):
+        self.page_profile = PAGE_PROFILES[profile]
+        self.assets = assets
+        self.loaded = list(loaded)
+        self.commands = []
+        self.scripts = []
+        self.refreshed = False
+
+    def execute(self, command, params):
+        self.commands.append((command, params['cmd'], params['params']))
+        return {'value': None}
+
+    def execute_script(self, script, *args):
+        self.scripts.append(script)
+        if script == RELOAD_ASSETS_SCRIPT:
+            return self.assets
+        return self.loaded.pop(0) if len(self.loaded) > 1 else self.loaded[0]
+
+    def refresh(self):
+        self.refreshed = True
+
+    def blocked(self):
+        return [params['urls'] for _, cmd, params in self.commands if cmd == 'Network.setBlockedURLs']
+
+
+def test_execute_cdp_uses_the_remote_connection_command():
+    driver = RemoteDriver()
+    execute_cdp(driver, 'Network.enable')
+    assert driver.commands == [('executeCdpCommand', 'Network.enable', {})]
+
+
+def test_assets_are_unblocked_and_reloaded_around_the_step():
+    driver = RemoteDriver(loaded=(False, True))
+    with page_assets(driver, element=object(), timeout=2):
+        assert driver.blocked() == [[]]
+        assert driver.scripts == [RELOAD_ASSETS_SCRIPT, ASSETS_LOADED_SCRIPT, ASSETS_LOADED_SCRIPT]
+    assert driver.blocked() == [[], list(PAGE_PROFILES['lightweight'].blocked_urls)]
+
+
+def test_assets_are_blocked_again_when_the_step_fails():
+    driver = RemoteDriver()
+    with pytest.raises(WebDriverException):
+        with page_assets(driver, element=object(), timeout=1):
+            raise WebDriverException('screenshot failed')
+    assert driver.blocked()[-1] == list(PAGE_PROFILES['lightweight'].blocked_urls)
+
+
+def test_slow_assets_do_not_stop_the_step():
+    driver = RemoteDriver(loaded=(False,))
+    with page_assets(driver, element=object(), timeout=0.3):
+        pass
+    assert len(driver.blocked()) == 2
+
+
+def test_reload_refreshes_the_page():
+    driver = RemoteDriver()
+    with page_assets(driver, reload=True):
+        assert driver.refreshed
+    assert RELOAD_ASSETS_SCRIPT not in driver.scripts
+
+
+def test_profiles_without_blocking_are_left_alone():
+    driver = RemoteDriver(profile='default')
+    with page_assets(driver, element=object()):
+        pass
+    assert driver.commands == [] and driver.scripts == []
+
+
+@pytest.mark.parametrize('error, expected', [
+    (InvalidSessionIdException('invalid session id'), True),
+    (WebDriverException('chrome not reachable'), True),
+    (WebDriverException('element click intercepted'), False),
+    (RuntimeError('No results'), False),
+])
+def test_session_errors(error, expected):
+    assert is_session_error(error) is expected